@@ -18,18 +18,50 @@ class Settings(BaseSettings):
     # Rate Limiter
     RATE_LIMIT_MAX: int = Field(60, env="RATE_LIMIT_MAX")           # max requests
     RATE_LIMIT_WINDOW_SEC: int = Field(60, env="RATE_LIMIT_WINDOW_SEC")  # per seconds
+    # "memory" (per worker process) or "mongo" (shared by all workers)
+    RATE_LIMIT_BACKEND: str = Field("memory", env="RATE_LIMIT_BACKEND")
+    RATE_LIMIT_COLLECTION: str = Field("rate_limits", env="RATE_LIMIT_COLLECTION")
+    RATE_LIMIT_EVICT_SEC: int = Field(300, env="RATE_LIMIT_EVICT_SEC")  # idle-key sweep (memory backend)
 
     # Optional bootstrap admin email
     #ADMIN_EMAIL: Optional[str] = Field(None, env="ADMIN_EMAIL")
 
-    # Pinecone
-    PINECONE_API_KEY: str = Field(..., env="PINECONE_API_KEY")
+    # Vector store: "pinecone" or "local" (embedded index written by the ETL worker)
+    VECTOR_STORE: str = Field("pinecone", env="VECTOR_STORE")
+    LOCAL_INDEX_DIR: str = Field("vector_index", env="LOCAL_INDEX_DIR")
+    LOCAL_EMBEDDER: str = Field("hashing:384", env="LOCAL_EMBEDDER")
+
+    # Pinecone (required when VECTOR_STORE=pinecone)
+    PINECONE_API_KEY: Optional[str] = Field(None, env="PINECONE_API_KEY")
     PINECONE_INDEX_NAME: str = Field("automateflow", env="PINECONE_INDEX_NAME")
 
+    # Retrieval: vector store calls run on their own threads, with a timeout per namespace
+    VECTOR_SEARCH_TIMEOUT_SEC: float = Field(5.0, env="VECTOR_SEARCH_TIMEOUT_SEC")
+    VECTOR_SEARCH_THREADS: int = Field(32, env="VECTOR_SEARCH_THREADS")
+
     # Groq
     GROQ_API_KEY: str = Field(..., env="GROQ_API_KEY")
     GROQ_MODEL_NAME: str = Field("llama-3.3-70b-versatile", env="GROQ_MODEL_NAME")
- 
+    GROQ_MAX_CONCURRENCY: int = Field(8, env="GROQ_MAX_CONCURRENCY")           # completions in flight per worker
+    GROQ_QUEUE_TIMEOUT_SEC: float = Field(10.0, env="GROQ_QUEUE_TIMEOUT_SEC")  # wait for a free slot
+    GROQ_TIMEOUT_SEC: float = Field(60.0, env="GROQ_TIMEOUT_SEC")              # per request
+    GROQ_CONNECT_TIMEOUT_SEC: float = Field(5.0, env="GROQ_CONNECT_TIMEOUT_SEC")
+    GROQ_MAX_CONNECTIONS: int = Field(20, env="GROQ_MAX_CONNECTIONS")          # keep-alive pool size
+    GROQ_MAX_RETRIES: int = Field(2, env="GROQ_MAX_RETRIES")
+
+    # Answer cache: repeated queries skip retrieval and the LLM until the index changes
+    ANSWER_CACHE_ENABLED: bool = Field(True, env="ANSWER_CACHE_ENABLED")
+    ANSWER_CACHE_TTL_SEC: float = Field(3600.0, env="ANSWER_CACHE_TTL_SEC")
+    ANSWER_CACHE_MAX_ENTRIES: int = Field(10000, env="ANSWER_CACHE_MAX_ENTRIES")
+    ANSWER_CACHE_MAX_MB: float = Field(64.0, env="ANSWER_CACHE_MAX_MB")
+    # Cosine similarity for near-duplicate queries to share an answer; unset = exact matches only
+    ANSWER_CACHE_SEMANTIC_THRESHOLD: Optional[float] = Field(None, env="ANSWER_CACHE_SEMANTIC_THRESHOLD")
+    ANSWER_CACHE_EMBEDDER: str = Field("hashing:384", env="ANSWER_CACHE_EMBEDDER")
+    # Index version stamp bumped by the ETL worker (its MongoDB database)
+    INDEX_VERSION_DB: str = Field("tenderwin_db", env="INDEX_VERSION_DB")
+    INDEX_VERSION_COLLECTION: str = Field("etl_index_version", env="INDEX_VERSION_COLLECTION")
+    INDEX_VERSION_CHECK_SEC: float = Field(5.0, env="INDEX_VERSION_CHECK_SEC")  # how often to poll it
+
 
     class Config:
         env_file = ".env"
@@ -1,36 +1,192 @@
 # app/core/rate_limit.py
-import asyncio
-from fastapi import HTTPException, Request
-from functools import wraps
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache, wraps
 from time import time
+from fastapi import HTTPException, Request
+from pymongo import ReturnDocument
 from app.core.config import get_settings
+from app.core.logger import get_logger
+from app.db.mongo import mongo
 
 settings = get_settings()
+logger = get_logger(__name__)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int = 0  # seconds until the next request would be allowed
+
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window counter: allows ``limit`` requests per ``window`` seconds per key.
+
+    Only two counters are kept per key, for the current and the previous fixed
+    window. The previous count is weighted by how much of it still overlaps the
+    sliding window, so a check is O(1) in time and memory, however many
+    requests a client sends. Subclasses store the counters.
+    """
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+
+    async def hit(self, key: str) -> RateLimitResult:
+        """Counts one request for ``key`` unless that would exceed the limit."""
+        raise NotImplementedError
+
+    def _estimate(self, now: float, window_start: float, count: int, previous: int) -> float:
+        return previous * (1 - (now - window_start) / self.window) + count
+
+    def _result(self, now: float, window_start: float, count: int, previous: int, allowed: bool) -> RateLimitResult:
+        used = self._estimate(now, window_start, count, previous)
+        remaining = max(0, math.floor(self.limit - used))
+        retry_after = 0
+        if not allowed:
+            if count + 1 > self.limit or not previous:
+                # the current window alone is full: wait for the next one
+                wait = window_start + self.window - now
+            else:
+                # wait until enough of the previous window has slid out
+                wait = window_start + self.window * (1 - (self.limit - 1 - count) / previous) - now
+            retry_after = max(1, math.ceil(wait))
+        return RateLimitResult(allowed, self.limit, remaining, retry_after)
+
+
+class MemoryRateLimiter(SlidingWindowLimiter):
+    """
+    Per-process counters. Keys idle for two windows are swept every
+    ``evict_interval`` seconds, so memory only holds recently active clients.
+    """
+    def __init__(self, limit: int, window: float, evict_interval: float = 300.0):
+        super().__init__(limit, window)
+        self.evict_interval = evict_interval
+        self._counters = {}  # key -> [window number, count, previous window's count]
+        self._next_sweep = time() + evict_interval
+
+    async def hit(self, key: str) -> RateLimitResult:
+        now = time()
+        if now >= self._next_sweep:
+            self.evict(now)
+        window_number = int(now // self.window)
+        window_start = window_number * self.window
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = [window_number, 0, 0]
+        elif counter[0] != window_number:
+            # roll over; the old count only matters if it was the window just before
+            counter[2] = counter[1] if counter[0] == window_number - 1 else 0
+            counter[0], counter[1] = window_number, 0
+
+        allowed = self._estimate(now, window_start, counter[1] + 1, counter[2]) <= self.limit
+        if allowed:
+            counter[1] += 1
+        return self._result(now, window_start, counter[1], counter[2], allowed)
+
+    def evict(self, now: float = None):
+        """Drops keys without requests in the current or previous window."""
+        now = time() if now is None else now
+        stale = int(now // self.window) - 1
+        for key in [k for k, c in self._counters.items() if c[0] < stale]:
+            del self._counters[key]
+        self._next_sweep = now + self.evict_interval
+
+
+class MongoRateLimiter(SlidingWindowLimiter):
+    """
+    Counters in MongoDB, shared by every worker and instance of the API.
+
+    One document per key and window (``{"_id": "<key>|<window number>", "count"}``)
+    updated with an atomic ``$inc``; a TTL index on ``expires_at`` lets MongoDB
+    remove windows that can no longer matter. If MongoDB is unreachable requests
+    are let through rather than failing the API.
+    """
+    def __init__(self, limit: int, window: float, collection_name: str = "rate_limits"):
+        super().__init__(limit, window)
+        self.collection_name = collection_name
+        self._indexed = False
+
+    @property
+    def collection(self):
+        return mongo.db[self.collection_name]
+
+    async def hit(self, key: str) -> RateLimitResult:
+        now = time()
+        window_number = int(now // self.window)
+        window_start = window_number * self.window
+        try:
+            if not self._indexed:
+                await self.collection.create_index("expires_at", expireAfterSeconds=0)
+                self._indexed = True
+            expires_at = datetime.fromtimestamp(window_start + 2 * self.window, timezone.utc)
+            doc = await self.collection.find_one_and_update(
+                {"_id": f"{key}|{window_number}"},
+                {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": expires_at}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            previous_doc = await self.collection.find_one({"_id": f"{key}|{window_number - 1}"})
+            count, previous = doc["count"], previous_doc["count"] if previous_doc else 0
+            allowed = self._estimate(now, window_start, count, previous) <= self.limit
+            if not allowed:
+                # rejected requests do not count against the client
+                await self.collection.update_one({"_id": doc["_id"]}, {"$inc": {"count": -1}})
+                count -= 1
+        except Exception as e:
+            logger.warning(f"Rate limit check skipped, MongoDB unavailable: {e!r}")
+            return RateLimitResult(True, self.limit, self.limit)
+        return self._result(now, window_start, count, previous, allowed)
+
+
+@lru_cache
+def get_rate_limiter() -> SlidingWindowLimiter:
+    """The limiter selected by RATE_LIMIT_BACKEND ("memory" or "mongo")."""
+    if settings.RATE_LIMIT_BACKEND == "mongo":
+        return MongoRateLimiter(settings.RATE_LIMIT_MAX, settings.RATE_LIMIT_WINDOW_SEC,
+                                collection_name=settings.RATE_LIMIT_COLLECTION)
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryRateLimiter(settings.RATE_LIMIT_MAX, settings.RATE_LIMIT_WINDOW_SEC,
+                                 evict_interval=settings.RATE_LIMIT_EVICT_SEC)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{settings.RATE_LIMIT_BACKEND}'")
+
+
+def client_key(request: Request) -> str:
+    """Username set by authentication if available, else the client IP."""
+    username = getattr(request.state, "username", None)
+    if username:
+        return f"user:{username}"
+    return f"ip:{request.client.host}" if request.client else "anon"
+
+
+async def enforce_rate_limit(key: str):
+    """Raises 429 with a Retry-After header once ``key`` is over the limit."""
+    result = await get_rate_limiter().hit(key)
+    if not result.allowed:
+        logger.warning(f"Rate limit exceeded for {key}")
+        raise HTTPException(status_code=429, detail="Rate limit exceeded",
+                            headers={"Retry-After": str(result.retry_after),
+                                     "X-RateLimit-Limit": str(result.limit),
+                                     "X-RateLimit-Remaining": "0"})
+
+
+async def rate_limit(request: Request):
+    """FastAPI dependency form, e.g. ``dependencies=[Depends(rate_limit)]``."""
+    await enforce_rate_limit(client_key(request))
 
-# store request timestamps per user (username or IP)
-_request_logs = {}
 
 def rate_limiter():
     """
-    Decorator to limit requests per user/IP.
+    Decorator to limit requests per user/IP; the endpoint must take ``request: Request``.
     """
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             request: Request = kwargs.get("request")
-            # Use token username if available, else IP
-            key = getattr(request.state, "username", request.client.host if request else "anon")
-            now = time()
-            window = settings.RATE_LIMIT_WINDOW_SEC
-            max_requests = settings.RATE_LIMIT_MAX
-
-            timestamps = _request_logs.get(key, [])
-            # remove expired timestamps
-            timestamps = [t for t in timestamps if t > now - window]
-            if len(timestamps) >= max_requests:
-                raise HTTPException(status_code=429, detail="Rate limit exceeded")
-            timestamps.append(now)
-            _request_logs[key] = timestamps
+            await enforce_rate_limit(client_key(request) if request else "anon")
             return await func(*args, **kwargs)
         return wrapper
     return decorator
@@ -1,3 +1,4 @@
+import json
 from typing import Any, Optional
 from pydantic import BaseModel
 
@@ -13,3 +14,8 @@ class APIResponse(BaseModel):
     @classmethod
     def fail(cls, error: str, message: str = "Failed"):
         return cls(message=message, data=None, error=error)
+
+
+def sse_event(event: str, data: Any) -> str:
+    """One Server-Sent Events frame carrying ``data`` as JSON."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -1,12 +1,29 @@
 # app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.db.mongo import connect_to_mongo, close_mongo_connection
 from app.routers import auth, users, health,search
 from app.core.config import get_settings
+from app.services.retrieval import shutdown_retrieval
+from app.services.llm import start_llm_client, close_llm_client
 
 settings = get_settings()
 
-app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """App-scoped resources: MongoDB, the pooled LLM client and the vector search threads."""
+    await connect_to_mongo()
+    await start_llm_client()
+    try:
+        yield
+    finally:
+        await close_llm_client()
+        await close_mongo_connection()
+        shutdown_retrieval()
+
+
+app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG, lifespan=lifespan)
 
 
 app.include_router(auth.router)
@@ -14,11 +31,3 @@ app.include_router(auth.router)
 app.include_router(health.router)
 
 app.include_router(search.router)
-@app.on_event("startup")
-async def startup_db():
-    await connect_to_mongo()
-
-
-@app.on_event("shutdown")
-async def shutdown_db():
-    await close_mongo_connection()
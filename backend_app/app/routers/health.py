@@ -1,5 +1,6 @@
 
 from fastapi import APIRouter
+from app.services.answer_cache import get_answer_cache
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -11,3 +12,13 @@ async def ping():
     Returns simple status to verify API is running.
     """
     return {"status": "ok", "message": "pong"}
+
+
+@router.get("/cache")
+async def cache_stats():
+    """
+    Answer cache statistics: hits (exact and semantic), misses, hit rate,
+    evictions, size and the index version the entries belong to.
+    """
+    cache = get_answer_cache()
+    return {"enabled": cache is not None, **(cache.stats() if cache else {})}
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from app.core.security import decode_token
 from app.schemas.search import SearchRequest
-from app.services.search_service import search_query_service
-from app.core.response import APIResponse
+from app.services.search_service import search_query_service, stream_search_service
+from app.services.llm import LLMBusyError
+from app.core.response import APIResponse, sse_event
+from app.core.rate_limit import rate_limit
 from app.core.logger import get_logger
 
 router = APIRouter(prefix="/search", tags=["search"])
@@ -26,8 +29,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except Exception as e:
         return raise_api_exception("Invalid token", error=str(e), status_code=401)
 
+async def limit_search(request: Request, current_user: dict = Depends(get_current_user)):
+    """Rate limits searches per user (per IP when the token was rejected)."""
+    if isinstance(current_user, dict):
+        request.state.username = current_user.get("username")
+    await rate_limit(request)
 
-@router.post("/")
+
+@router.post("/", dependencies=[Depends(limit_search)])
 async def search_users(request_body: SearchRequest, current_user: dict = Depends(get_current_user)):
     try:
         query = request_body.query
@@ -49,6 +58,49 @@ async def search_users(request_body: SearchRequest, current_user: dict = Depends
         logger.info("Search executed successfully")
         return APIResponse.success(data=result, message="Search executed successfully")
 
+    except LLMBusyError as e:
+        logger.warning(f"Search rejected: {str(e)}")
+        return APIResponse.fail(error=str(e), message="Search is busy, please retry")
     except Exception as e:
         logger.error(f"Search failed: {str(e)}")
         return APIResponse.fail(error=str(e), message="Search failed")
+
+
+@router.post("/stream", dependencies=[Depends(limit_search)])
+async def search_stream(request_body: SearchRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Same search as ``POST /search/``, answered as Server-Sent Events:
+
+    - ``sources``: metadata of the retrieved chunks, sent as soon as retrieval is done
+    - ``token``: ``{"text": ...}`` for every piece of the answer as the LLM generates it
+    - ``done`` at the end, or ``error`` with ``message``/``error`` if the search failed
+    """
+    query = request_body.query
+    if not query:
+        logger.warning(f"Empty search query from user: {current_user.get('username')}")
+        return APIResponse.fail(error="Query is empty", message="Query cannot be empty")
+    logger.info(f"Streaming search requested by user: {current_user.get('username')} | Query: {query}")
+
+    async def events():
+        results = stream_search_service(
+            query=query,
+            top_k_paragraphs=request_body.top_k_paragraphs,
+            top_k_tables=request_body.top_k_tables
+        )
+        try:
+            async for event, data in results:
+                yield sse_event(event, {"text": data} if event == "token" else data)
+            yield sse_event("done", {})
+            logger.info("Streaming search executed successfully")
+        except LLMBusyError as e:
+            logger.warning(f"Search rejected: {str(e)}")
+            yield sse_event("error", {"message": "Search is busy, please retry", "error": str(e)})
+        except Exception as e:
+            logger.error(f"Streaming search failed: {str(e)}")
+            yield sse_event("error", {"message": "Search failed", "error": str(e)})
+        finally:
+            await results.aclose()
+
+    # no-cache / no proxy buffering, so every event reaches the client as it is sent
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,222 @@
+# app/services/answer_cache.py
+import asyncio
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from app.db.mongo import mongo
+from app.services.vector_store import get_embedder
+
+logger = get_logger(__name__)
+
+MB = 1024 * 1024
+SPACE_RE = re.compile(r"\s+")
+TRAILING_PUNCT = " ?!.,;:"
+
+
+def normalize_query(query: str) -> str:
+    """Case, Unicode form, whitespace and trailing punctuation do not change the answer."""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    return SPACE_RE.sub(" ", text).strip().rstrip(TRAILING_PUNCT)
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    sources: List[Dict]
+    version: object
+    expires_at: float
+    size: int
+    top_k: Tuple[int, int]
+    vector: Optional[np.ndarray] = None
+
+
+@dataclass
+class CacheLookup:
+    """Result of ``AnswerCache.lookup``; pass it back to ``store`` on a miss."""
+    key: Tuple[str, int, int]
+    version: object
+    hit: Optional[CachedAnswer] = None
+    semantic: bool = False
+    vector: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+class AnswerCache:
+    """
+    In-process cache of search answers.
+
+    Entries are keyed on the normalized query plus ``top_k_paragraphs`` and
+    ``top_k_tables``, expire after ``ttl`` seconds and are evicted least recently
+    used first once ``max_entries`` or ``max_bytes`` is exceeded. With a
+    ``semantic_threshold`` a miss on the exact key falls back to the cached query
+    with the same top_k whose embedding is most similar, if the cosine similarity
+    reaches the threshold.
+
+    Every entry belongs to an index version, read through ``version_source`` at
+    most every ``version_check_sec`` seconds; when the version changes (the ETL
+    worker indexed or removed chunks) the whole cache is dropped.
+    """
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 10000, max_bytes: int = 64 * MB,
+                 semantic_threshold: Optional[float] = None, embedder=None,
+                 version_source: Optional[Callable[[], Awaitable[object]]] = None,
+                 version_check_sec: float = 5.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.semantic_threshold = semantic_threshold
+        self.embedder = embedder if semantic_threshold is not None else None
+        self.version_source = version_source
+        self.version_check_sec = version_check_sec
+        self.version = None
+        self._version_checked = float("-inf")
+        self._entries: "OrderedDict[Tuple[str, int, int], CachedAnswer]" = OrderedDict()
+        self._matrices: Dict[Tuple[int, int], Tuple[List[Tuple[str, int, int]], np.ndarray]] = {}
+        self.bytes = 0
+        self.counters = dict.fromkeys(
+            ("hits", "semantic_hits", "misses", "stores", "evictions", "expirations", "invalidations"), 0)
+
+    @classmethod
+    def from_settings(cls):
+        settings = get_settings()
+        embedder = None
+        if settings.ANSWER_CACHE_SEMANTIC_THRESHOLD is not None:
+            embedder = get_embedder(settings.ANSWER_CACHE_EMBEDDER)
+        return cls(ttl=settings.ANSWER_CACHE_TTL_SEC, max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+                   max_bytes=int(settings.ANSWER_CACHE_MAX_MB * MB),
+                   semantic_threshold=settings.ANSWER_CACHE_SEMANTIC_THRESHOLD, embedder=embedder,
+                   version_source=fetch_index_version, version_check_sec=settings.INDEX_VERSION_CHECK_SEC)
+
+    # ---------------- Lookup / store ----------------
+    async def lookup(self, query: str, top_k_paragraphs: int, top_k_tables: int) -> CacheLookup:
+        """Returns the cached answer for a query, if any, checking the index version first."""
+        await self._check_version()
+        key = (normalize_query(query), top_k_paragraphs, top_k_tables)
+        result = CacheLookup(key=key, version=self.version)
+
+        entry = self._get(key)
+        if entry is None and self.embedder is not None:
+            result.vector = await asyncio.to_thread(self._embed, key[0])
+            key, entry = self._nearest(result.vector, key[1:])
+            result.semantic = entry is not None
+        if entry is None:
+            self.counters["misses"] += 1
+            return result
+
+        self._entries.move_to_end(key)
+        self.counters["semantic_hits" if result.semantic else "hits"] += 1
+        result.hit = entry
+        return result
+
+    def store(self, lookup: CacheLookup, answer: str, sources: List[Dict]):
+        """
+        Caches the answer computed after a miss.
+
+        Skipped when the index version changed while the answer was being
+        computed, since it may be based on the old content.
+        """
+        if lookup.version != self.version:
+            return
+        size = (len(lookup.key[0]) + len(answer.encode("utf-8"))
+                + len(json.dumps(sources, default=str)) + (lookup.vector.nbytes if lookup.vector is not None else 0))
+        if size > self.max_bytes:
+            return
+        self._remove(lookup.key)
+        self._entries[lookup.key] = CachedAnswer(
+            answer=answer, sources=sources, version=lookup.version, expires_at=time.monotonic() + self.ttl,
+            size=size, top_k=lookup.key[1:], vector=lookup.vector,
+        )
+        self._matrices.pop(lookup.key[1:], None)
+        self.bytes += size
+        self.counters["stores"] += 1
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._matrices.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["semantic_hits"] + self.counters["misses"]
+        hits = self.counters["hits"] + self.counters["semantic_hits"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "size_mb": round(self.bytes / MB, 2),
+            "index_version": self.version,
+        }
+
+    # ---------------- Internals ----------------
+    def _get(self, key) -> Optional[CachedAnswer]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.counters["expirations"] += 1
+            return None
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+            self._matrices.pop(entry.top_k, None)
+
+    def _embed(self, text: str) -> np.ndarray:
+        return np.asarray(self.embedder.embed([text])[0], dtype=np.float32)
+
+    def _nearest(self, vector: np.ndarray, top_k: Tuple[int, int]):
+        """Most similar cached query with the same top_k, if above the threshold."""
+        if top_k not in self._matrices:
+            keys = [k for k, e in self._entries.items() if e.top_k == top_k and e.vector is not None]
+            if not keys:
+                return None, None
+            self._matrices[top_k] = (keys, np.stack([self._entries[k].vector for k in keys]))
+        keys, matrix = self._matrices[top_k]
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.semantic_threshold:
+            return None, None
+        return keys[best], self._get(keys[best])
+
+    async def _check_version(self):
+        if self.version_source is None or time.monotonic() - self._version_checked < self.version_check_sec:
+            return
+        self._version_checked = time.monotonic()
+        try:
+            version = await self.version_source()
+        except Exception as e:
+            # keep serving; entries still expire after the TTL
+            logger.warning(f"Could not read the index version: {e!r}")
+            return
+        if version != self.version:
+            if self._entries:
+                logger.info(f"Index version {self.version} -> {version}, dropping {len(self._entries)} cached answers")
+                self.counters["invalidations"] += 1
+            self.clear()
+            self.version = version
+
+
+async def fetch_index_version():
+    """Version stamp the ETL worker bumps after each indexing change (None until the first one)."""
+    if mongo.client is None:
+        return None
+    settings = get_settings()
+    stamp = await mongo.client[settings.INDEX_VERSION_DB][settings.INDEX_VERSION_COLLECTION].find_one({"_id": "index"})
+    return stamp.get("version") if stamp else None
+
+
+@lru_cache
+def get_answer_cache() -> Optional[AnswerCache]:
+    """The process-wide answer cache, or None when ANSWER_CACHE_ENABLED is off."""
+    if not get_settings().ANSWER_CACHE_ENABLED:
+        return None
+    return AnswerCache.from_settings()
@@ -0,0 +1,126 @@
+# app/services/llm.py
+import asyncio
+from typing import AsyncIterator, Optional
+import httpx
+from groq import AsyncGroq
+from app.core.config import get_settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LLMBusyError(Exception):
+    """Raised when no completion slot frees up within GROQ_QUEUE_TIMEOUT_SEC."""
+
+
+class GroqLLM:
+    """
+    Application-scoped async Groq client.
+
+    One instance lives for the whole app (see ``start_llm_client``), so every
+    request reuses the same keep-alive HTTP/TLS connections instead of opening
+    new ones. ``GROQ_MAX_CONCURRENCY`` completions run at once; further requests
+    wait up to ``GROQ_QUEUE_TIMEOUT_SEC`` for a slot and then fail fast with
+    ``LLMBusyError``. Connect and read timeouts are bounded by the settings.
+    """
+    def __init__(self, api_key: str, model: str, max_concurrency: int = 8, timeout: float = 60.0,
+                 connect_timeout: float = 5.0, queue_timeout: float = 10.0, max_connections: int = 20,
+                 max_retries: int = 2):
+        self.model = model
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                keepalive_expiry=60.0),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        )
+        self._client = AsyncGroq(api_key=api_key, http_client=self._http, max_retries=max_retries,
+                                 timeout=httpx.Timeout(timeout, connect=connect_timeout))
+
+    @classmethod
+    def from_settings(cls):
+        settings = get_settings()
+        return cls(settings.GROQ_API_KEY, settings.GROQ_MODEL_NAME,
+                   max_concurrency=settings.GROQ_MAX_CONCURRENCY, timeout=settings.GROQ_TIMEOUT_SEC,
+                   connect_timeout=settings.GROQ_CONNECT_TIMEOUT_SEC, queue_timeout=settings.GROQ_QUEUE_TIMEOUT_SEC,
+                   max_connections=settings.GROQ_MAX_CONNECTIONS, max_retries=settings.GROQ_MAX_RETRIES)
+
+    async def _acquire(self):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMBusyError(f"No LLM slot free after {self.queue_timeout}s") from None
+
+    async def complete(self, prompt: str, max_completion_tokens: int = 1024, **options) -> str:
+        """Runs one chat completion for ``prompt`` and returns the answer text."""
+        await self._acquire()
+        try:
+            completion = await self._client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=options.pop("temperature", 0),
+                max_completion_tokens=max_completion_tokens,
+                top_p=options.pop("top_p", 1),
+                stream=False,
+                **options,
+            )
+        finally:
+            self._slots.release()
+        return completion.choices[0].message.content
+
+    async def stream(self, prompt: str, max_completion_tokens: int = 1024, **options) -> AsyncIterator[str]:
+        """
+        Same as ``complete`` but yields the answer piece by piece as Groq generates it.
+
+        The concurrency slot is held until the stream is exhausted or closed, e.g.
+        when the client disconnects.
+        """
+        await self._acquire()
+        try:
+            stream = await self._client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=options.pop("temperature", 0),
+                max_completion_tokens=max_completion_tokens,
+                top_p=options.pop("top_p", 1),
+                stream=True,
+                **options,
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.response.aclose()  # abandoned streams must not hold a pooled connection
+        finally:
+            self._slots.release()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+
+class LLMState:
+    client: Optional[GroqLLM] = None
+
+llm = LLMState()
+
+
+async def start_llm_client():
+    """Creates the shared LLM client; call from the app lifespan."""
+    llm.client = GroqLLM.from_settings()
+    logger.info(f"LLM client ready: {llm.client.model}")
+
+
+async def close_llm_client():
+    """Closes the shared client's connection pool."""
+    if llm.client:
+        await llm.client.aclose()
+        llm.client = None
+        logger.info("LLM client closed")
+
+
+def get_llm() -> GroqLLM:
+    """The shared client; created on first use when running outside the app lifespan."""
+    if llm.client is None:
+        llm.client = GroqLLM.from_settings()
+    return llm.client
@@ -0,0 +1,110 @@
+# app/services/retrieval.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from app.services.vector_store import VectorStore, PineconeStore, create_vector_store
+
+logger = get_logger(__name__)
+
+
+class RetrievalError(Exception):
+    """Raised when no namespace could be searched."""
+
+
+class RetrievalHits(dict):
+    """Namespace -> hits, plus the namespaces whose search failed (and returned no hits)."""
+    def __init__(self, hits: Dict[str, List[dict]], failed: List[str]):
+        super().__init__(hits)
+        self.failed = failed
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.failed)
+
+
+# ---------------- Vector store setup ----------------
+@lru_cache
+def get_vector_store() -> VectorStore:
+    """Pinecone or the embedded local index, depending on VECTOR_STORE."""
+    settings = get_settings()
+    if settings.VECTOR_STORE == "pinecone":
+        return PineconeStore(settings.PINECONE_INDEX_NAME, api_key=settings.PINECONE_API_KEY, create=False)
+    return create_vector_store(settings.VECTOR_STORE, local_dir=settings.LOCAL_INDEX_DIR,
+                               embedder=settings.LOCAL_EMBEDDER)
+
+
+@lru_cache
+def get_search_executor() -> ThreadPoolExecutor:
+    """
+    Threads running the blocking vector store calls.
+
+    Kept apart from the loop's default executor so slow or hung searches can
+    only use up these threads, never the ones other handlers rely on.
+    """
+    return ThreadPoolExecutor(max_workers=get_settings().VECTOR_SEARCH_THREADS,
+                              thread_name_prefix="vector-search")
+
+
+def shutdown_retrieval():
+    """Stops the search threads; call on application shutdown."""
+    if get_search_executor.cache_info().currsize:
+        get_search_executor().shutdown(wait=False, cancel_futures=True)
+        get_search_executor.cache_clear()
+
+
+# ---------------- Async retrieval ----------------
+async def search_namespace(namespace: str, query: str, top_k: int, timeout: Optional[float] = None) -> List[dict]:
+    """
+    Searches one namespace without blocking the event loop.
+
+    The store call runs on the search executor and is abandoned after ``timeout``
+    seconds (``VECTOR_SEARCH_TIMEOUT_SEC`` by default), time spent waiting for a
+    free thread included, so an overloaded worker sheds searches instead of
+    queueing them without bound. The thread itself finishes in the background,
+    since a blocking SDK call cannot be interrupted.
+    """
+    timeout = get_settings().VECTOR_SEARCH_TIMEOUT_SEC if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(
+        loop.run_in_executor(get_search_executor(), lambda: get_vector_store().search(namespace, query, top_k)),
+        timeout,
+    )
+
+
+async def retrieve(query: str, top_k: Dict[str, int], timeout: Optional[float] = None) -> RetrievalHits:
+    """
+    Searches several namespaces concurrently.
+
+    Latency is that of the slowest namespace rather than their sum. A namespace
+    that fails or times out is logged and returns no hits, so the answer can
+    still use the others, and is listed in ``failed`` of the result so callers
+    can tell a degraded answer apart; ``RetrievalError`` is raised only if all
+    of them fail.
+
+    Args:
+        query (str): Search text.
+        top_k (dict): Namespace -> number of hits.
+        timeout (float, optional): Seconds per namespace.
+
+    Returns:
+        RetrievalHits: Namespace -> hits (``{"id", "score", "fields"}``).
+    """
+    namespaces = list(top_k)
+    results = await asyncio.gather(
+        *(search_namespace(ns, query, top_k[ns], timeout) for ns in namespaces),
+        return_exceptions=True,
+    )
+    hits, errors = {}, {}
+    for namespace, result in zip(namespaces, results):
+        if isinstance(result, BaseException):
+            kind = "timed out" if isinstance(result, asyncio.TimeoutError) else f"failed: {result!r}"
+            logger.warning(f"Search in '{namespace}' {kind}")
+            errors[namespace] = result
+            result = []
+        hits[namespace] = result
+    if errors and len(errors) == len(namespaces):
+        raise RetrievalError(f"Vector search failed for {', '.join(namespaces)}") from next(iter(errors.values()))
+    return RetrievalHits(hits, failed=list(errors))
@@ -1,46 +1,37 @@
-import os
-from typing import Dict, List
-from pinecone import Pinecone
-from groq import Groq
+from typing import AsyncIterator, Dict, List, Tuple
 # import asyncio 
-from dotenv import load_dotenv
-load_dotenv() 
+from app.services.retrieval import retrieve
+from app.services.llm import get_llm
+from app.services.answer_cache import get_answer_cache
 
-# ---------------- Pinecone setup ----------------
-PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")
-PINECONE_INDEX_NAME = os.environ.get("PINECONE_INDEX_NAME", "automateflow")
+# Hit fields sent to clients as source metadata (the chunk text itself is not)
+SOURCE_FIELDS = ("doc_id", "page_number", "page_end", "chunk_type", "table_index", "image_index", "source")
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
-dense_index = pc.Index(PINECONE_INDEX_NAME)
 
-# ---------------- Groq setup ----------------
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
-MODEL_NAME = os.environ.get("GROQ_MODEL_NAME", "llama-3.3-70b-versatile")
-
-async def search_query_service(query: str, top_k_paragraphs: int = 5, top_k_tables: int = 10) -> Dict:
+async def retrieve_context(query: str, top_k_paragraphs: int = 5,
+                           top_k_tables: int = 10) -> Tuple[str, List[Dict], bool]:
     """
-    RAG flow:
-    1. Search Pinecone index for top_k relevant paragraphs
-    2. Search Pinecone index for top_k relevant tables
-    3. Send retrieved documents and the query to Groq LLM
-    4. LLM infers which source suits better
-    5. Return the LLM result
+    Searches paragraphs and tables concurrently and builds the LLM prompt.
+
+    Returns:
+        tuple: ``(prompt, sources, complete)``; every source holds the namespace,
+        id, score and ``SOURCE_FIELDS`` of one hit. ``complete`` is False when a
+        namespace failed or timed out and the context is partial.
     """
+    # Search paragraphs and tables
+    hits = await retrieve(query, {"pdf-paragraphs": top_k_paragraphs, "pdf-tables": top_k_tables})
+    paragraphs = [hit['fields']['chunk_text'] for hit in hits["pdf-paragraphs"]]
+    tables = [hit['fields']['chunk_text'] for hit in hits["pdf-tables"]]
+    sources = [
+        {"namespace": namespace, "id": hit["id"], "score": hit["score"],
+         **{field: hit["fields"][field] for field in SOURCE_FIELDS if field in hit["fields"]}}
+        for namespace, namespace_hits in hits.items()
+        for hit in namespace_hits
+    ]
+    return build_prompt(query, paragraphs, tables), sources, not hits.partial
 
-    # Search paragraphs
-    para_response = dense_index.search(
-        namespace="pdf-paragraphs",
-        query={"top_k": top_k_paragraphs, "inputs": {"text": query}}
-    )
-    paragraphs = [hit['fields']['chunk_text'] for hit in para_response['result']['hits']]
-
-    # Search tables
-    table_response = dense_index.search(
-        namespace="pdf-tables",
-        query={"top_k": top_k_tables, "inputs": {"text": query}}
-    )
-    tables = [hit['fields']['chunk_text'] for hit in table_response['result']['hits']]
 
+def build_prompt(query: str, paragraphs: List[str], tables: List[str]) -> str:
     # Construct detailed prompt
     prompt = (
         "You are an expert assistant. Carefully use the context documents provided below to answer the user's query. "
@@ -51,23 +42,68 @@ async def search_query_service(query: str, top_k_paragraphs: int = 5, top_k_tabl
         "Infer which source (paragraphs or tables) is most relevant and answer clearly and concisely "
         "based only on the provided context."
     )
+    return prompt
 
-    # Call Groq LLM using SDK
-    client = Groq(api_key=GROQ_API_KEY)
-    completion = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-        max_completion_tokens=1024,
-        top_p=1,
-        stream=False
-    )
 
-    llm_result = completion.choices[0].message.content
+async def search_query_service(query: str, top_k_paragraphs: int = 5, top_k_tables: int = 10) -> Dict:
+    """
+    RAG flow:
+    1. Search the vector store for top_k relevant paragraphs and, concurrently,
+       top_k relevant tables (off the event loop, with a timeout per namespace)
+    2. Send retrieved documents and the query to Groq LLM (shared async client)
+    3. LLM infers which source suits better
+    4. Return the LLM result
 
+    Answers are cached (see ``AnswerCache``), so a repeated query skips steps 1-3
+    until the ETL worker changes the index. Answers built from partial context
+    (a namespace failed) are not cached.
+    """
+    cache = get_answer_cache()
+    lookup = await cache.lookup(query, top_k_paragraphs, top_k_tables) if cache else None
+    if lookup and lookup.hit:
+        return {"result": lookup.hit.answer}
+
+    prompt, sources, complete = await retrieve_context(query, top_k_paragraphs, top_k_tables)
+
+    # Call Groq LLM through the app-scoped client
+    llm_result = await get_llm().complete(prompt, max_completion_tokens=1024)
+
+    if lookup and complete:
+        cache.store(lookup, llm_result, sources)
     return {"result": llm_result}
 
 
+async def stream_search_service(query: str, top_k_paragraphs: int = 5,
+                                top_k_tables: int = 10) -> AsyncIterator[Tuple[str, object]]:
+    """
+    Streaming variant of ``search_query_service``.
+
+    Yields ``("sources", [...])`` as soon as retrieval is done, then one
+    ``("token", text)`` per piece of the answer as Groq generates it. A cached
+    answer is sent as a single token; a streamed answer is cached once complete,
+    unless its context was partial.
+    """
+    cache = get_answer_cache()
+    lookup = await cache.lookup(query, top_k_paragraphs, top_k_tables) if cache else None
+    if lookup and lookup.hit:
+        yield "sources", lookup.hit.sources
+        yield "token", lookup.hit.answer
+        return
+
+    prompt, sources, complete = await retrieve_context(query, top_k_paragraphs, top_k_tables)
+    yield "sources", sources
+    tokens = get_llm().stream(prompt, max_completion_tokens=1024)
+    answer = []
+    try:
+        async for token in tokens:
+            answer.append(token)
+            yield "token", token
+    finally:
+        await tokens.aclose()  # frees the LLM slot right away when the client goes away
+    if lookup and complete:
+        cache.store(lookup, "".join(answer), sources)
+
+
 # async def main():
 #     query = ""
 #     result = await search_users_service(query)
@@ -0,0 +1,13 @@
+# app/services/vector_store.py
+#
+# The vector stores are shared with the ETL worker and live in
+# common/vector_store.py at the repository root.
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from common.vector_store import (  # noqa: E402,F401
+    VectorStore, PineconeStore, LocalStore, HashingEmbedder, SentenceTransformerEmbedder,
+    get_embedder, create_vector_store,
+)
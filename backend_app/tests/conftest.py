@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+# Import the app package the way uvicorn does from backend_app/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Required setting; these tests never call Groq
+os.environ.setdefault("GROQ_API_KEY", "test-key")
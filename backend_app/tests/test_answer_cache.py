@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+from app.services.answer_cache import AnswerCache, normalize_query
+from app.services.vector_store import HashingEmbedder
+
+
+def lookup(cache, query, top_k_paragraphs=5, top_k_tables=10):
+    return asyncio.run(cache.lookup(query, top_k_paragraphs, top_k_tables))
+
+
+def put(cache, query, answer, top_k_paragraphs=5, top_k_tables=10):
+    result = lookup(cache, query, top_k_paragraphs, top_k_tables)
+    cache.store(result, answer, [{"id": query}])
+    return result
+
+
+def test_normalize_query():
+    assert normalize_query("  What is the   TOTAL price?? ") == "what is the total price"
+    assert normalize_query("Ｐｒｉｃｅ\tlist.") == "price list"
+
+
+def test_exact_hit_after_normalization_and_top_k_in_key():
+    cache = AnswerCache()
+    put(cache, "What is the total price?", "42")
+
+    hit = lookup(cache, "what is the total price")
+    assert hit.hit.answer == "42"
+    assert hit.hit.sources == [{"id": "What is the total price?"}]
+    assert not hit.semantic
+    assert lookup(cache, "what is the total price", top_k_paragraphs=3).hit is None
+
+
+def test_entries_expire_after_ttl():
+    cache = AnswerCache(ttl=0.05)
+    put(cache, "q", "a")
+    assert lookup(cache, "q").hit is not None
+
+    time.sleep(0.06)
+
+    assert lookup(cache, "q").hit is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = AnswerCache(max_entries=2)
+    put(cache, "a", "1")
+    put(cache, "b", "2")
+    lookup(cache, "a")          # a is now more recent than b
+    put(cache, "c", "3")
+
+    assert lookup(cache, "b").hit is None
+    assert lookup(cache, "a").hit.answer == "1"
+    assert lookup(cache, "c").hit.answer == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_bound_evicts_until_under_max_bytes():
+    cache = AnswerCache(max_bytes=2500)
+    for i in range(5):
+        put(cache, f"q{i}", "x" * 1000)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert cache.bytes <= 2500
+    assert lookup(cache, "q4").hit is not None
+
+
+def test_answer_larger_than_cache_is_not_stored():
+    cache = AnswerCache(max_bytes=100)
+    put(cache, "q", "x" * 1000)
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_new_index_version_drops_all_entries():
+    version = {"value": 1}
+
+    async def source():
+        return version["value"]
+
+    cache = AnswerCache(version_source=source, version_check_sec=0)
+    put(cache, "q", "old answer")
+    assert lookup(cache, "q").hit.answer == "old answer"
+
+    version["value"] = 2
+
+    assert lookup(cache, "q").hit is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["index_version"] == 2
+
+
+def test_answer_computed_across_a_version_change_is_not_stored():
+    version = {"value": 1}
+
+    async def source():
+        return version["value"]
+
+    cache = AnswerCache(version_source=source, version_check_sec=0)
+    miss = lookup(cache, "q")
+    version["value"] = 2
+    lookup(cache, "other")      # notices the new version
+
+    cache.store(miss, "built from the old index", [])
+
+    assert lookup(cache, "q").hit is None
+
+
+def test_version_is_polled_at_most_every_check_interval():
+    calls = []
+
+    async def source():
+        calls.append(1)
+        return 1
+
+    cache = AnswerCache(version_source=source, version_check_sec=60)
+    for _ in range(5):
+        lookup(cache, "q")
+
+    assert len(calls) == 1
+
+
+def test_unreadable_version_keeps_serving_cached_answers():
+    async def source():
+        raise ConnectionError("mongo down")
+
+    cache = AnswerCache(version_source=source, version_check_sec=0)
+    put(cache, "q", "a")
+
+    assert lookup(cache, "q").hit.answer == "a"
+
+
+def test_semantic_tier_serves_near_duplicates_with_same_top_k():
+    cache = AnswerCache(semantic_threshold=0.8, embedder=HashingEmbedder(384))
+    put(cache, "what is the total price", "42")
+
+    near = lookup(cache, "what is the total price of the tender")
+    assert near.hit.answer == "42"
+    assert near.semantic
+    assert lookup(cache, "what is the total price of the tender", top_k_tables=3).hit is None
+    assert lookup(cache, "who signed the contract").hit is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_semantic_tier_is_off_without_threshold():
+    cache = AnswerCache(embedder=HashingEmbedder(384))
+    put(cache, "what is the total price", "42")
+
+    assert lookup(cache, "what is the total price of the tender").hit is None
+
+
+def test_stats_report_hit_rate():
+    cache = AnswerCache()
+    put(cache, "q", "a")        # miss
+    lookup(cache, "q")          # hit
+    lookup(cache, "Q?")         # hit
+    lookup(cache, "other")      # miss
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 2, 0.5)
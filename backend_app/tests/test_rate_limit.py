@@ -0,0 +1,153 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import rate_limit
+from app.core.rate_limit import MemoryRateLimiter, MongoRateLimiter
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(100.0)
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def hits(limiter, key, n):
+    return [asyncio.run(limiter.hit(key)) for _ in range(n)]
+
+
+def test_limit_within_one_window(clock):
+    limiter = MemoryRateLimiter(limit=4, window=10)
+
+    results = hits(limiter, "a", 5)
+
+    assert [r.allowed for r in results] == [True, True, True, True, False]
+    assert [r.remaining for r in results] == [3, 2, 1, 0, 0]
+    assert results[-1].retry_after == 10
+    assert hits(limiter, "b", 1)[0].allowed
+
+
+def test_previous_window_is_weighted_by_its_overlap(clock):
+    limiter = MemoryRateLimiter(limit=4, window=10)
+    hits(limiter, "a", 4)
+    hits(limiter, "a", 3)               # rejected, must not count
+
+    clock.now = 115.0                   # half of the previous window still overlaps: 2 used
+    results = hits(limiter, "a", 3)
+
+    assert [r.allowed for r in results] == [True, True, False]
+    assert results[-1].retry_after == 3  # 4 * (1 - 0.75) + 3 <= 4 from t=117.5
+
+    clock.now = 117.5
+    assert hits(limiter, "a", 1)[0].allowed
+
+
+def test_full_limit_after_two_idle_windows(clock):
+    limiter = MemoryRateLimiter(limit=4, window=10)
+    hits(limiter, "a", 4)
+
+    clock.now = 120.0
+
+    assert all(r.allowed for r in hits(limiter, "a", 4))
+
+
+def test_evict_drops_keys_idle_for_two_windows(clock):
+    limiter = MemoryRateLimiter(limit=4, window=10)
+    hits(limiter, "old", 1)
+    clock.now = 115.0
+    hits(limiter, "recent", 1)
+
+    limiter.evict(now=125.0)
+
+    assert set(limiter._counters) == {"recent"}
+
+
+def test_sweep_runs_every_evict_interval(clock):
+    limiter = MemoryRateLimiter(limit=4, window=10, evict_interval=30)
+    hits(limiter, "old", 1)
+
+    clock.now = 129.0
+    hits(limiter, "new", 1)
+    assert "old" in limiter._counters
+
+    clock.now = 130.0
+    hits(limiter, "new", 1)
+    assert set(limiter._counters) == {"new"}
+    assert limiter._next_sweep == 160.0
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def create_index(self, *args, **kwargs):
+        pass
+
+    async def find_one_and_update(self, query, update, upsert, return_document):
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"], **update["$setOnInsert"], "count": 0})
+        doc["count"] += update["$inc"]["count"]
+        return dict(doc)
+
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    async def update_one(self, query, update):
+        self.docs[query["_id"]]["count"] += update["$inc"]["count"]
+
+
+def test_mongo_counters_are_shared_between_workers(clock, monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(rate_limit, "mongo", SimpleNamespace(db={"rate_limits": collection}))
+    workers = [MongoRateLimiter(limit=4, window=10), MongoRateLimiter(limit=4, window=10)]
+
+    results = [asyncio.run(workers[i % 2].hit("a")) for i in range(6)]
+
+    assert [r.allowed for r in results] == [True, True, True, True, False, False]
+    assert collection.docs["a|10"]["count"] == 4
+
+    clock.now = 115.0
+    assert [r.allowed for r in hits(workers[0], "a", 3)] == [True, True, False]
+
+
+def test_mongo_outage_lets_requests_through(clock, monkeypatch):
+    class Down:
+        def __getitem__(self, name):
+            raise ConnectionError("mongo down")
+
+    monkeypatch.setattr(rate_limit, "mongo", SimpleNamespace(db=Down()))
+
+    assert all(r.allowed for r in hits(MongoRateLimiter(limit=1, window=10), "a", 3))
+
+
+def test_mongo_error_while_rolling_back_a_rejection_fails_open(clock, monkeypatch):
+    class RollbackFails(FakeCollection):
+        async def update_one(self, query, update):
+            raise ConnectionError("mongo down")
+
+    monkeypatch.setattr(rate_limit, "mongo", SimpleNamespace(db={"rate_limits": RollbackFails()}))
+    limiter = MongoRateLimiter(limit=1, window=10)
+
+    assert [r.allowed for r in hits(limiter, "a", 2)] == [True, True]
+
+
+def test_enforce_rate_limit_raises_429_with_retry_after(clock, monkeypatch):
+    limiter = MemoryRateLimiter(limit=1, window=10)
+    monkeypatch.setattr(rate_limit, "get_rate_limiter", lambda: limiter)
+    asyncio.run(rate_limit.enforce_rate_limit("ip:1.2.3.4"))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(rate_limit.enforce_rate_limit("ip:1.2.3.4"))
+
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == "10"
@@ -0,0 +1,126 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from common.vector_store import HashingEmbedder, LocalStore
+
+
+def records(*ids):
+    return [{"_id": i, "chunk_text": f"chunk about {i}", "doc_id": "doc"} for i in ids]
+
+
+def meta(root, namespace="ns"):
+    return json.loads((root / namespace / "meta.json").read_text())
+
+
+def test_writes_stay_in_memory_until_flush(tmp_path):
+    store = LocalStore(tmp_path)
+    store.upsert("ns", records("a", "b"))
+
+    assert store.search("ns", "chunk about a", 1)[0]["id"] == "a"
+    assert not (tmp_path / "ns" / "meta.json").exists()
+
+    store.flush()
+    assert meta(tmp_path)["generation"] == 1
+    assert meta(tmp_path)["count"] == 2
+
+
+def test_each_flush_swaps_in_a_new_generation_and_keeps_one_old(tmp_path):
+    store = LocalStore(tmp_path)
+    for generation, record_id in enumerate("abc", start=1):
+        store.upsert("ns", records(record_id))
+        store.flush()
+        assert meta(tmp_path)["generation"] == generation
+
+    files = sorted(p.name for p in (tmp_path / "ns").iterdir() if p.suffix in (".f32", ".jsonl"))
+    assert files == ["records.2.jsonl", "records.3.jsonl", "vectors.2.f32", "vectors.3.f32"]
+
+
+def test_stale_generation_still_in_use_is_removed_on_a_later_flush(tmp_path, monkeypatch):
+    store = LocalStore(tmp_path)
+    for record_id in "ab":
+        store.upsert("ns", records(record_id))
+        store.flush()
+
+    unlink = Path.unlink
+
+    def mapped_elsewhere(path, *args, **kwargs):
+        # what Windows does while another process has the file mapped
+        if path.name == "vectors.1.f32":
+            raise PermissionError(13, "in use", str(path))
+        return unlink(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "unlink", mapped_elsewhere)
+    store.upsert("ns", records("c"))
+    store.flush()
+    assert meta(tmp_path)["generation"] == 3
+    assert (tmp_path / "ns" / "vectors.1.f32").exists()
+
+    monkeypatch.undo()
+    store.upsert("ns", records("d"))
+    store.flush()
+    files = sorted(p.name for p in (tmp_path / "ns").iterdir() if p.suffix in (".f32", ".jsonl"))
+    assert files == ["records.3.jsonl", "records.4.jsonl", "vectors.3.f32", "vectors.4.f32"]
+
+
+def test_flush_without_changes_writes_nothing(tmp_path):
+    store = LocalStore(tmp_path)
+    store.upsert("ns", records("a"))
+    store.flush()
+    store.flush()
+
+    assert meta(tmp_path)["generation"] == 1
+
+
+def test_reader_reloads_generation_written_by_another_store(tmp_path):
+    writer, reader = LocalStore(tmp_path), LocalStore(tmp_path)
+    writer.upsert("ns", records("a"))
+    writer.flush()
+    assert [h["id"] for h in reader.search("ns", "chunk about a", 5)] == ["a"]
+
+    writer.upsert("ns", records("b"))
+    writer.delete("ns", ["a"])
+    writer.flush()
+
+    assert [h["id"] for h in reader.search("ns", "chunk about a", 5)] == ["b"]
+
+
+def test_reopened_store_reads_index_from_disk(tmp_path):
+    store = LocalStore(tmp_path)
+    store.upsert("ns", records("a", "b"))
+    store.upsert("ns", [{"_id": "a", "chunk_text": "replaced text", "doc_id": "doc"}])
+    store.flush()
+
+    reopened = LocalStore(tmp_path)
+    hit = reopened.search("ns", "replaced text", 1)[0]
+    assert hit["id"] == "a"
+    assert hit["fields"]["chunk_text"] == "replaced text"
+    assert reopened.stats()["namespaces"] == {"ns": {"vector_count": 2}}
+
+
+def test_concurrent_writers_do_not_drop_each_others_records(tmp_path):
+    first, second = LocalStore(tmp_path), LocalStore(tmp_path)
+    first.upsert("ns", records("a", "b"))
+    second.upsert("ns", records("c"))
+    second.delete("ns", ["b"])
+    first.flush()
+    second.flush()  # replays its writes on top of first's generation
+
+    assert meta(tmp_path)["generation"] == 2
+    assert sorted(h["id"] for h in LocalStore(tmp_path).search("ns", "chunk", 10)) == ["a", "c"]
+
+    second.delete("ns", ["a"])
+    first.upsert("ns", records("d"))
+    second.flush()
+    first.flush()
+    assert sorted(h["id"] for h in LocalStore(tmp_path).search("ns", "chunk", 10)) == ["c", "d"]
+
+
+def test_index_only_opens_with_the_embedder_it_was_built_with(tmp_path):
+    store = LocalStore(tmp_path, HashingEmbedder(64))
+    store.upsert("ns", records("a"))
+    store.flush()
+
+    with pytest.raises(ValueError, match="hashing:64"):
+        LocalStore(tmp_path, HashingEmbedder(128)).search("ns", "a")
@@ -0,0 +1,443 @@
+# common/vector_store.py
+#
+# Shared by the ETL worker (etl_worker/vector_store.py) and the search API
+# (backend_app/app/services/vector_store.py), which both import it from here.
+# The on-disk format of LocalStore is the contract between the ETL worker that
+# writes an index and the API that searches it.
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# ---------------- Config ----------------
+DEFAULT_BACKEND = "pinecone"
+DEFAULT_INDEX_NAME = "automateflow"
+DEFAULT_LOCAL_DIR = "vector_index"
+DEFAULT_EMBEDDER = "hashing:384"
+FORMAT_VERSION = 1
+TOKEN_RE = re.compile(r"\w+")
+
+
+class VectorStore:
+    """
+    Interface of a text vector index split into namespaces.
+
+    Records are dicts with an ``_id``, a ``chunk_text`` that gets embedded and any
+    metadata fields. ``search`` embeds the query text the same way and returns
+    hits as ``{"id", "score", "fields"}`` with the stored record in ``fields``.
+    Writes may be buffered until ``flush``.
+    """
+    def upsert(self, namespace: str, records: list):
+        raise NotImplementedError
+
+    def delete(self, namespace: str, ids: list):
+        raise NotImplementedError
+
+    def search(self, namespace: str, text: str, top_k: int = 10) -> list:
+        raise NotImplementedError
+
+    def flush(self):
+        """Persists buffered writes; a no-op for remote stores."""
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+    def drop(self):
+        """Deletes the whole index."""
+        raise NotImplementedError
+
+
+# ---------------- Pinecone ----------------
+class PineconeStore(VectorStore):
+    """
+    Pinecone index with integrated embedding (``llama-text-embed-v2`` on ``chunk_text``).
+
+    Args:
+        index_name (str): Index to use; created if it does not exist and ``create`` is set.
+        api_key (str, optional): Defaults to the ``PINECONE_API_KEY`` environment variable.
+        index: Already connected index object (skips client setup, e.g. for tests).
+    """
+    def __init__(self, index_name: str = DEFAULT_INDEX_NAME, api_key: str = None, create: bool = True,
+                 index=None):
+        self.index_name = index_name
+        self.pc = None
+        if index is not None:
+            self.index = index
+            return
+        from pinecone import Pinecone
+
+        api_key = api_key or os.getenv("PINECONE_API_KEY")
+        if not api_key:
+            raise ValueError("PINECONE_API_KEY environment variable not set")
+        self.pc = Pinecone(api_key=api_key)
+        if create and not self.pc.has_index(index_name):
+            logger.info(f"Creating Pinecone index '{index_name}'...")
+            self.pc.create_index_for_model(
+                name=index_name,
+                cloud="aws",
+                region="us-east-1",
+                embed={"model": "llama-text-embed-v2", "field_map": {"text": "chunk_text"}}
+            )
+        self.index = self.pc.Index(index_name)
+        logger.info(f"Connected to Pinecone index '{index_name}'")
+
+    def upsert(self, namespace: str, records: list):
+        self.index.upsert_records(namespace, records)
+
+    def delete(self, namespace: str, ids: list):
+        self.index.delete(ids=ids, namespace=namespace)
+
+    def search(self, namespace: str, text: str, top_k: int = 10) -> list:
+        response = self.index.search(namespace=namespace, query={"top_k": top_k, "inputs": {"text": text}})
+        return [{"id": hit["_id"], "score": hit["_score"], "fields": hit["fields"]}
+                for hit in response["result"]["hits"]]
+
+    def stats(self) -> dict:
+        return self.index.describe_index_stats()
+
+    def drop(self):
+        if self.pc is not None and self.pc.has_index(self.index_name):
+            self.pc.delete_index(self.index_name)
+
+
+# ---------------- Local embedders ----------------
+class HashingEmbedder:
+    """
+    Dependency-free embedder: signed feature hashing of word unigrams and bigrams.
+
+    Lexical rather than semantic, but deterministic, fast and good enough for
+    small deployments and offline tests.
+    """
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    def _features(self, text: str):
+        tokens = TOKEN_RE.findall(text.lower())
+        yield from tokens
+        yield from (f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+    def embed(self, texts: list) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text or ""):
+                h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                vectors[row, h % self.dim] += 1.0 if h >> 63 else -1.0
+        return _normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """Local transformer embeddings; needs the optional ``sentence-transformers`` package."""
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers:{model_name}"
+
+    def embed(self, texts: list) -> np.ndarray:
+        return np.asarray(self.model.encode(list(texts), normalize_embeddings=True), dtype=np.float32)
+
+
+def get_embedder(spec: str = DEFAULT_EMBEDDER):
+    """Builds an embedder from ``"hashing[:dim]"`` or ``"sentence-transformers[:model]"``."""
+    kind, _, arg = spec.partition(":")
+    if kind == "hashing":
+        return HashingEmbedder(int(arg or 384))
+    if kind == "sentence-transformers":
+        return SentenceTransformerEmbedder(arg or "all-MiniLM-L6-v2")
+    raise ValueError(f"Unknown embedder '{spec}'")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# ---------------- Local index ----------------
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive lock on ``path`` shared by every process using the same index folder."""
+    with open(path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class _Namespace:
+    """
+    One namespace of a LocalStore.
+
+    On disk (``<root>/<namespace>/``)::
+
+        meta.json               {"version", "dim", "embedder", "count", "generation"}
+        vectors.<gen>.f32       count x dim float32, L2-normalised, row-major
+        records.<gen>.jsonl     one stored record per row, same order
+        .lock                   held by the process saving a generation
+
+    A write produces a new generation and then atomically replaces meta.json,
+    so readers in other processes never see half-written files. Vectors are
+    memory-mapped read-only and copied into memory on the first write.
+
+    Upserts and deletes apply in memory and are also kept as pending writes.
+    ``save`` takes the lock, and if another process saved a newer generation in
+    the meantime, reloads it and replays the pending writes on top before
+    writing the next one, so concurrent writers never drop each other's records.
+    """
+    def __init__(self, path: Path, dim: int, embedder_name: str):
+        self.path = path
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self.ids = []
+        self.rows = {}        # id -> row
+        self.records = []
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.generation = 0
+        self.dirty = False
+        self._pending = []    # (op, args) not saved yet
+        self._meta_mtime = None
+        self.load()
+
+    def _reset(self):
+        self.ids, self.rows, self.records = [], {}, []
+        self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self.generation, self._meta_mtime = 0, None
+
+    def _disk_generation(self) -> int:
+        try:
+            return json.loads((self.path / "meta.json").read_text())["generation"]
+        except FileNotFoundError:
+            return 0
+
+    def load(self):
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            return
+        mtime = meta_path.stat().st_mtime_ns
+        meta = json.loads(meta_path.read_text())
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported index format {meta.get('version')}")
+        if meta["embedder"] != self.embedder_name or meta["dim"] != self.dim:
+            raise ValueError(f"{self.path} was built with {meta['embedder']}, not {self.embedder_name}")
+        gen = meta["generation"]
+        with open(self.path / f"records.{gen}.jsonl", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        count = meta["count"]
+        vectors = (np.memmap(self.path / f"vectors.{gen}.f32", dtype=np.float32, mode="r", shape=(count, self.dim))
+                   if count else np.zeros((0, self.dim), dtype=np.float32))
+        self.records, self.vectors, self.generation = records, vectors, gen
+        self.ids = [r["_id"] for r in records]
+        self.rows = {record_id: row for row, record_id in enumerate(self.ids)}
+        self._meta_mtime = mtime
+
+    def refresh(self):
+        """Reloads when another process wrote a newer generation."""
+        meta_path = self.path / "meta.json"
+        try:
+            mtime = meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._meta_mtime and not self.dirty:
+            self.load()
+
+    def upsert(self, records: list, vectors: np.ndarray):
+        self._upsert(records, vectors)
+        self._pending.append((self._upsert, (records, vectors)))
+        self.dirty = True
+
+    def delete(self, ids: list):
+        self._delete(ids)
+        self._pending.append((self._delete, (ids,)))
+        self.dirty = True
+
+    def _upsert(self, records: list, vectors: np.ndarray):
+        if isinstance(self.vectors, np.memmap):
+            self.vectors = np.array(self.vectors)
+        existing = len(self.vectors)
+        new_vectors = []
+        for record, vector in zip(records, vectors):
+            row = self.rows.get(record["_id"])
+            if row is None:
+                self.rows[record["_id"]] = len(self.ids)
+                self.ids.append(record["_id"])
+                self.records.append(record)
+                new_vectors.append(vector)
+                continue
+            self.records[row] = record
+            if row < existing:
+                self.vectors[row] = vector
+            else:
+                new_vectors[row - existing] = vector  # repeated id within this batch
+        if new_vectors:
+            self.vectors = np.vstack([self.vectors, np.stack(new_vectors)])
+
+    def _delete(self, ids: list):
+        drop = sorted({self.rows[i] for i in ids if i in self.rows})
+        if not drop:
+            return
+        keep = np.setdiff1d(np.arange(len(self.ids)), drop)
+        self.vectors = np.array(self.vectors[keep])
+        self.records = [self.records[row] for row in keep]
+        self.ids = [self.ids[row] for row in keep]
+        self.rows = {record_id: row for row, record_id in enumerate(self.ids)}
+
+    def search(self, query: np.ndarray, top_k: int) -> list:
+        if not self.ids or top_k <= 0:
+            return []
+        scores = self.vectors @ query
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{"id": self.ids[row], "score": float(scores[row]), "fields": self.records[row]} for row in top]
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        with _file_lock(self.path / ".lock"):
+            if self._disk_generation() != self.generation:
+                # another process saved since we loaded: build on its generation
+                self._reset()
+                self.load()
+                for apply, args in self._pending:
+                    apply(*args)
+            self._write(self.generation + 1)
+        self._pending = []
+
+    def _write(self, gen: int):
+        np.ascontiguousarray(self.vectors, dtype=np.float32).tofile(self.path / f"vectors.{gen}.f32")
+        with open(self.path / f"records.{gen}.jsonl", "w", encoding="utf-8") as f:
+            for record in self.records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        meta = {"version": FORMAT_VERSION, "dim": self.dim, "embedder": self.embedder_name,
+                "count": len(self.ids), "generation": gen}
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.path / "meta.json")
+        self._remove_stale(gen)
+        self.generation, self.dirty = gen, False
+        self._meta_mtime = (self.path / "meta.json").stat().st_mtime_ns
+
+    def _remove_stale(self, gen: int):
+        """
+        Deletes generations before ``gen - 1``, which is kept for readers that
+        loaded meta.json just before the swap. A file another process still
+        has mapped cannot be deleted on Windows; it is left for a later save.
+        """
+        for stale in [*self.path.glob("vectors.*.f32"), *self.path.glob("records.*.jsonl")]:
+            stale_gen = stale.name.split(".")[1]
+            if not stale_gen.isdigit() or int(stale_gen) >= gen - 1:
+                continue
+            try:
+                stale.unlink()
+            except OSError as e:
+                logger.warning(f"Could not remove stale index file {stale}, retrying on the next save: {e!r}")
+
+
+class LocalStore(VectorStore):
+    """
+    Embedded vector index: exact (brute-force) cosine search over memory-mapped
+    NumPy matrices, one folder per namespace.
+
+    A query is one matrix-vector product, well under a millisecond for the
+    tens of thousands of chunks of a small deployment, with no network hop.
+    Writes are kept in memory until ``flush``; searches pick up generations
+    flushed by other processes.
+
+    Args:
+        root (Path): Folder holding the namespaces.
+        embedder: Object with ``name``, ``dim`` and ``embed(texts) -> ndarray``.
+            Defaults to the HashingEmbedder; an index only opens with the embedder
+            it was built with.
+        text_field (str): Record field that is embedded.
+    """
+    def __init__(self, root: Path = DEFAULT_LOCAL_DIR, embedder=None, text_field: str = "chunk_text"):
+        self.root = Path(root)
+        self.embedder = embedder or get_embedder()
+        self.text_field = text_field
+        self._namespaces = {}
+        self._lock = threading.RLock()
+
+    def _namespace(self, name: str) -> _Namespace:
+        ns = self._namespaces.get(name)
+        if ns is None:
+            ns = self._namespaces[name] = _Namespace(self.root / name, self.embedder.dim, self.embedder.name)
+        return ns
+
+    def upsert(self, namespace: str, records: list):
+        vectors = self.embedder.embed([r.get(self.text_field) or "" for r in records])
+        with self._lock:
+            self._namespace(namespace).upsert(records, vectors)
+
+    def delete(self, namespace: str, ids: list):
+        with self._lock:
+            self._namespace(namespace).delete(ids)
+
+    def search(self, namespace: str, text: str, top_k: int = 10) -> list:
+        query = self.embedder.embed([text])[0]
+        with self._lock:
+            ns = self._namespace(namespace)
+            ns.refresh()
+            return ns.search(query, top_k)
+
+    def flush(self):
+        with self._lock:
+            for ns in self._namespaces.values():
+                ns.save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            if self.root.exists():
+                for path in self.root.iterdir():
+                    if (path / "meta.json").exists():
+                        self._namespace(path.name).refresh()
+            return {"dimension": self.embedder.dim, "embedder": self.embedder.name,
+                    "namespaces": {name: {"vector_count": len(ns.ids)} for name, ns in self._namespaces.items()}}
+
+    def drop(self):
+        with self._lock:
+            self._namespaces.clear()
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+def create_vector_store(backend: str = None, index_name: str = None, local_dir: str = None,
+                        embedder: str = None) -> VectorStore:
+    """
+    Builds the configured store; unset arguments come from the environment.
+
+    ``VECTOR_STORE`` ("pinecone" or "local"), ``PINECONE_INDEX_NAME``,
+    ``LOCAL_INDEX_DIR`` and ``LOCAL_EMBEDDER`` (see ``get_embedder``).
+    """
+    backend = backend or os.getenv("VECTOR_STORE", DEFAULT_BACKEND)
+    if backend == "pinecone":
+        return PineconeStore(index_name or os.getenv("PINECONE_INDEX_NAME", DEFAULT_INDEX_NAME))
+    if backend == "local":
+        return LocalStore(local_dir or os.getenv("LOCAL_INDEX_DIR", DEFAULT_LOCAL_DIR),
+                          get_embedder(embedder or os.getenv("LOCAL_EMBEDDER", DEFAULT_EMBEDDER)))
+    raise ValueError(f"Unknown vector store backend '{backend}'")
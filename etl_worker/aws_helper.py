@@ -1,10 +1,31 @@
 import boto3
 import yaml
 import os
+import threading
+from functools import lru_cache
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from aws_logger import setup_logger
 
 logger = setup_logger('aws_helpers')
 
+MB = 1024 * 1024
+
+
+@lru_cache
+def get_client(service: str, region: str, max_pool_connections: int):
+    """
+    Process-wide boto3 client per service and region.
+
+    boto3 clients are thread-safe, so every AWSHelper (and every thread) in a
+    process shares one client and its HTTP connection pool instead of building
+    its own with the default 10 connections.
+    """
+    return boto3.client(service, region_name=region,
+                        config=Config(max_pool_connections=max_pool_connections,
+                                      retries={'mode': 'adaptive'}))
+
+
 class AWSHelper:
     def __init__(self):
         config_path = os.path.join(os.path.dirname(__file__), 'config', 'config.yaml')
@@ -12,8 +33,17 @@ class AWSHelper:
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)['aws']
 
-        self.s3 = boto3.client('s3', region_name=self.config['region'])
-        self.sqs = boto3.client('sqs', region_name=self.config['region'])
+        pool_size = self.config.get('max_pool_connections', 50)
+        self.s3 = get_client('s3', self.config['region'], pool_size)
+        self.sqs = get_client('sqs', self.config['region'], pool_size)
+
+        transfer = self.config['s3'].get('transfer', {})
+        self.transfer_config = TransferConfig(
+            multipart_threshold=transfer.get('multipart_threshold_mb', 8) * MB,
+            multipart_chunksize=transfer.get('multipart_chunksize_mb', 8) * MB,
+            max_concurrency=transfer.get('max_concurrency', 10),
+        )
+        self.in_memory_max_bytes = transfer.get('in_memory_max_mb', 20) * MB
         self.queue_url = self._get_queue_url()
 
     def _get_queue_url(self):
@@ -24,12 +54,23 @@ class AWSHelper:
             logger.error(f"Error getting queue URL: {str(e)}")
             raise
 
-    def receive_messages(self):
+    def receive_messages(self, max_messages: int = None, wait_time: int = None):
+        """
+        Receives up to ``max_messages`` messages (capped by the config and SQS's limit
+        of 10). Callers pass the number of free workers so nothing sits unclaimed
+        on a busy worker. ``wait_time`` overrides the configured long-poll wait.
+        """
+        limit = min(10, self.config['sqs']['max_messages'])
+        max_messages = limit if max_messages is None else min(max_messages, limit)
+        if max_messages <= 0:
+            return []
         try:
             response = self.sqs.receive_message(
                 QueueUrl=self.queue_url,
-                MaxNumberOfMessages=self.config['sqs']['max_messages'],
-                WaitTimeSeconds=self.config['sqs']['wait_time']
+                MaxNumberOfMessages=max_messages,
+                WaitTimeSeconds=self.config['sqs']['wait_time'] if wait_time is None else wait_time,
+                VisibilityTimeout=self.config['sqs']['visibility_timeout'],
+                AttributeNames=['SentTimestamp']
             )
             return response.get('Messages', [])
         except Exception as e:
@@ -47,6 +88,70 @@ class AWSHelper:
             logger.error(f"Error deleting message: {str(e)}")
             return False
 
+    def delete_messages(self, receipt_handles):
+        """
+        Deletes messages with ``delete_message_batch`` (10 per call).
+
+        Returns:
+            list: Receipt handles that could not be deleted.
+        """
+        failed = []
+        handles = list(receipt_handles)
+        for i in range(0, len(handles), 10):
+            chunk = handles[i:i + 10]
+            try:
+                response = self.sqs.delete_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[{'Id': str(n), 'ReceiptHandle': h} for n, h in enumerate(chunk)]
+                )
+                for entry in response.get('Failed', []):
+                    logger.error(f"Error deleting message: {entry.get('Message')}")
+                    failed.append(chunk[int(entry['Id'])])
+            except Exception as e:
+                logger.error(f"Error deleting messages: {str(e)}")
+                failed.extend(chunk)
+        return failed
+
+    def send_messages(self, bodies):
+        """
+        Enqueues message bodies with ``send_message_batch`` (10 per call).
+
+        Returns:
+            list: Bodies that could not be sent.
+        """
+        failed = []
+        bodies = list(bodies)
+        for i in range(0, len(bodies), 10):
+            chunk = bodies[i:i + 10]
+            try:
+                response = self.sqs.send_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[{'Id': str(n), 'MessageBody': body} for n, body in enumerate(chunk)]
+                )
+                for entry in response.get('Failed', []):
+                    logger.error(f"Error sending message: {entry.get('Message')}")
+                    failed.append(chunk[int(entry['Id'])])
+            except Exception as e:
+                logger.error(f"Error sending messages: {str(e)}")
+                failed.extend(chunk)
+        return failed
+
+    def extend_visibility(self, receipt_handles, timeout: int):
+        """Resets the visibility timeout of in-flight messages with ``change_message_visibility_batch``."""
+        handles = list(receipt_handles)
+        for i in range(0, len(handles), 10):
+            chunk = handles[i:i + 10]
+            try:
+                response = self.sqs.change_message_visibility_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[{'Id': str(n), 'ReceiptHandle': h, 'VisibilityTimeout': timeout}
+                             for n, h in enumerate(chunk)]
+                )
+                for entry in response.get('Failed', []):
+                    logger.warning(f"Could not extend visibility: {entry.get('Message')}")
+            except Exception as e:
+                logger.error(f"Error extending visibility: {str(e)}")
+
     def move_file(self, file_key, source_folder, dest_folder):
         try:
             source = f"{self.config['s3']['folders'][source_folder]}{file_key}"
@@ -71,16 +176,79 @@ class AWSHelper:
             return False
 
     def download_file(self, file_key, local_path):
+        """
+        Downloads an input object to ``local_path``.
+
+        Returns:
+            bool: False if the object does not exist.
+
+        Raises:
+            Exception: Any other S3 or disk error, logged here once, so the
+            message stays on the queue and is retried.
+        """
         try:
             self.s3.download_file(
                 self.config['s3']['bucket_name'],
                 f"{self.config['s3']['folders']['input']}{file_key}",
-                local_path
+                local_path,
+                Config=self.transfer_config
             )
             return True
         except Exception as e:
+            if _is_not_found(e):
+                logger.warning(f"File {file_key} not found in S3")
+                return False
             logger.error(f"Error downloading file {file_key}: {str(e)}")
-            return False
+            raise
+
+    def download_bytes(self, file_key, max_bytes: int = None):
+        """
+        Downloads an input object into memory if it is at most ``max_bytes``
+        (defaults to ``s3.transfer.in_memory_max_mb``).
+
+        Returns:
+            bytes: The object content, or None if it is larger than the limit
+            (use ``download_file``).
+
+        Raises:
+            Exception: The S3 error if the download failed; it is logged here once.
+        """
+        max_bytes = self.in_memory_max_bytes if max_bytes is None else max_bytes
+        try:
+            response = self.s3.get_object(
+                Bucket=self.config['s3']['bucket_name'],
+                Key=f"{self.config['s3']['folders']['input']}{file_key}"
+            )
+            if response['ContentLength'] > max_bytes:
+                response['Body'].close()
+                return None
+            return response['Body'].read()
+        except Exception as e:
+            if _is_not_found(e):
+                logger.warning(f"File {file_key} not found in S3")
+            else:
+                logger.error(f"Error downloading file {file_key} into memory: {str(e)}")
+            raise
+
+    def fetch(self, file_key, local_path):
+        """
+        Downloads an input object into memory if it is small, otherwise to
+        ``local_path`` with a parallel multipart download.
+
+        Returns:
+            tuple: ``(pdf_bytes, found)``. ``pdf_bytes`` is None when the object
+            went to ``local_path``; ``found`` is False when it does not exist.
+
+        Raises:
+            Exception: The original S3 or disk error of any other failed download.
+        """
+        try:
+            pdf_bytes = self.download_bytes(file_key)
+        except Exception as e:
+            if _is_not_found(e):
+                return None, False
+            raise
+        return pdf_bytes, pdf_bytes is not None or self.download_file(file_key, local_path)
 
     def upload_file(self, local_path, file_key, destination_folder):
         try:
@@ -88,7 +256,8 @@ class AWSHelper:
             self.s3.upload_file(
                 local_path,
                 self.config['s3']['bucket_name'],
-                destination
+                destination,
+                Config=self.transfer_config
             )
             return True
         except Exception as e:
@@ -96,3 +265,51 @@ class AWSHelper:
             return False
 
 
+
+
+def _is_not_found(error: Exception) -> bool:
+    """True for the ClientError S3 raises when an object does not exist."""
+    return getattr(error, "response", {}).get("Error", {}).get("Code") in ("NoSuchKey", "404")
+
+
+class VisibilityHeartbeat:
+    """
+    Keeps in-flight SQS messages invisible while they are being processed.
+
+    A background thread calls ``AWSHelper.extend_visibility`` for every tracked
+    receipt handle each ``interval`` seconds, so a long PDF never outlives its
+    visibility timeout and gets picked up by a second worker. Use as a context
+    manager, ``track`` messages when they are dispatched and ``untrack`` them once
+    they are deleted or given up on.
+    """
+    def __init__(self, aws: AWSHelper, interval: int = None, visibility_timeout: int = None):
+        self.aws = aws
+        self.visibility_timeout = visibility_timeout or aws.config['sqs']['visibility_timeout']
+        self.interval = interval or aws.config['sqs']['heartbeat_interval']
+        self._handles = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sqs-heartbeat", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+
+    def track(self, receipt_handle):
+        with self._lock:
+            self._handles.add(receipt_handle)
+
+    def untrack(self, receipt_handle):
+        with self._lock:
+            self._handles.discard(receipt_handle)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                handles = list(self._handles)
+            if handles:
+                self.aws.extend_visibility(handles, self.visibility_timeout)
@@ -0,0 +1,76 @@
+# bench_chunker.py
+"""
+Compares the StreamingChunker with LangChain's RecursiveCharacterTextSplitter on a PDF.
+
+    python benchmarks/bench_chunker.py path/to/file.pdf [--repeat 5]
+
+Run from the etl_worker folder. LangChain is optional; without it only the
+StreamingChunker is measured.
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fitz
+from chunker import StreamingChunker
+from pdf_operations import CHUNK_SIZE, CHUNK_OVERLAP
+
+
+def per_page_langchain(pages):
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        try:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+        except ImportError:
+            return None
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+                                              separators=["\n\n", "\n", " ", ""])
+    return [chunk for text in pages for chunk in splitter.split_text(text)]
+
+
+def streaming(pages):
+    chunker = StreamingChunker(CHUNK_SIZE, CHUNK_OVERLAP)
+    chunks = []
+    for page_number, text in enumerate(pages, start=1):
+        chunks.extend(chunker.feed(text, page_number))
+    chunks.extend(chunker.flush())
+    return chunks
+
+
+def measure(fn, pages, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(pages)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text chunking")
+    parser.add_argument("pdf", type=Path)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with fitz.open(args.pdf) as doc:
+        pages = [page.get_text() for page in doc]
+    chars = sum(len(text) for text in pages)
+    print(f"{args.pdf.name}: {len(pages)} pages, {chars} characters")
+
+    seconds, chunks = measure(streaming, pages, args.repeat)
+    spanning = sum(1 for c in chunks if c["page_start"] != c["page_end"])
+    print(f"StreamingChunker: {seconds * 1000:.1f} ms, {len(chunks)} chunks, {spanning} spanning pages")
+
+    if per_page_langchain([]) is None:
+        print("LangChain not installed, skipping comparison")
+        return
+    seconds, chunks = measure(per_page_langchain, pages, args.repeat)
+    print(f"LangChain (per page): {seconds * 1000:.1f} ms, {len(chunks)} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# bench_vector_store.py
+"""
+Indexing and query latency of the embedded LocalStore.
+
+    python -m benchmarks.bench_vector_store [--records 20000] [--queries 200]
+
+Run from the etl_worker folder. Builds a throwaway index from synthetic
+chunks, reopens it from disk (memory-mapped) and reports p50/p95/p99 search
+latency per top_k.
+"""
+import time
+import random
+import argparse
+import tempfile
+
+import numpy as np
+
+from benchmarks.corpus import WORDS
+from vector_store import LocalStore, get_embedder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local vector store")
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--embedder", default="hashing:384")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    records = [{"_id": f"doc#page{i // 10}#para{i % 10}",
+                "chunk_text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 90)))}
+               for i in range(args.records)]
+    queries = [" ".join(rng.choice(WORDS) for _ in range(6)) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as root:
+        writer = LocalStore(root, get_embedder(args.embedder))
+        start = time.perf_counter()
+        for i in range(0, len(records), 96):
+            writer.upsert("pdf-paragraphs", records[i:i + 96])
+        writer.flush()
+        print(f"Indexed {len(records)} records in {time.perf_counter() - start:.2f}s")
+
+        reader = LocalStore(root, get_embedder(args.embedder))
+        reader.search("pdf-paragraphs", queries[0])  # load and map the index
+        for top_k in (5, 10, 50):
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                reader.search("pdf-paragraphs", query, top_k)
+                latencies.append((time.perf_counter() - start) * 1000)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            print(f"top_k={top_k:<3} p50 {p50:.3f} ms  p95 {p95:.3f} ms  p99 {p99:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
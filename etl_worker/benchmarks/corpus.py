@@ -0,0 +1,125 @@
+# corpus.py
+"""
+Synthetic PDF corpus for the ETL benchmarks.
+
+Every page carries a few paragraphs of prose (some running onto the next
+page), optionally a ruled table and optionally an embedded image. The
+content comes from a seeded random generator, so the same arguments always
+produce byte-for-byte comparable documents.
+"""
+import json
+import random
+from pathlib import Path
+
+import fitz
+
+WORDS = (
+    "tender bid contract supplier delivery schedule payment clause penalty warranty "
+    "scope service quantity unit price tax invoice milestone approval authority "
+    "document submission deadline evaluation criteria technical financial compliance "
+    "annexure specification inspection acceptance performance guarantee security"
+).split()
+PAGE_RECT = fitz.paper_rect("a4")
+MARGIN = 56
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+
+
+def _image_png(rng: random.Random, width: int = 160, height: int = 90) -> bytes:
+    """Blocky colour image; varied enough to pass the OCR pre-filter."""
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), 0)
+    pix.clear_with(255)
+    for _ in range(12):
+        x, y = rng.randrange(0, width - 20), rng.randrange(0, height - 10)
+        shade = rng.randrange(0, 200)
+        pix.set_rect(fitz.IRect(x, y, x + rng.randint(10, 40), y + rng.randint(4, 12)), (shade, shade, shade))
+    return pix.tobytes("png")
+
+
+def _draw_table(page, rng: random.Random, top: float, rows: int, cols: int = 4) -> float:
+    width = (PAGE_RECT.width - 2 * MARGIN) / cols
+    height = 18
+    for r in range(rows):
+        for c in range(cols):
+            rect = fitz.Rect(MARGIN + c * width, top + r * height, MARGIN + (c + 1) * width, top + (r + 1) * height)
+            page.draw_rect(rect, width=0.6)
+            text = rng.choice(WORDS) if r == 0 else f"{rng.randint(1, 9999)}"
+            page.insert_text((rect.x0 + 3, rect.y1 - 5), text, fontsize=8)
+    return top + rows * height
+
+
+def make_pdf(path: Path, pages: int, seed: int = 0, table_every: int = 2, image_every: int = 3):
+    """
+    Writes one synthetic PDF.
+
+    Args:
+        path (Path): Output file.
+        pages (int): Number of pages.
+        seed (int): Seed of the content generator.
+        table_every (int): Put a ruled table on every n-th page (0 disables tables).
+        image_every (int): Put an image on every n-th page (0 disables images).
+
+    Returns:
+        dict: Description of the document (pages, tables, images, bytes).
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    tables = images = 0
+    carry = ""
+    for number in range(1, pages + 1):
+        page = doc.new_page(width=PAGE_RECT.width, height=PAGE_RECT.height)
+        top = MARGIN
+        if table_every and number % table_every == 0:
+            top = _draw_table(page, rng, top, rows=rng.randint(4, 8)) + 16
+            tables += 1
+        if image_every and number % image_every == 0:
+            page.insert_image(fitz.Rect(MARGIN, top, MARGIN + 160, top + 90), stream=_image_png(rng))
+            top += 106
+            images += 1
+        text = "\n\n".join([carry] * bool(carry) + [_paragraph(rng) for _ in range(rng.randint(2, 4))])
+        # Cut the last paragraph mid-sentence so it continues on the next page
+        cut = text.rfind(" ", 0, len(text) - 60)
+        text, carry = text[:cut], text[cut + 1:]
+        box = fitz.Rect(MARGIN, top, PAGE_RECT.width - MARGIN, PAGE_RECT.height - MARGIN)
+        page.insert_textbox(box, text, fontsize=9)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return {"name": path.name, "pages": pages, "tables": tables, "images": images, "bytes": path.stat().st_size}
+
+
+def generate_corpus(out_dir: Path, page_counts=(1, 10, 50), seed: int = 0) -> list:
+    """
+    Writes one PDF per entry of ``page_counts`` and a ``corpus.json`` index.
+
+    Reuses an existing corpus generated with the same page counts and seed.
+    """
+    out_dir = Path(out_dir)
+    index_path = out_dir / "corpus.json"
+    key = {"page_counts": list(page_counts), "seed": seed}
+    if index_path.exists():
+        index = json.loads(index_path.read_text())
+        if index.get("key") == key and all((out_dir / d["name"]).exists() for d in index["documents"]):
+            return index["documents"]
+    documents = [make_pdf(out_dir / f"synthetic_{pages:04d}p.pdf", pages, seed + i)
+                 for i, pages in enumerate(page_counts)]
+    index_path.write_text(json.dumps({"key": key, "documents": documents}, indent=2))
+    return documents
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a synthetic PDF corpus")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for document in generate_corpus(args.out_dir, args.pages, args.seed):
+        print(document)
@@ -0,0 +1,214 @@
+# fakes.py
+"""
+In-process stand-ins for S3/SQS, Pinecone, MongoDB logging and the chunk manifest.
+
+They implement the methods the ETL worker calls, keep everything in memory and
+can add a fixed latency per call, so benchmarks measure our own code without
+live services while still being able to model network round trips.
+"""
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+
+from pinecone_worker import PineconeWorker
+from vector_store import PineconeStore
+from manifest import ChunkManifest
+
+DEFAULT_CONFIG = {
+    "s3": {"bucket_name": "benchmark", "folders": {"input": "input/", "processed": "processed/"}},
+    "sqs": {"queue_name": "benchmark", "max_messages": 10, "wait_time": 0,
+            "visibility_timeout": 300, "heartbeat_interval": 60},
+}
+
+
+class QueueDrained(Exception):
+    """Raised by FakeAWSHelper.receive_messages once every message has been deleted."""
+
+
+class FakeAWSHelper:
+    """
+    Memory-backed replacement for AWSHelper.
+
+    S3 objects live in ``objects`` (full key -> bytes), the SQS queue in a deque.
+    With ``stop_when_drained`` the first receive after the last message was
+    deleted raises ``QueueDrained``, which ends the worker's polling loop.
+
+    Attributes:
+        latency_sec (float): Delay added to every S3/SQS call.
+        calls (dict): Number of calls per method.
+    """
+    def __init__(self, latency_sec: float = 0.0, in_memory_max_bytes: int = 20 * 1024 * 1024,
+                 stop_when_drained: bool = True, config: dict = None):
+        self.config = config or DEFAULT_CONFIG
+        self.latency_sec = latency_sec
+        self.in_memory_max_bytes = in_memory_max_bytes
+        self.stop_when_drained = stop_when_drained
+        self.objects = {}
+        self.calls = {}
+        self._queue = deque()
+        self._in_flight = {}  # receipt handle -> message
+        self._lock = threading.Lock()
+
+    def _call(self, name: str):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency_sec:
+            time.sleep(self.latency_sec)
+
+    def _key(self, folder: str, file_key: str) -> str:
+        return f"{self.config['s3']['folders'].get(folder, folder + '/')}{file_key}"
+
+    # ---------------- Setup ----------------
+    def put_object(self, file_key: str, data: bytes, folder: str = "input"):
+        self.objects[self._key(folder, file_key)] = data
+
+    def enqueue(self, file_key: str):
+        with self._lock:
+            self._queue.append({"Body": file_key, "MessageId": str(uuid.uuid4()),
+                                "Attributes": {"SentTimestamp": str(int(time.time() * 1000))}})
+
+    # ---------------- SQS ----------------
+    def receive_messages(self, max_messages: int = None, wait_time: int = None):
+        self._call("receive_messages")
+        limit = min(10, self.config['sqs']['max_messages'])
+        max_messages = limit if max_messages is None else min(max_messages, limit)
+        with self._lock:
+            if not self._queue and not self._in_flight and self.stop_when_drained:
+                raise QueueDrained()
+            messages = []
+            while self._queue and len(messages) < max_messages:
+                msg = dict(self._queue.popleft(), ReceiptHandle=str(uuid.uuid4()))
+                self._in_flight[msg["ReceiptHandle"]] = msg
+                messages.append(msg)
+        if not messages and wait_time:
+            time.sleep(min(wait_time, 0.05))  # a short stand-in for the long poll
+        return messages
+
+    def delete_message(self, receipt_handle):
+        return not self.delete_messages([receipt_handle])
+
+    def delete_messages(self, receipt_handles):
+        self._call("delete_messages")
+        with self._lock:
+            return [h for h in receipt_handles if self._in_flight.pop(h, None) is None]
+
+    def send_messages(self, bodies):
+        self._call("send_messages")
+        for body in bodies:
+            self.enqueue(body)
+        return []
+
+    def extend_visibility(self, receipt_handles, timeout: int):
+        self._call("extend_visibility")
+
+    # ---------------- S3 ----------------
+    def move_file(self, file_key, source_folder, dest_folder):
+        self._call("move_file")
+        data = self.objects.pop(self._key(source_folder, file_key), None)
+        if data is None:
+            return False
+        self.objects[self._key(dest_folder, file_key)] = data
+        return True
+
+    def download_file(self, file_key, local_path):
+        self._call("download_file")
+        data = self.objects.get(self._key("input", file_key))
+        if data is None:
+            return False
+        with open(local_path, "wb") as f:
+            f.write(data)
+        return True
+
+    def download_bytes(self, file_key, max_bytes: int = None):
+        self._call("download_bytes")
+        data = self.objects.get(self._key("input", file_key))
+        max_bytes = self.in_memory_max_bytes if max_bytes is None else max_bytes
+        return data if data is not None and len(data) <= max_bytes else None
+
+    def fetch(self, file_key, local_path):
+        pdf_bytes = self.download_bytes(file_key)
+        return pdf_bytes, pdf_bytes is not None or self.download_file(file_key, local_path)
+
+    def upload_file(self, local_path, file_key, destination_folder):
+        self._call("upload_file")
+        with open(local_path, "rb") as f:
+            self.objects[self._key(destination_folder, file_key)] = f.read()
+        return True
+
+
+class FakeIndex:
+    """Pinecone index stand-in storing records per namespace."""
+    def __init__(self, latency_sec: float = 0.0):
+        self.latency_sec = latency_sec
+        self.namespaces = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def upsert_records(self, namespace: str, records: list):
+        if self.latency_sec:
+            time.sleep(self.latency_sec)
+        with self._lock:
+            self.requests += 1
+            store = self.namespaces.setdefault(namespace, {})
+            for record in records:
+                store[record["_id"]] = record
+
+    def delete(self, ids, namespace: str):
+        with self._lock:
+            self.requests += 1
+            store = self.namespaces.get(namespace, {})
+            for record_id in ids:
+                store.pop(record_id, None)
+
+    def describe_index_stats(self):
+        with self._lock:
+            return {"namespaces": {ns: {"vector_count": len(store)} for ns, store in self.namespaces.items()}}
+
+
+class FakePineconeWorker(PineconeWorker):
+    """
+    PineconeWorker whose PineconeStore talks to a FakeIndex.
+
+    Batching, concurrency and retry logic are the real ones; only the network
+    calls are replaced, with ``latency_sec`` per request.
+    """
+    def __init__(self, latency_sec: float = 0.0, index_name: str = "benchmark"):
+        self.index = FakeIndex(latency_sec)
+        super().__init__(index_name, store=PineconeStore(index_name, index=self.index))
+
+
+class FakeMongoDBLogger(logging.Handler):
+    """MongoDBLogger stand-in keeping the documents it would insert in ``docs``."""
+    def __init__(self, collection_name=None, *args, **kwargs):
+        super().__init__()
+        self.collection_name = collection_name
+        self.docs = []
+
+    def emit(self, record):
+        doc = {"log": self.format(record), "level": record.levelname, "time": record.created}
+        if getattr(record, "timings", None) is not None:
+            doc["timings"] = record.timings
+        self.docs.append(doc)
+
+
+class FakeManifest(ChunkManifest):
+    """ChunkManifest kept in a dict instead of MongoDB."""
+    def __init__(self, collection_name: str = None):
+        self.store = {}
+        self.version = 0
+
+    def get(self, doc_id: str):
+        return self.store.get(doc_id)
+
+    def save(self, doc_id: str, doc_hash: str, chunks: dict):
+        self.store[doc_id] = {"_id": doc_id, "doc_hash": doc_hash,
+                              "chunks": [{"id": chunk_id, **info} for chunk_id, info in chunks.items()]}
+
+    def bump_index_version(self, doc_id: str) -> int:
+        self.version += 1
+        return self.version
+
+    def close(self):
+        pass
@@ -0,0 +1,252 @@
+# run_benchmarks.py
+"""
+Offline ETL benchmarks.
+
+    python -m benchmarks.run_benchmarks --out report.json [--baseline old_report.json]
+
+Run from the etl_worker folder. A synthetic corpus (benchmarks/corpus.py) is
+generated once and reused. The report holds:
+
+- ``stages``: extraction, OCR and upsert timed separately per document
+  (min/median/mean over ``--repeat`` runs) with pages/sec and chunks/sec;
+- ``end_to_end``: the real ETLWorker loop, inline and staged, draining a fake SQS
+  queue, with the per-document timing summaries the worker logs.
+
+AWS, Pinecone, MongoDB and the manifest are replaced by the in-process fakes
+of benchmarks/fakes.py; ``--aws-latency`` and ``--pinecone-latency`` add a
+fixed delay per call to model network round trips. Pass an earlier report as
+``--baseline`` to print the relative change of every timing.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import importlib
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeAWSHelper, FakeManifest, FakeMongoDBLogger, FakePineconeWorker, QueueDrained
+from pdf_operations import PDFExtractor
+from image_processor import OCRUpdater
+from ocr_cache import OCRCache
+
+# ---------------- Logging ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+# ---------------- Config ----------------
+DEFAULT_CORPUS_DIR = Path(__file__).parent / "corpus"
+DEFAULT_PAGE_COUNTS = [1, 10, 50]
+
+
+def measure(fn, repeat: int) -> dict:
+    """Runs ``fn`` ``repeat`` times; returns its timings and the last result."""
+    runs, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return {
+        "min": round(min(runs), 4),
+        "median": round(statistics.median(runs), 4),
+        "mean": round(statistics.mean(runs), 4),
+        "runs": len(runs),
+    }, result
+
+
+# ---------------- Per-stage ----------------
+def bench_stages(corpus_dir: Path, documents: list, repeat: int, workers: int, pinecone_latency: float) -> dict:
+    results = {}
+    for document in documents:
+        pdf_path = corpus_dir / document["name"]
+        pdf_bytes = pdf_path.read_bytes()
+        with tempfile.TemporaryDirectory() as tmp:
+            extract, records = measure(
+                lambda: list(PDFExtractor(pdf_path, tmp, pdf_bytes).iter_records(workers)), repeat)
+
+            images = [r for r in records if r["chunk_type"] == "image"]
+            # a fresh cache per run keeps every run cold
+            ocr, ocr_records = measure(
+                lambda: list(OCRUpdater(workers=workers, cache=OCRCache(Path(tempfile.mkdtemp(dir=tmp))))
+                             .ocr_records(dict(r) for r in images)), repeat)
+
+            upserted = [r for r in records if r["chunk_type"] != "image"] + ocr_records
+            upsert, counts = measure(lambda: FakePineconeWorker(pinecone_latency).upsert_stream(upserted), repeat)
+
+        chunks = sum(counts.values())
+        results[document["name"]] = {
+            "pages": document["pages"],
+            "chunks": chunks,
+            "extract_sec": extract,
+            "ocr_sec": ocr,
+            "upsert_sec": upsert,
+            "pages_per_sec": round(document["pages"] / extract["median"], 2) if extract["median"] else None,
+            "chunks_per_sec": round(chunks / (extract["median"] + ocr["median"] + upsert["median"]), 2),
+        }
+        logger.info(f"Stages for {document['name']}: extract {extract['median']}s, "
+                    f"OCR {ocr['median']}s, upsert {upsert['median']}s")
+    return results
+
+
+# ---------------- End-to-end ----------------
+def bench_end_to_end(mode: str, corpus_dir: Path, documents: list, copies: int, workers: int,
+                     aws_latency: float, pinecone_latency: float) -> dict:
+    """
+    Drains a fake queue of ``copies`` x corpus documents through ETLWorker.
+
+    ``mode`` is ``"inline"`` (process_sqs_messages with one worker) or
+    ``"staged"`` (run_staged_pipeline).
+    """
+    aws = FakeAWSHelper(latency_sec=aws_latency)
+    for copy in range(copies):
+        for document in documents:
+            file_key = f"{copy:03d}_{document['name']}"
+            aws.put_object(file_key, (corpus_dir / document["name"]).read_bytes())
+            aws.enqueue(file_key)
+
+    pinecone = FakePineconeWorker(pinecone_latency)
+    main = importlib.import_module("main")
+    handlers = []
+
+    def mongo_handler(*args, **kwargs):
+        handlers.append(FakeMongoDBLogger(*args, **kwargs))
+        return handlers[-1]
+
+    work_root = Path(tempfile.mkdtemp(prefix=f"etl_bench_{mode}_"))
+    cache_dir = work_root / "ocr_cache"
+    etl_logger = logging.getLogger("ETLWorker")
+    existing = list(etl_logger.handlers)
+    try:
+        with mock.patch.object(main, "AWSHelper", lambda: aws), \
+                mock.patch.object(main, "MongoDBLogger", mongo_handler), \
+                mock.patch.object(main, "get_manifest", FakeManifest), \
+                mock.patch.object(main, "get_pinecone_worker", lambda: pinecone), \
+                mock.patch.object(main, "get_ocr_cache", lambda: OCRCache(cache_dir)), \
+                mock.patch.dict(os.environ, {"OCR_CACHE_DIR": str(cache_dir)}):
+            worker = main.ETLWorker(project_root=work_root, poll_interval=0, workers=1, shard_workers=workers)
+            start = time.perf_counter()
+            try:
+                if mode == "staged":
+                    worker.run_staged_pipeline()
+                else:
+                    worker.process_sqs_messages()
+            except QueueDrained:
+                pass
+            elapsed = time.perf_counter() - start
+    finally:
+        for handler in etl_logger.handlers[len(existing):]:
+            etl_logger.removeHandler(handler)
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    summaries = [doc["timings"] for handler in handlers for doc in handler.docs if "timings" in doc]
+    pages = sum(s["pages"] for s in summaries)
+    chunks = sum(s["chunks"] for s in summaries)
+    stage_totals = {}
+    for summary in summaries:
+        for stage, seconds in summary["stages_sec"].items():
+            stage_totals[stage] = round(stage_totals.get(stage, 0.0) + seconds, 4)
+    result = {
+        "documents": len(summaries),
+        "failed": sum(1 for s in summaries if s["status"] != "processed"),
+        "total_sec": round(elapsed, 4),
+        "documents_per_sec": round(len(summaries) / elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 2),
+        "chunks_per_sec": round(chunks / elapsed, 2),
+        "stage_totals_sec": stage_totals,
+        "aws_calls": aws.calls,
+        "pinecone_requests": pinecone.index.requests,
+        "per_document": summaries,
+    }
+    logger.info(f"End-to-end {mode}: {result['documents']} documents in {result['total_sec']}s")
+    return result
+
+
+# ---------------- Report ----------------
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _timings(report: dict, prefix: str = ""):
+    """Flattens every timing (``*_sec`` medians and totals) of a report to path -> seconds."""
+    flat = {}
+    for key, value in report.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and "median" in value:
+            flat[path] = value["median"]
+        elif isinstance(value, dict):
+            flat.update(_timings(value, path + "."))
+        elif key.endswith("_sec") and not key.endswith("_per_sec") and isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def compare(baseline: dict, report: dict):
+    old = _timings({"stages": baseline.get("stages", {}),
+                    "end_to_end": {m: {k: v for k, v in r.items() if k != "per_document"}
+                                   for m, r in baseline.get("end_to_end", {}).items()}})
+    new = _timings({"stages": report.get("stages", {}),
+                    "end_to_end": {m: {k: v for k, v in r.items() if k != "per_document"}
+                                   for m, r in report.get("end_to_end", {}).items()}})
+    print(f"Compared with {baseline['meta'].get('git_commit')} ({baseline['meta'].get('created_at')}):")
+    for path in sorted(old.keys() & new.keys()):
+        if old[path]:
+            change = (new[path] - old[path]) / old[path] * 100
+            print(f"  {path:<70} {old[path]:>9.4f}s -> {new[path]:>9.4f}s  {change:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ETL benchmarks")
+    parser.add_argument("--corpus-dir", type=Path, default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--pages", type=int, nargs="+", default=DEFAULT_PAGE_COUNTS,
+                        help="Page count of every synthetic document")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage measurement")
+    parser.add_argument("--copies", type=int, default=2, help="Queue copies of the corpus for end-to-end runs")
+    parser.add_argument("--workers", type=int, default=1, help="Extraction/OCR processes per document")
+    parser.add_argument("--modes", nargs="*", default=["inline", "staged"], choices=["inline", "staged"])
+    parser.add_argument("--aws-latency", type=float, default=0.0, help="Seconds added to every S3/SQS call")
+    parser.add_argument("--pinecone-latency", type=float, default=0.0, help="Seconds added to every upsert")
+    parser.add_argument("--out", type=Path, default=Path("benchmark_report.json"))
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare with")
+    args = parser.parse_args()
+
+    documents = generate_corpus(args.corpus_dir, args.pages, args.seed)
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "tesseract": shutil.which("tesseract") is not None,
+            "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        },
+        "corpus": documents,
+        "stages": bench_stages(args.corpus_dir, documents, args.repeat, args.workers, args.pinecone_latency),
+        "end_to_end": {
+            mode: bench_end_to_end(mode, args.corpus_dir, documents, args.copies, args.workers,
+                                   args.aws_latency, args.pinecone_latency)
+            for mode in args.modes
+        },
+    }
+    args.out.write_text(json.dumps(report, indent=2))
+    logger.info(f"Benchmark report written to {args.out}")
+    if args.baseline:
+        compare(json.loads(args.baseline.read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
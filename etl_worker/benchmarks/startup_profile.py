@@ -0,0 +1,108 @@
+# startup_profile.py
+"""
+Startup-time profile of the ETL worker.
+
+    python -m benchmarks.startup_profile [--connect] [--top 15] [--json startup.json]
+
+Run from the etl_worker folder. Reports:
+
+1. the slowest packages imported by ``import main`` in a fresh interpreter
+   (``python -X importtime``), grouped by top-level package;
+2. the steps a worker takes before its first SQS receive, timed in-process:
+   importing main, and with ``--connect`` building AWSHelper (config + queue
+   URL), the MongoDB log handler and the first receive call;
+3. the work deferred to the warm-up thread: the processing modules and, with
+   ``--connect``, the vector store connection.
+
+Steps that need credentials report their error instead of failing the run.
+"""
+import sys
+import json
+import time
+import argparse
+import importlib
+import subprocess
+from pathlib import Path
+
+ETL_DIR = Path(__file__).resolve().parent.parent
+
+
+def import_profile(module: str = "main", top: int = 15) -> dict:
+    """Runs ``import <module>`` under ``-X importtime`` and sums self time per top-level package."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ETL_DIR, capture_output=True, text=True)
+    packages = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + int(self_us)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        "total_sec": round(sum(packages.values()) / 1e6, 3),
+        "top_packages": [{"package": name, "seconds": round(us / 1e6, 3)} for name, us in ranked[:top]],
+    }
+
+
+def _timed(steps: list, name: str, fn):
+    start = time.perf_counter()
+    error, result = None, None
+    try:
+        result = fn()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    steps.append({"step": name, "seconds": round(time.perf_counter() - start, 3), "error": error})
+    return result
+
+
+def startup_steps(connect: bool) -> dict:
+    before_poll, warm_up = [], []
+    main = _timed(before_poll, "import main", lambda: importlib.import_module("main"))
+    if connect and main is not None:
+        aws = _timed(before_poll, "AWSHelper() (config, SQS queue URL)", main.AWSHelper)
+        _timed(before_poll, "MongoDBLogger()", lambda: main.MongoDBLogger("etl_logs").close())
+        if aws is not None:
+            _timed(before_poll, "first receive_messages (short poll)", lambda: aws.receive_messages(1, 0))
+
+    _timed(warm_up, "import pipeline (PyMuPDF, Pillow, pytesseract)", lambda: importlib.import_module("pipeline"))
+    _timed(warm_up, "import staged_pipeline", lambda: importlib.import_module("staged_pipeline"))
+    if connect and main is not None:
+        _timed(warm_up, "vector store connection", main.get_pinecone_worker)
+    return {
+        "before_first_poll": before_poll,
+        "before_first_poll_sec": round(sum(s["seconds"] for s in before_poll), 3),
+        "warm_up": warm_up,
+        "warm_up_sec": round(sum(s["seconds"] for s in warm_up), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile ETL worker startup")
+    parser.add_argument("--connect", action="store_true", help="Also time AWS, MongoDB and vector store setup")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list from the import profile")
+    parser.add_argument("--json", type=Path, help="Write the profile to this file")
+    args = parser.parse_args()
+
+    profile = {"imports": import_profile("main", args.top), "steps": startup_steps(args.connect)}
+
+    imports = profile["imports"]
+    print(f"import main: {imports['total_sec']:.3f}s" + ("" if imports["ok"] else f" (failed: {imports['error']})"))
+    for entry in imports["top_packages"]:
+        print(f"  {entry['package']:<30} {entry['seconds']:.3f}s")
+    for section in ("before_first_poll", "warm_up"):
+        steps = profile["steps"]
+        print(f"{section.replace('_', ' ')}: {steps[section + '_sec']:.3f}s")
+        for step in steps[section]:
+            suffix = f"  ! {step['error']}" if step["error"] else ""
+            print(f"  {step['step']:<50} {step['seconds']:.3f}s{suffix}")
+
+    if args.json:
+        args.json.write_text(json.dumps(profile, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# chunker.py
+import re
+import logging
+
+# ---------------- Logging ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+# ---------------- Config ----------------
+SEPARATORS = ["\n\n", "\n", " ", ""]
+# A page whose text ends without one of these continues its last paragraph on the next page
+SENTENCE_END = re.compile(r"[.!?:;)\]\"']\s*$")
+
+
+def token_length_function(encoding_name: str = "cl100k_base"):
+    """
+    Length function counting tokens instead of characters.
+
+    Uses tiktoken when it is installed, otherwise approximates one token per
+    whitespace-separated word.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken not installed, approximating tokens by words")
+        return lambda text: len(text.split())
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+class StreamingChunker:
+    """
+    Recursive text chunker that consumes a document page by page.
+
+    Text is split on ``separators`` in order (paragraphs, lines, words, characters)
+    until every piece fits ``chunk_size``, and pieces are merged back into chunks of
+    at most ``chunk_size`` with ``chunk_overlap`` carried between neighbours, like
+    LangChain's RecursiveCharacterTextSplitter (which it replaces; pieces of an
+    oversized paragraph are packed together with their neighbours, so chunks come
+    out fuller). Unlike splitting
+    each page on its own, the buffer survives page boundaries: a paragraph that runs
+    onto the next page stays in one chunk, and every chunk reports the pages it spans.
+
+    Usage::
+
+        chunker = StreamingChunker()
+        for page_number, text in pages:
+            for chunk in chunker.feed(text, page_number):
+                ...  # {"text", "page_start", "page_end"}
+        for chunk in chunker.flush():
+            ...
+
+    ``length_function`` defaults to characters; pass ``token_length_function()`` for
+    token-based sizing.
+    """
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50, length_function=len,
+                 separators=None):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length = length_function
+        self.separators = separators or SEPARATORS
+        self._units = []   # (text, joiner, page, length) waiting to be emitted
+        self._size = 0     # length of the buffered chunk including joiners
+        self._last_text = ""
+
+    @classmethod
+    def from_tokens(cls, chunk_size: int = 256, chunk_overlap: int = 32, encoding_name: str = "cl100k_base"):
+        return cls(chunk_size, chunk_overlap, token_length_function(encoding_name))
+
+    # ---------------- Streaming API ----------------
+    def feed(self, text: str, page_number: int = None):
+        """Adds one page of text; yields every chunk that is complete."""
+        if not text or not text.strip():
+            return
+        # Continue the previous page's last paragraph unless it ended a sentence
+        first_joiner = self.separators[0]
+        if self._last_text and not SENTENCE_END.search(self._last_text):
+            first_joiner = " "
+        for i, (piece, joiner) in enumerate(self._pieces(text.strip(), self.separators)):
+            yield from self._add(piece, first_joiner if i == 0 else joiner, page_number)
+        self._last_text = text.rstrip()
+
+    def flush(self):
+        """Yields the last, partially filled chunk and resets the chunker."""
+        if self._units:
+            yield self._chunk()
+        self._units, self._size, self._last_text = [], 0, ""
+
+    # ---------------- One-shot API ----------------
+    def split_text(self, text: str):
+        """
+        Splits a single text into chunk strings (drop-in for LangChain's ``split_text``).
+        Uses a fresh buffer, so a shared chunker can serve one-shot calls safely.
+        """
+        chunker = StreamingChunker(self.chunk_size, self.chunk_overlap, self.length, self.separators)
+        chunks = [c["text"] for c in chunker.feed(text)]
+        chunks.extend(c["text"] for c in chunker.flush())
+        return [c for c in chunks if c]
+
+    # ---------------- Internals ----------------
+    def _pieces(self, text: str, separators):
+        """Yields (piece, joiner) with every piece short enough or unsplittable."""
+        sep_index = next((i for i, s in enumerate(separators) if s == "" or s in text), len(separators) - 1)
+        sep = separators[sep_index]
+        parts = text.split(sep) if sep else list(text)
+        for part in parts:
+            if not part.strip() and sep != "":
+                continue
+            if self.length(part) <= self.chunk_size or sep_index + 1 >= len(separators):
+                yield part, sep
+            else:
+                for i, (sub, sub_sep) in enumerate(self._pieces(part, separators[sep_index + 1:])):
+                    yield sub, sep if i == 0 else sub_sep
+
+    def _add(self, piece: str, joiner: str, page):
+        piece_len = self.length(piece)
+        joiner_len = self.length(joiner) if self._units else 0
+        if self._units and self._size + joiner_len + piece_len > self.chunk_size:
+            yield self._chunk()
+            # keep a tail of at most chunk_overlap as the start of the next chunk
+            while self._units and (self._size > self.chunk_overlap or
+                                   self._size + self.length(joiner) + piece_len > self.chunk_size):
+                self._drop_first()
+            joiner_len = self.length(joiner) if self._units else 0
+        self._units.append((piece, joiner, page, piece_len))
+        self._size += joiner_len + piece_len
+
+    def _drop_first(self):
+        _, _, _, first_len = self._units.pop(0)
+        self._size -= first_len
+        if self._units:
+            self._size -= self.length(self._units[0][1])
+
+    def _chunk(self) -> dict:
+        text = self._units[0][0] + "".join(joiner + piece for piece, joiner, _, _ in self._units[1:])
+        pages = [page for _, _, page, _ in self._units if page is not None]
+        return {
+            "text": text.strip(),
+            "page_start": pages[0] if pages else None,
+            "page_end": pages[-1] if pages else None,
+        }
@@ -1,10 +1,16 @@
 # ocr_updater.py
+import io
 import json
 import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageStat
 import pytesseract
 from datetime import datetime
+from ocr_cache import OCRCache
 
 # ---------------- Logging ----------------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -14,25 +20,111 @@ logger = logging.getLogger(__name__)
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 IMAGE_DIR = Path(r"C:\Users\HP\Desktop\flowautmate_assesment\parsed_pdf\images") #my  local  tesseract  replace witrh urs  
 
+# Pre-filters: images below these limits cannot hold readable text and skip tesseract
+MIN_IMAGE_SIDE = 32       # px, shortest side
+MIN_PIXEL_STDDEV = 4.0    # grayscale standard deviation; blank/flat images sit near 0
+OCR_TIMEOUT_SEC = 30      # per image; the tesseract process is killed after this
+
+
+def ocr_image(source, timeout: int = OCR_TIMEOUT_SEC, min_side: int = MIN_IMAGE_SIDE,
+              min_stddev: float = MIN_PIXEL_STDDEV) -> str:
+    """
+    Runs OCR on one image given as raw bytes or a file path.
+
+    Module level so it can be shipped to a process pool. Returns an empty string
+    for images rejected by the pre-filters and None when the OCR run timed out.
+    """
+    img = Image.open(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+    if min(img.size) < min_side:
+        return ""
+    if ImageStat.Stat(img.convert("L")).stddev[0] < min_stddev:
+        return ""
+    try:
+        return pytesseract.image_to_string(img, timeout=timeout).strip()
+    except RuntimeError as e:  # raised by pytesseract on timeout
+        logger.warning(f"OCR timed out after {timeout}s: {e}")
+        return None
+
 class OCRUpdater:
     """
     Processes images in a folder using Tesseract OCR and updates corresponding JSON files.
 
     Responsibilities:
         - Reads each PNG image in the directory.
-        - Runs OCR to extract text.
+        - Skips images too small or too uniform to contain text.
+        - Serves repeated images from an optional OCRCache.
+        - Runs OCR to extract text, in a process pool when ``workers > 1``.
         - Appends page and image information to the text.
         - Updates JSON files with OCR text and timestamp.
+
+    ``ocr_records`` does the same for in-memory image records (see pipeline.py),
+    in which case no ``image_dir`` is needed.
     """
-    def __init__(self, image_dir: Path):
+    def __init__(self, image_dir: Path = None, workers: int = 1, timeout: int = OCR_TIMEOUT_SEC,
+                 min_side: int = MIN_IMAGE_SIDE, min_stddev: float = MIN_PIXEL_STDDEV,
+                 cache: OCRCache = None):
         self.image_dir = image_dir
-        if not self.image_dir.exists():
+        self.workers = max(1, workers)
+        self.cache = cache
+        self._in_flight = {}  # cache key -> pending result, dedupes repeats within a run
+        self.ocr_options = {"timeout": timeout, "min_side": min_side, "min_stddev": min_stddev}
+        if self.image_dir is None:
+            logger.info("OCRUpdater initialized for in-memory records")
+        elif not self.image_dir.exists():
             logger.error(f"Image directory '{self.image_dir}' does not exist.")
         else:
             logger.info(f"OCRUpdater initialized for directory: {self.image_dir}")
 
+    @staticmethod
+    def _annotate(text: str, data: dict) -> str:
+        """Appends page and image info to the OCR text."""
+        page_num = data.get("page_number", "unknown")
+        img_index = data.get("image_index", "unknown")
+        return text + f"\n\nThis image belongs to page {page_num} and image num {img_index}."
+
+    def _pool(self):
+        """Process pool for OCR (spawned, not forked from this threaded process), or None when running inline."""
+        if self.workers <= 1:
+            return None
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _submit(self, pool, source, key: str = None):
+        """
+        Starts OCR on ``source`` (bytes or path); returns a zero-arg callable
+        yielding the text. Cache hits never reach tesseract. ``key`` is the
+        image's SHA-256 when already known.
+        """
+        if self.cache is None:
+            key = None
+        elif key is None:
+            data = source if isinstance(source, (bytes, bytearray)) else Path(source).read_bytes()
+            key = OCRCache.key_for(data)
+        if key is not None:
+            if key in self._in_flight:  # same image already queued in this run
+                return self._in_flight[key]
+            cached = self.cache.get(key)
+            if cached is not None:
+                return lambda: cached
+
+        run = (lambda: ocr_image(source, **self.ocr_options)) if pool is None \
+            else pool.submit(ocr_image, source, **self.ocr_options).result
+        done = []
+
+        def result():
+            if not done:
+                text = run()
+                if key is not None:
+                    self._in_flight.pop(key, None)
+                    if text is not None:  # timeouts are worth retrying next time
+                        self.cache.put(key, text)
+                done.append(text or "")
+            return done[0]
+
+        if key is not None:
+            self._in_flight[key] = result
+        return result
    
-    def process_image(self, img_file: Path):
+    def process_image(self, img_file: Path, text: str = None):
             try:
                 json_file = img_file.with_suffix(".json")
                 if not json_file.exists():
@@ -43,17 +135,10 @@ class OCRUpdater:
                 with open(json_file, "r", encoding="utf-8") as f:
                     data = json.load(f)
 
-                # Run OCR
-                img = Image.open(img_file)
-                text = pytesseract.image_to_string(img).strip()
-
-                # Append page and image info
-                page_num = data.get("page_number", "unknown")
-                img_index = data.get("image_index", "unknown")
-                text += f"\n\nThis image belongs to page {page_num} and image num {img_index}."
-
-                # Update JSON fields
-                data["chunk_text"] = text
+                # Run OCR (unless already done by the pool) and update JSON fields
+                if text is None:
+                    text = self._submit(None, img_file)()
+                data["chunk_text"] = self._annotate(text, data)
                 data["ocr_processed_at"] = datetime.now().isoformat()
 
                 # Save JSON
@@ -64,11 +149,63 @@ class OCRUpdater:
             except Exception as e:
                 logger.error(f"Failed to process {img_file.name}: {e}", exc_info=True)
 
+    def ocr_records(self, records, budget=None):
+        """
+        Streams records through OCR without touching the disk.
+
+        Image records carrying ``image_bytes`` get their ``chunk_text`` and
+        ``ocr_processed_at`` filled in; so do records from a low-memory
+        PDFExtractor, whose image is read from ``file_path``. Every other record
+        passes through unchanged. With ``workers > 1`` up to ``4 * workers``
+        images are OCR'd ahead while records keep their input order; a
+        ``MemoryBudget`` narrows that window as RSS nears the budget.
+        """
+        pool = self._pool()
+        pending = deque()
+        window = self.workers * 4
+        try:
+            for record in records:
+                result = None
+                if record.get("chunk_type") == "image" and record.get("image_bytes"):
+                    result = self._submit(pool, record["image_bytes"])
+                elif record.get("chunk_type") == "image" and record.get("image_sha256"):
+                    result = self._submit(pool, record["file_path"], key=record["image_sha256"])
+                pending.append((record, result))
+                if budget is not None and result is not None:
+                    window = budget.limit(self.workers * 4)
+                while len(pending) > window or (pending and pending[0][1] is None):
+                    yield self._finish_record(*pending.popleft())
+            while pending:
+                yield self._finish_record(*pending.popleft())
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+
+    def _finish_record(self, record: dict, result):
+        if result is not None:
+            try:
+                record["chunk_text"] = self._annotate(result(), record)
+                record["ocr_processed_at"] = datetime.now().isoformat()
+            except Exception as e:
+                logger.error(f"Failed to OCR {record.get('_id')}: {e}", exc_info=True)
+        return record
+
 
     def run(self):
-        logger.info(f"Processing images in directory: {self.image_dir}")
-        for img_file in self.image_dir.glob("*.png"):
-            self.process_image(img_file)
+        logger.info(f"Processing images in directory: {self.image_dir} ({self.workers} workers)")
+        img_files = list(self.image_dir.glob("*.png"))
+        pool = self._pool()
+        with pool or nullcontext():
+            results = [(img_file, self._submit(pool, img_file)) for img_file in img_files]
+            for img_file, result in results:
+                try:
+                    text = result()
+                except Exception as e:
+                    logger.error(f"Failed to process {img_file.name}: {e}", exc_info=True)
+                    continue
+                self.process_image(img_file, text)
+        if self.cache is not None:
+            logger.info(f"OCR cache: {self.cache.stats()}")
         logger.info("All images processed and JSON updated.")
 
 # ---------------- Exported function ----------------
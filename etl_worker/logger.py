@@ -1,11 +1,28 @@
 import logging
+import queue
+import threading
+import time
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
 
 
 class MongoDBLogger(logging.Handler):
-    def __init__(self, collection_name):
+    """
+    Logging handler that ships records to MongoDB without blocking the caller.
+
+    ``emit`` only formats the record and puts it on a bounded in-memory queue.
+    A background thread drains the queue and writes with ``insert_many`` whenever
+    ``batch_size`` records are waiting or ``flush_interval`` seconds have passed.
+
+    When the queue is full, ``overflow="drop"`` discards the new record (counted in
+    ``dropped`` and reported to MongoDB once space frees up), while
+    ``overflow="block"`` applies backpressure: the caller waits up to
+    ``block_timeout`` seconds before the record is dropped. ``flush`` and ``close``
+    write everything still queued.
+    """
+    def __init__(self, collection_name, capacity: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 2.0, overflow: str = "drop", block_timeout: float = 1.0):
         super().__init__()
         
         # Load environment variables
@@ -15,22 +32,94 @@ class MongoDBLogger(logging.Handler):
         self.mongo_url = os.getenv("MONGO_URL")
         if not self.mongo_url:
             raise Exception("MONGO_URL is not set in the .env file")
+        if overflow not in ("drop", "block"):
+            raise ValueError("overflow must be 'drop' or 'block'")
         
         self.client = MongoClient(self.mongo_url)
         self.db = self.client['tenderwin_db']
         self.collection = self.db[collection_name]
 
+        # Buffering
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=capacity)
+        self._closed = False
+        self._thread = threading.Thread(target=self._drain, name=f"mongo-log-{collection_name}", daemon=True)
+        self._thread.start()
+
     def emit(self, record):
-        """Emit a record to MongoDB."""
+        """Queue a record for MongoDB."""
         try:
             log_entry = self.format(record)
-            self.collection.insert_one({"log": log_entry, "level": record.levelname, "time": record.created})
+            doc = {"log": log_entry, "level": record.levelname, "time": record.created}
+            # structured payloads passed with extra={"timings": ...} are stored alongside
+            if getattr(record, "timings", None) is not None:
+                doc["timings"] = record.timings
+        except Exception:
+            self.handleError(record)
+            return
+        if self._closed:
+            return
+        try:
+            if self.overflow == "block":
+                self._queue.put(doc, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(doc)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self):
+        """Background writer: batches queued documents by size or time."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            # flush()/close() send an Event (or None to stop) and wait for it
+            if isinstance(item, dict):
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline or not isinstance(item, dict):
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None and self._closed and self._queue.empty():
+                return
+
+    def _write(self, batch):
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            batch.append({"log": f"{dropped} log records dropped (queue full)",
+                          "level": "WARNING", "time": time.time()})
+        if not batch:
+            return
+        try:
+            self.collection.insert_many(batch, ordered=False)
         except Exception as e:
             print(f"Failed to log to MongoDB: {e}")
 
+    def flush(self, timeout: float = 10.0):
+        """Block until everything queued so far has been written."""
+        if self._closed or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
     def close(self):
-        """Close the MongoDB connection."""
-        self.client.close()
+        """Flush queued records, stop the writer and close the MongoDB connection."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join(timeout=10.0)
+            self.client.close()
         super().close()
 
 # Example usage
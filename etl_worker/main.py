@@ -1,22 +1,172 @@
 import os
 import time
 import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing.util import Finalize
 from pathlib import Path
 from colorama import init, Fore, Style
-from aws_helper import AWSHelper
-from pdf_operations import PDFExtractor
-from image_processor import OCRUpdater
-from pinecone_worker import PineconeWorker
+from aws_helper import AWSHelper, VisibilityHeartbeat
+from ocr_cache import get_ocr_cache
+from manifest import get_manifest
 from logger import MongoDBLogger
+from metrics import DocumentTimings, message_queue_lag, record_document, start_metrics_server
+from memory import MB, MemoryBudget
 import shutil
 
 # Initialize colorama
 init(autoreset=True)
 
-# Create PineconeWorker instance
-pinecone_worker = PineconeWorker()
-#pinecone_worker.delete_index()
-#print(pinecone_worker.describe_index())
+# The processing modules (PyMuPDF, Pillow/pytesseract, NumPy, the Pinecone SDK)
+# and the vector store connection are loaded on first use or by a warm-up thread,
+# so a freshly started worker is polling SQS within about a second.
+_pinecone_worker = None
+_pinecone_lock = threading.Lock()
+
+
+def get_pinecone_worker():
+    """Process-wide PineconeWorker, connected (and the index created) on first use."""
+    global _pinecone_worker
+    with _pinecone_lock:
+        if _pinecone_worker is None:
+            from pinecone_worker import PineconeWorker
+
+            _pinecone_worker = PineconeWorker()
+            #_pinecone_worker.delete_index()
+            #print(_pinecone_worker.describe_index())
+        return _pinecone_worker
+
+
+def _warm_up(log: logging.Logger):
+    start = time.perf_counter()
+    try:
+        import pipeline  # noqa: F401
+        get_pinecone_worker()
+        get_ocr_cache()
+        log.info(f"Warm-up done in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        log.error(f"Warm-up failed: {e}", exc_info=True)
+
+
+def start_warm_up(log: logging.Logger = None):
+    """Imports the processing modules and connects to the vector store in a background thread."""
+    thread = threading.Thread(target=_warm_up, args=(log or job_logger,), name="etl-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+CONSOLE_LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+MONGO_LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Child logger: propagates to the ETLWorker handlers when run inline; pool
+# processes give it their own console and MongoDB handlers (_init_job_process).
+job_logger = logging.getLogger("ETLWorker.job")
+
+# ---------------- Per-job processing ----------------
+_job_aws = None
+
+
+def _attach_job_log_handlers(mongo_collection: str):
+    job_logger.setLevel(logging.INFO)
+    job_logger.propagate = False
+    ch = logging.StreamHandler()
+    ch.setFormatter(logging.Formatter(CONSOLE_LOG_FORMAT))
+    job_logger.addHandler(ch)
+    mongo_handler = MongoDBLogger(mongo_collection)
+    mongo_handler.setFormatter(logging.Formatter(MONGO_LOG_FORMAT))
+    job_logger.addHandler(mongo_handler)
+    # pool processes exit without running atexit hooks; write out queued records first
+    Finalize(mongo_handler, mongo_handler.close, exitpriority=10)
+
+
+def _init_job_process(mongo_collection: str = None):
+    """
+    Pool initializer: every worker process gets its own AWS clients, logs jobs
+    to the console and to ``mongo_collection`` like the parent, and warms up.
+    """
+    global _job_aws
+    if mongo_collection:
+        _attach_job_log_handlers(mongo_collection)
+    _job_aws = AWSHelper()
+    start_warm_up()
+
+
+def process_document(file_key: str, work_root: str, aws: AWSHelper = None, shard_workers: int = 1,
+                     spill_dir: str = None, queue_lag: float = None, memory_budget_mb: int = None) -> dict:
+    """
+    Runs the full ETL for a single S3 key inside an isolated temporary workspace.
+
+    PDFs under the in-memory size limit are never written to disk; larger ones are
+    downloaded into ``<work_root>/<stem>_XXXX/``, so any number of jobs can run
+    side by side. The chunks stream in memory from extraction through
+    OCR into Pinecone (see pipeline.py). Re-uploads are incremental: the chunk
+    manifest skips unchanged documents and chunks and deletes removed ones. The
+    workspace is removed when the job finishes, whether it succeeded or not.
+
+    The job's peak RSS is sampled throughout and reported as ``peak_rss_mb``. With
+    ``memory_budget_mb`` it runs in bounded-memory mode: images are streamed to the
+    workspace instead of being held in memory, and shard and OCR look-ahead back
+    off as the RSS of this process (with psutil, plus its shard processes) nears
+    the budget.
+
+    Args:
+        file_key (str): S3 key (SQS message body) of the PDF.
+        work_root (str): Folder under which the job workspace is created.
+        aws (AWSHelper, optional): Helper to use. Defaults to the pool process helper.
+        shard_workers (int): Processes used to extract page ranges of long PDFs in parallel.
+        spill_dir (str, optional): Debug folder; records are also written to ``<spill_dir>/<stem>/``.
+        queue_lag (float, optional): Seconds the message waited in SQS, for the timing summary.
+        memory_budget_mb (int, optional): RSS budget of the job in MB; None or 0 only reports the peak.
+
+    Returns:
+        dict: Timing summary of the document (``DocumentTimings.summary``); its status is
+        ``"not_found"`` if the PDF could not be downloaded. Processing errors are raised
+        with the summary attached as ``error.timings`` so the caller can keep the message
+        on the queue and still record where it failed.
+    """
+    from pipeline import run_document_pipeline
+
+    aws = aws or _job_aws
+    timings = DocumentTimings(file_key, queue_lag)
+    timings.memory = budget = MemoryBudget((memory_budget_mb or 0) * MB).start()
+    workspace = Path(tempfile.mkdtemp(prefix=f"{Path(file_key).stem}_", dir=work_root))
+    try:
+        local_path = workspace / Path(file_key).name
+        # Small PDFs stay in memory; larger ones use a parallel multipart download
+        with timings.stage("download"):
+            pdf_bytes, downloaded = aws.fetch(file_key, str(local_path))
+        if pdf_bytes is not None:
+            print(f"{Fore.CYAN}Downloaded file into memory: {file_key} ({len(pdf_bytes)} bytes){Style.RESET_ALL}")
+            job_logger.info(f"Downloaded file into memory: {file_key} ({len(pdf_bytes)} bytes)")
+        elif downloaded:
+            print(f"{Fore.CYAN}Downloaded file: {file_key} -> {local_path}{Style.RESET_ALL}")
+            job_logger.info(f"Downloaded file: {file_key} -> {local_path}")
+        else:
+            timings.status = "not_found"
+            return timings.summary()
+
+        pdf_name = local_path.stem
+        spill = Path(spill_dir) / pdf_name if spill_dir else None
+        counts = run_document_pipeline(local_path, get_pinecone_worker(), workers=shard_workers, spill_dir=spill,
+                                       ocr_cache=get_ocr_cache(), manifest=get_manifest(), pdf_bytes=pdf_bytes,
+                                       timings=timings, memory_budget=budget)
+        print(f"{Fore.GREEN}Extraction, OCR and Pinecone upsert done for {pdf_name}: {counts}{Style.RESET_ALL}")
+        job_logger.info(f"Extraction, OCR and Pinecone upsert done for {pdf_name}: {counts}")
+
+        with timings.stage("finalize"):
+            aws.move_file(file_key, "input", "processed")
+        print(f"{Fore.CYAN}Moved {file_key} to processed folder{Style.RESET_ALL}")
+        job_logger.info(f"Moved {file_key} to processed folder")
+        return timings.summary()
+    except Exception as e:
+        timings.fail("pipeline")
+        e.timings = timings.summary()
+        raise
+    finally:
+        budget.stop()
+        shutil.rmtree(workspace, ignore_errors=True)
+
 
 class ETLWorker:
 
@@ -30,33 +180,49 @@ class ETLWorker:
 
     Attributes:
         project_root (Path): Root directory of the project.
-        download_dir (Path): Directory where PDFs are downloaded.
+        download_dir (Path): Directory under which per-job workspaces are created.
         aws (AWSHelper): AWS helper instance for S3 and SQS operations.
-        poll_interval (int): Time in seconds to wait between polling SQS.
-        logger (logging.Logger): Logger for console and MongoDB logging.
+        poll_interval (int): Time in seconds to wait before polling again when SQS is empty.
+        workers (int): Number of worker processes; 1 processes messages inline.
+        shard_workers (int): Extraction processes per job for long PDFs. Defaults to
+            the CPU count divided by ``workers``.
+        spill_dir (str): Optional debug folder receiving a copy of every extracted record.
+        metrics_port (int): Port of the Prometheus ``/metrics`` endpoint; None disables it.
+        memory_budget_mb (int): Per-job RSS budget in MB enabling bounded-memory mode
+            (see ``process_document``); None disables it.
+        logger (logging.Logger): Logger for console and MongoDB logging. Every finished
+            document also logs its timing summary, stored under ``timings`` in MongoDB.
 
     """
-    def __init__(self, project_root: Path = None, poll_interval: int = 30, mongo_collection="etl_logs"):
+    def __init__(self, project_root: Path = None, poll_interval: int = 30, mongo_collection="etl_logs",
+                 workers: int = 1, shard_workers: int = None, spill_dir: str = None, metrics_port: int = None,
+                 memory_budget_mb: int = None):
         self.project_root = project_root or Path(__file__).parent
         self.download_dir = self.project_root / "downloads"
         self.download_dir.mkdir(exist_ok=True, parents=True)
 
         self.aws = AWSHelper()
         self.poll_interval = poll_interval
+        self.workers = max(1, workers)
+        self.shard_workers = shard_workers or max(1, (os.cpu_count() or 1) // self.workers)
+        self.spill_dir = spill_dir
+        self.memory_budget_mb = memory_budget_mb
+        self.mongo_collection = mongo_collection
+        self.metrics_server = start_metrics_server(metrics_port) if metrics_port else None
 
         # Logging setup
         self.logger = logging.getLogger("ETLWorker")
         self.logger.setLevel(logging.INFO)
 
         ch = logging.StreamHandler()
-        ch.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+        ch.setFormatter(logging.Formatter(CONSOLE_LOG_FORMAT))
         self.logger.addHandler(ch)
 
         mongo_handler = MongoDBLogger(mongo_collection)
-        mongo_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        mongo_handler.setFormatter(logging.Formatter(MONGO_LOG_FORMAT))
         self.logger.addHandler(mongo_handler)
 
-        self.logger.info(f"{Fore.GREEN}ETLWorker initialized. Download folder: {self.download_dir}{Style.RESET_ALL}")
+        self.logger.info(f"{Fore.GREEN}ETLWorker initialized. Download folder: {self.download_dir}, workers: {self.workers}{Style.RESET_ALL}")
 
     def process_sqs_messages(self):
 
@@ -65,74 +231,145 @@ class ETLWorker:
         Continuously polls the SQS queue for new PDF messages and processes them.
 
         For each message:
-            1. Downloads the PDF from S3.
-            2. Extracts paragraphs, tables, and images using PDFExtractor.
+            1. Downloads the PDF from S3 into a per-job temporary workspace.
+            2. Extracts paragraphs, tables, and images in a single PDFExtractor pass.
             3. Runs OCR on images using OCRUpdater.
-            4. Upserts extracted JSON content into Pinecone namespaces (paragraphs, tables, images).
+            4. Upserts the records into Pinecone namespaces (paragraphs, tables, images).
+               Steps 2-4 stream records in memory; nothing is written to disk
+               unless ``spill_dir`` is set.
             5. Moves processed files to a "processed" folder in S3.
-            6. Deletes the processed message from the SQS queue.
-            7. Cleans up local temporary directories.
+            6. Deletes processed messages from the SQS queue in batches.
+            7. Cleans up the job workspace.
+
+        With ``workers > 1`` messages are dispatched to a process pool and the worker
+        only asks SQS for as many messages as it has free pool slots; otherwise a
+        received batch runs message by message in this process. In-flight messages
+        are kept invisible by a VisibilityHeartbeat and finished ones are removed with
+        batched deletes. The worker only sleeps ``poll_interval`` when the queue
+        returned nothing and no job is running.
 
         Logs all activities and errors to both console and MongoDB.
         """
+        with VisibilityHeartbeat(self.aws) as heartbeat:
+            if self.workers <= 1:
+                self._run_inline(heartbeat)
+                return
+
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                     initializer=_init_job_process,
+                                     initargs=(self.mongo_collection,)) as pool:
+                self._run_pool(pool, heartbeat)
+
+    def run_staged_pipeline(self, concurrency: dict = None):
+        """
+        Alternative to ``process_sqs_messages`` that overlaps documents across stages.
+
+        Downloads, extraction, OCR, upserts and S3 moves of different documents run
+        at the same time with per-stage concurrency limits (see staged_pipeline.py).
+        """
+        from staged_pipeline import StagedPipeline
+
+        StagedPipeline(self.aws, get_pinecone_worker(), self.download_dir, manifest=get_manifest(),
+                       concurrency=concurrency, poll_interval=self.poll_interval,
+                       logger=self.logger, memory_budget_mb=self.memory_budget_mb).run()
+
+    def _wait_for_messages(self):
+        print(f"{Fore.YELLOW}No messages in SQS queue. Waiting...{Style.RESET_ALL}")
+        time.sleep(self.poll_interval)
+
+    def _run_inline(self, heartbeat):
+        start_warm_up(self.logger)
         while True:
             messages = self.aws.receive_messages()
             if not messages:
-                print(f"{Fore.YELLOW}No messages in SQS queue. Waiting...{Style.RESET_ALL}")
-                time.sleep(self.poll_interval)
+                self._wait_for_messages()
                 continue
 
+            for msg in messages:
+                heartbeat.track(msg['ReceiptHandle'])
+            finished = []
             for msg in messages:
                 try:
-                    file_key = msg['Body']
-                    local_path = self.download_dir / Path(file_key).name
-
-                    if self.aws.download_file(file_key, str(local_path)):
-                        print(f"{Fore.CYAN}Downloaded file: {file_key} -> {local_path}{Style.RESET_ALL}")
-                        self.logger.info(f"Downloaded file: {file_key} -> {local_path}")
-
-                        pdf_extractor = PDFExtractor(local_path)
-                        pdf_extractor.extract_paragraphs()
-                        pdf_extractor.extract_tables()
-                        pdf_extractor.extract_images()
-                        print(f"{Fore.MAGENTA}PDF extraction done for {local_path.name}{Style.RESET_ALL}")
-                        self.logger.info(f"PDF extraction done for {local_path.name}")
-
-                   
-
-
-                        BASE_DIR = Path("parsed_pdf")
-                        IMAGE_DIR = BASE_DIR / "images"
-                        ocr = OCRUpdater(IMAGE_DIR)
-                        ocr.run()
-                        print(f"{Fore.BLUE}OCR completed for images of {pdf_extractor.pdf_name}{Style.RESET_ALL}")
-                        self.logger.info(f"OCR completed for images of {pdf_extractor.pdf_name}")
-
-                        # Upsert JSON folders into Pinecone
-                        pinecone_worker.upsert_json_folder(BASE_DIR / "paragraphs", "pdf-paragraphs")
-                        pinecone_worker.upsert_json_folder(BASE_DIR/ "tables", "pdf-tables")
-                        pinecone_worker.upsert_json_folder(BASE_DIR / "images", "pdf-images")
-                        print(f"{Fore.GREEN}Pinecone upsert done for {pdf_extractor.pdf_name}{Style.RESET_ALL}")
-                        self.logger.info(f"Pinecone upsert done for {pdf_extractor.pdf_name}")
-
-                        self.aws.move_file(file_key, "input", "processed")
-                        print(f"{Fore.CYAN}Moved {file_key} to processed folder{Style.RESET_ALL}")
-                        self.logger.info(f"Moved {file_key} to processed folder")
-
-                    self.aws.delete_message(msg['ReceiptHandle'])
-                    if BASE_DIR.exists():
-                        shutil.rmtree(BASE_DIR)
-                        print(f"{Fore.YELLOW}Deleted local folder: {BASE_DIR}{Style.RESET_ALL}")
-                        self.logger.info(f"Deleted local folder: {BASE_DIR}")
-                    break
+                    summary = process_document(msg['Body'], str(self.download_dir), aws=self.aws,
+                                               shard_workers=self.shard_workers, spill_dir=self.spill_dir,
+                                               queue_lag=message_queue_lag(msg),
+                                               memory_budget_mb=self.memory_budget_mb)
+                    finished.append(self._complete(msg, summary))
+                except Exception as e:
+                    self._fail(msg, e)
+                    heartbeat.untrack(msg['ReceiptHandle'])
+            self._delete(finished, heartbeat)
 
+    def _run_pool(self, pool, heartbeat):
+        in_flight = {}  # future -> SQS message
+        while True:
+            free = self.workers - len(in_flight)
+            if free > 0:
+                # Long-poll only when idle; otherwise check quickly and go back to the jobs
+                messages = self.aws.receive_messages(max_messages=free, wait_time=None if not in_flight else 1)
+                for msg in messages:
+                    heartbeat.track(msg['ReceiptHandle'])
+                    future = pool.submit(process_document, msg['Body'], str(self.download_dir),
+                                         shard_workers=self.shard_workers, spill_dir=self.spill_dir,
+                                         queue_lag=message_queue_lag(msg),
+                                         memory_budget_mb=self.memory_budget_mb)
+                    in_flight[future] = msg
+                if messages:
+                    self.logger.info(f"Dispatched {len(messages)} messages, {len(in_flight)}/{self.workers} workers busy")
+                elif not in_flight:
+                    self._wait_for_messages()
+                    continue
+
+            busy = len(in_flight) >= self.workers
+            done, _ = wait(in_flight, timeout=None if busy else 0, return_when=FIRST_COMPLETED)
+            finished = []
+            for future in done:
+                msg = in_flight.pop(future)
+                try:
+                    finished.append(self._complete(msg, future.result()))
                 except Exception as e:
-                    print(f"{Fore.RED}Failed to process message: {msg.get('Body', '')}, Error: {e}{Style.RESET_ALL}")
-                    self.logger.error(f"Failed to process message: {msg.get('Body', '')}, Error: {e}", exc_info=True)
+                    self._fail(msg, e)
+                    heartbeat.untrack(msg['ReceiptHandle'])
+            self._delete(finished, heartbeat)
+
+    def _complete(self, msg, summary: dict):
+        """Records a finished message's timings and returns its receipt handle for deletion."""
+        if summary["status"] == "not_found":
+            self.logger.warning(f"Could not download {msg['Body']}, dropping message")
+        self._record_timings(summary)
+        self.logger.info(f"Finished message: {msg['Body']}")
+        return msg['ReceiptHandle']
+
+    def _record_timings(self, summary: dict):
+        record_document(summary)
+        self.logger.info(f"Timings for {summary['file_key']}: {summary['stages_sec']}, "
+                         f"{summary['pages']} pages, {summary['chunks']} chunks, "
+                         f"peak RSS {summary.get('peak_rss_mb')} MB",
+                         extra={"timings": summary})
+
+    def _delete(self, receipt_handles, heartbeat):
+        if not receipt_handles:
+            return
+        failed = self.aws.delete_messages(receipt_handles)
+        for handle in receipt_handles:
+            heartbeat.untrack(handle)
+        if failed:
+            self.logger.error(f"Could not delete {len(failed)} of {len(receipt_handles)} finished messages")
 
-            time.sleep(self.poll_interval)
+    def _fail(self, msg, error: Exception):
+        if getattr(error, "timings", None):
+            self._record_timings(error.timings)
+        print(f"{Fore.RED}Failed to process message: {msg.get('Body', '')}, Error: {error}{Style.RESET_ALL}")
+        self.logger.error(f"Failed to process message: {msg.get('Body', '')}, Error: {error}", exc_info=error)
 
 
 if __name__ == "__main__":
-    etl = ETLWorker(poll_interval=10, mongo_collection="etl_logs")
-    etl.process_sqs_messages()
+    workers = int(os.getenv("ETL_WORKERS", "1"))
+    etl = ETLWorker(poll_interval=10, mongo_collection="etl_logs", workers=workers,
+                    spill_dir=os.getenv("ETL_SPILL_DIR"), metrics_port=int(os.getenv("ETL_METRICS_PORT", "0")) or None,
+                    memory_budget_mb=int(os.getenv("ETL_MEMORY_BUDGET_MB", "0")) or None)
+    if os.getenv("ETL_MODE") == "staged":
+        etl.run_staged_pipeline()
+    else:
+        etl.process_sqs_messages()
@@ -0,0 +1,166 @@
+# manifest.py
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from pymongo import MongoClient, ReturnDocument
+from dotenv import load_dotenv
+
+# ---------------- Logging ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+# ---------------- Config ----------------
+MANIFEST_COLLECTION = "etl_manifests"
+# Single document whose "version" goes up whenever the indexed content changes;
+# the search API drops its cached answers when it sees a new version
+INDEX_VERSION_COLLECTION = "etl_index_version"
+# Fields that change on every run without the content changing
+VOLATILE_FIELDS = {"created_at", "ocr_processed_at", "source", "file_path", "image_bytes", "image_sha256"}
+
+
+class ChunkManifest:
+    """
+    Records what has been indexed for every document so re-uploads only pay for the diff.
+
+    One MongoDB document per PDF::
+
+        {"_id": doc_id, "doc_hash": ..., "updated_at": ...,
+         "chunks": [{"id": chunk _id, "namespace": ..., "hash": ...}, ...]}
+
+    Chunks are stored as a list because chunk ids may contain dots, which MongoDB
+    does not allow in field names.
+
+    Attributes:
+        collection: MongoDB collection holding the manifests.
+    """
+    def __init__(self, collection_name: str = MANIFEST_COLLECTION):
+        load_dotenv()
+        mongo_url = os.getenv("MONGO_URL")
+        if not mongo_url:
+            raise Exception("MONGO_URL is not set in the .env file")
+
+        self.client = MongoClient(mongo_url)
+        self.collection = self.client['tenderwin_db'][collection_name]
+        self.index_version = self.client['tenderwin_db'][INDEX_VERSION_COLLECTION]
+
+    @staticmethod
+    def document_hash(pdf_path: Path, pdf_bytes: bytes = None) -> str:
+        """SHA-256 of the PDF, from memory if given, otherwise read from disk in 1 MB blocks."""
+        if pdf_bytes is not None:
+            return hashlib.sha256(pdf_bytes).hexdigest()
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def chunk_hash(record: dict) -> str:
+        """
+        Content hash of one chunk record, ignoring run-specific fields.
+
+        Image records are hashed on their raw bytes, so an unchanged image is
+        recognised before it goes through OCR. Images a low-memory extractor has
+        already written out are read back from ``file_path`` for the same hash.
+        """
+        digest = hashlib.sha256()
+        if record.get("image_bytes"):
+            digest.update(record["image_bytes"])
+        elif record.get("image_sha256"):
+            with open(record["file_path"], "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        stable = {k: v for k, v in record.items() if k not in VOLATILE_FIELDS}
+        digest.update(json.dumps(stable, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, doc_id: str):
+        return self.collection.find_one({"_id": doc_id})
+
+    def save(self, doc_id: str, doc_hash: str, chunks: dict):
+        """
+        Stores the manifest of a document.
+
+        Args:
+            doc_id (str): Document id (PDF stem).
+            doc_hash (str): Hash of the PDF file.
+            chunks (dict): chunk _id -> {"namespace": ..., "hash": ...}.
+        """
+        self.collection.replace_one(
+            {"_id": doc_id},
+            {
+                "_id": doc_id,
+                "doc_hash": doc_hash,
+                "updated_at": datetime.now().isoformat(),
+                "chunks": [{"id": chunk_id, **info} for chunk_id, info in chunks.items()],
+            },
+            upsert=True,
+        )
+
+    def bump_index_version(self, doc_id: str) -> int:
+        """
+        Marks the vector index as changed by ``doc_id``.
+
+        Returns:
+            int: The new index version.
+        """
+        stamp = self.index_version.find_one_and_update(
+            {"_id": "index"},
+            {"$inc": {"version": 1}, "$set": {"doc_id": doc_id, "updated_at": datetime.now().isoformat()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return stamp["version"]
+
+    def close(self):
+        self.client.close()
+
+
+class ManifestDiff:
+    """
+    Tracks one ingestion run of a document against its previous manifest.
+
+    ``filter`` passes on only new or changed chunks while recording the hash of
+    every chunk seen; ``removed`` then lists chunk ids that disappeared or moved
+    to another namespace.
+    """
+    def __init__(self, previous: dict = None):
+        self.previous = {c["id"]: c for c in (previous or {}).get("chunks", [])}
+        self.current = {}
+        self.unchanged = 0
+
+    def filter(self, records, namespace_for):
+        for record in records:
+            namespace = namespace_for(record)
+            if namespace is None:
+                yield record
+                continue
+            chunk_hash = ChunkManifest.chunk_hash(record)
+            self.current[record["_id"]] = {"namespace": namespace, "hash": chunk_hash}
+            old = self.previous.get(record["_id"])
+            if old and old["hash"] == chunk_hash and old["namespace"] == namespace:
+                self.unchanged += 1
+                continue
+            yield record
+
+    def removed(self) -> dict:
+        """
+        namespace -> chunk ids indexed there last time but not produced there this
+        time, either gone or moved to another namespace (and upserted there by ``filter``).
+        """
+        removed = {}
+        for chunk_id, info in self.previous.items():
+            current = self.current.get(chunk_id)
+            if current is None or current["namespace"] != info["namespace"]:
+                removed.setdefault(info["namespace"], []).append(chunk_id)
+        return removed
+
+
+@lru_cache
+def get_manifest(collection_name: str = MANIFEST_COLLECTION) -> ChunkManifest:
+    """Process-wide manifest store."""
+    return ChunkManifest(collection_name)
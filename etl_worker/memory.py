@@ -0,0 +1,135 @@
+# memory.py
+import os
+import logging
+import resource
+import threading
+
+# ---------------- Logging ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+# ---------------- Config ----------------
+MB = 1024 * 1024
+SAMPLE_INTERVAL_SEC = 0.1
+SOFT_LIMIT = 0.75   # share of the budget above which concurrency is halved
+HARD_LIMIT = 0.9    # share of the budget above which work runs one task at a time
+
+try:
+    import psutil
+except ImportError:  # optional: without it child processes are not counted
+    psutil = None
+
+
+def current_rss(include_children: bool = True) -> int:
+    """
+    Resident set size of this process in bytes, plus its children's with psutil.
+
+    Falls back to /proc/self/statm, and on systems without it to the peak RSS
+    reported by ``getrusage``.
+    """
+    if psutil is not None:
+        try:
+            proc = psutil.Process()
+            rss = proc.memory_info().rss
+            if include_children:
+                for child in proc.children(recursive=True):
+                    try:
+                        rss += child.memory_info().rss
+                    except psutil.Error:
+                        pass
+            return rss
+        except psutil.Error:
+            pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryBudget:
+    """
+    RSS budget for one job, with peak-memory sampling.
+
+    Wrap a job in it (or ``start``/``stop``): a daemon thread samples the RSS every
+    ``interval`` seconds and keeps the peak. Producers ask ``limit(n)`` how many
+    tasks they may keep in flight; above ``SOFT_LIMIT`` of the budget it halves
+    ``n``, above ``HARD_LIMIT`` it allows one. Without a budget (``budget_bytes``
+    None or 0) ``limit`` is a no-op and only the peak is recorded.
+
+    Attributes:
+        budget_bytes (int): RSS ceiling, or None.
+        peak_bytes (int): Highest RSS seen while active.
+        throttled (int): Number of times ``limit`` returned less than asked.
+    """
+    def __init__(self, budget_bytes: int = None, interval: float = SAMPLE_INTERVAL_SEC):
+        self.budget_bytes = budget_bytes or None
+        self.interval = interval
+        self.start_bytes = 0
+        self.peak_bytes = 0
+        self.throttled = 0
+        self._last = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes is not None
+
+    def start(self):
+        """Starts the sampler thread; returns self."""
+        self.start_bytes = self._last = self.peak_bytes = current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.sample()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> int:
+        self._last = current_rss()
+        self.peak_bytes = max(self.peak_bytes, self._last)
+        return self._last
+
+    def pressure(self) -> float:
+        """Latest RSS as a share of the budget (0.0 without a budget)."""
+        return self._last / self.budget_bytes if self.enabled else 0.0
+
+    def limit(self, concurrency: int) -> int:
+        """
+        How many of ``concurrency`` tasks may be in flight at the current RSS.
+
+        Uses the sampler thread's latest reading, at most ``interval`` seconds
+        old, so per-record callers do not rescan the process tree; samples
+        directly only when the thread is not running.
+        """
+        if not self.enabled:
+            return concurrency
+        running = self._thread is not None and self._thread.is_alive()
+        pressure = (self._last if running else self.sample()) / self.budget_bytes
+        allowed = 1 if pressure >= HARD_LIMIT else max(1, concurrency // 2) if pressure >= SOFT_LIMIT else concurrency
+        if allowed < concurrency:
+            self.throttled += 1
+        return allowed
+
+    def stats(self) -> dict:
+        return {
+            "budget_mb": round(self.budget_bytes / MB, 1) if self.enabled else None,
+            "start_rss_mb": round(self.start_bytes / MB, 1),
+            "peak_rss_mb": round(self.peak_bytes / MB, 1),
+            "throttled": self.throttled,
+        }
@@ -0,0 +1,293 @@
+# metrics.py
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ---------------- Logging ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+# ---------------- Config ----------------
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+MEMORY_BUCKETS = tuple(mb * 1024 * 1024 for mb in (128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096, 8192))
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values = {}  # sorted label tuple -> value
+
+    @staticmethod
+    def _key(labels: dict) -> tuple:
+        return tuple(sorted(labels.items()))
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=DURATION_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {round(total, 6)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics store rendered in the Prometheus text format.
+
+    Metrics are created on first use and shared afterwards, so modules can ask
+    for ``registry.counter("etl_errors_total", ...)`` wherever they need it.
+    All metrics are thread-safe; pool processes report back through
+    ``DocumentTimings`` summaries instead of touching the registry.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets=DURATION_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class DocumentTimings:
+    """
+    Per-document stage timings, page and chunk counts, and peak memory.
+
+    Built inside the job (a pool process or inline); its plain-dict ``summary()``
+    goes back to the parent, which records it with ``record_document`` and
+    stores it with the ETL log. ``peak_rss_mb`` comes from the ``memory``
+    MemoryBudget when the job sets one.
+
+    Streaming stages are nested generators; ``wrap`` and ``stage`` take the name
+    of the stage feeding them (``inner``) and subtract its time, so every stage
+    reports only its own work.
+    """
+    def __init__(self, file_key: str, queue_lag: float = None):
+        self.file_key = file_key
+        self.queue_lag = queue_lag
+        self.started = time.time()
+        self.stages = {}
+        self.pages = 0
+        self.chunks = 0
+        self.status = "processed"
+        self.error_stage = None
+        self.memory = None      # MemoryBudget sampling the job's RSS, if any
+        self._inclusive = {}
+
+    def _record(self, name: str, elapsed: float, inner: str = None):
+        self._inclusive[name] = self._inclusive.get(name, 0.0) + elapsed
+        own = elapsed - (self._inclusive.get(inner, 0.0) if inner else 0.0)
+        self.stages[name] = self.stages.get(name, 0.0) + max(0.0, own)
+
+    @contextmanager
+    def stage(self, name: str, inner: str = None):
+        """Times a block; exceptions mark the document as failed in this stage."""
+        start = time.perf_counter()
+        try:
+            yield self
+        except Exception:
+            self.fail(name)
+            raise
+        finally:
+            self._record(name, time.perf_counter() - start, inner)
+
+    def wrap(self, records, name: str, inner: str = None):
+        """Pass-through generator timing how long ``records`` takes to produce its items."""
+        elapsed = 0.0
+        iterator = iter(records)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    record = next(iterator)
+                except StopIteration:
+                    elapsed += time.perf_counter() - start
+                    return
+                except Exception:
+                    self.fail(name)
+                    raise
+                elapsed += time.perf_counter() - start
+                yield record
+        finally:
+            self._record(name, elapsed, inner)
+
+    def fail(self, name: str):
+        """Marks the document as failed; the innermost stage that raised wins."""
+        if self.status != "failed":
+            self.status, self.error_stage = "failed", name
+
+    def summary(self) -> dict:
+        total = time.time() - self.started
+        extract = self.stages.get("extract", 0.0)
+        return {
+            "file_key": self.file_key,
+            "status": self.status,
+            "error_stage": self.error_stage,
+            "queue_lag_sec": None if self.queue_lag is None else round(self.queue_lag, 3),
+            "stages_sec": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "total_sec": round(total, 4),
+            "pages": self.pages,
+            "chunks": self.chunks,
+            "pages_per_sec": round(self.pages / extract, 2) if extract else None,
+            "chunks_per_sec": round(self.chunks / total, 2) if total else None,
+            "peak_rss_mb": None if self.memory is None else round(self.memory.peak_bytes / (1024 * 1024), 1),
+        }
+
+
+def message_queue_lag(msg: dict):
+    """Seconds since SQS received the message, from its ``SentTimestamp`` attribute."""
+    sent = msg.get("Attributes", {}).get("SentTimestamp")
+    return max(0.0, time.time() - int(sent) / 1000) if sent else None
+
+
+def record_document(summary: dict, registry: "MetricsRegistry" = None):
+    """Feeds one document summary into the process-wide metrics."""
+    registry = registry or get_metrics()
+    for name, seconds in summary["stages_sec"].items():
+        registry.histogram("etl_stage_duration_seconds", "Time spent per document in each ETL stage") \
+            .observe(seconds, stage=name)
+    registry.histogram("etl_document_duration_seconds", "End-to-end processing time per document") \
+        .observe(summary["total_sec"])
+    registry.counter("etl_documents_total", "Documents finished, by status").inc(status=summary["status"])
+    registry.counter("etl_pages_total", "PDF pages extracted").inc(summary["pages"])
+    registry.counter("etl_chunks_total", "Chunks upserted to the vector index").inc(summary["chunks"])
+    if summary["status"] == "processed" and summary["pages"]:
+        registry.gauge("etl_pages_per_second", "Extraction throughput of the last processed document") \
+            .set(summary["pages_per_sec"] or 0)
+        registry.gauge("etl_chunks_per_second", "End-to-end chunk throughput of the last processed document") \
+            .set(summary["chunks_per_sec"] or 0)
+    if summary.get("peak_rss_mb") is not None:
+        registry.histogram("etl_document_peak_rss_bytes", "Peak resident memory of the job processing a document",
+                           buckets=MEMORY_BUCKETS).observe(summary["peak_rss_mb"] * 1024 * 1024)
+    if summary["queue_lag_sec"] is not None:
+        observe_queue_lag("sqs", summary["queue_lag_sec"], registry)
+    if summary["status"] == "failed":
+        record_error(summary["error_stage"] or "unknown", registry)
+
+
+def observe_queue_lag(queue: str, seconds: float, registry: "MetricsRegistry" = None):
+    (registry or get_metrics()).histogram(
+        "etl_queue_lag_seconds", "Time a document waited in a queue before being picked up"
+    ).observe(seconds, queue=queue)
+
+
+def record_error(stage: str, registry: "MetricsRegistry" = None):
+    (registry or get_metrics()).counter("etl_errors_total", "Failed documents, by stage").inc(stage=stage)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the log
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0", registry: MetricsRegistry = None):
+    """
+    Serves ``registry`` at ``http://<host>:<port>/metrics`` from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call ``shutdown()`` to stop it.
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry or get_metrics()})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on {host}:{port}/metrics")
+    return server
+
+
+@lru_cache
+def get_metrics() -> MetricsRegistry:
+    """Process-wide metrics registry."""
+    return MetricsRegistry()
@@ -0,0 +1,128 @@
+# ocr_cache.py
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+# ---------------- Logging ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+# ---------------- Config ----------------
+CACHE_DIR = Path(os.getenv("OCR_CACHE_DIR", Path.home() / ".cache" / "flowautomate" / "ocr"))
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class OCRCache:
+    """
+    Persistent OCR result cache keyed by the SHA-256 of the image bytes.
+
+    Logos, letterheads and stamps repeat across pages and documents; with the
+    cache they cost one hash and one small file read instead of a tesseract run.
+
+    Storage layout: ``<cache_dir>/<key[:2]>/<key>.txt`` holding the raw OCR text.
+    Entries are evicted least-recently-used first once their total size exceeds
+    ``max_bytes``; recency survives restarts through the file modification time.
+    Several processes may share one directory: an entry evicted by another
+    process is simply reported as a miss.
+
+    Attributes:
+        cache_dir (Path): Root folder of the cache.
+        max_bytes (int): Size budget for all cached texts.
+        hits (int): Lookups served from the cache.
+        misses (int): Lookups that needed OCR.
+        evictions (int): Entries removed to stay within ``max_bytes``.
+    """
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._total_bytes = 0
+        self._load()
+        logger.info(f"OCR cache at {self.cache_dir}: {len(self._entries)} entries, {self._total_bytes} bytes")
+
+    @staticmethod
+    def key_for(image_bytes: bytes) -> str:
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.txt"
+
+    def _load(self):
+        files = []
+        for path in self.cache_dir.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def get(self, key: str):
+        """Returns the cached OCR text, or None on a miss."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                text = path.read_text(encoding="utf-8")
+                os.utime(path)
+            except FileNotFoundError:
+                self.misses += 1
+                if key in self._entries:
+                    self._total_bytes -= self._entries.pop(key)
+                return None
+            self.hits += 1
+            if key not in self._entries:
+                self._entries[key] = path.stat().st_size
+                self._total_bytes += self._entries[key]
+            self._entries.move_to_end(key)
+            return text
+
+    def put(self, key: str, text: str):
+        path = self._path(key)
+        data = text.encode("utf-8")
+        with self._lock:
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            self._total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+        }
+
+
+@lru_cache
+def get_ocr_cache(cache_dir: str = str(CACHE_DIR), max_bytes: int = CACHE_MAX_BYTES) -> OCRCache:
+    """Process-wide cache instance per directory."""
+    return OCRCache(Path(cache_dir), max_bytes)
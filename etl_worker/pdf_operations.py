@@ -1,12 +1,18 @@
 # pdf_etl.py
+import csv
+import io
 import json
+import hashlib
 import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from PyPDF2 import PdfReader
 import fitz  # PyMuPDF
-import camelot
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from chunker import StreamingChunker
+# PyPDF2 and camelot are only used by the legacy extract_* methods and are
+# imported there; camelot alone pulls in OpenCV and pandas.
 
 # ---------------- Logging ----------------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -18,49 +24,87 @@ PARA_DIR = BASE_DIR / "paragraphs"
 TABLE_DIR = BASE_DIR / "tables"
 IMAGE_DIR = BASE_DIR / "images"
 
+# Sharded extraction: documents longer than one shard are split into page
+# ranges of this size and parsed in parallel (see PDFExtractor.iter_pages_sharded).
+SHARD_PAGES = 25
 
+# Legacy Camelot extraction handles table candidates this many pages at a time
+# instead of holding the results for the whole document.
+TABLE_WINDOW_PAGES = 10
 
-MAX_PAGES = 30  # for testing  ...avoid larger  pages for  local now 
+# Table detection pre-pass: only pages that pass it are handed to Camelot / find_tables
+MIN_RULING_LINES = 4      # vector lines/rects on a page that suggest a ruled (lattice) table
+MIN_TABULAR_ROWS = 3      # text rows with aligned, gap-separated cells that suggest a stream table
+CELL_GAP = 12.0           # pt of horizontal whitespace that separates two cells
+COLUMN_TOLERANCE = 4.0    # pt within which cell starts count as the same column
 
-# ---------------- LangChain Splitter ----------------
-splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,
-    chunk_overlap=50,
-    separators=["\n\n", "\n", " ", ""]
-)
+# ---------------- Text Splitter ----------------
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+splitter = StreamingChunker(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
 
 class PDFExtractor:
     """
     Handles extraction of structured content from PDF files.
 
     Supports:
-        - Paragraph extraction using PyPDF2 and LangChain text splitter
+        - Paragraph extraction using PyPDF2 and the StreamingChunker
         - Table extraction using Camelot
         - Image extraction using PyMuPDF (fitz)
+        - Single-pass extraction of all three from one PyMuPDF handle (``extract_all``)
     
-    Extracted content is stored in JSON files in dedicated directories.
+    Extracted content is stored in JSON files in dedicated directories under
+    ``output_dir`` (defaults to the shared ``parsed_pdf/`` folder). Concurrent
+    jobs must each pass their own ``output_dir``.
+
+    When ``pdf_bytes`` is given the PyMuPDF paths parse the document from memory
+    and ``pdf_path`` only names it; the PyPDF2/Camelot methods still need the file.
+    ``source_path`` likewise parses another file (e.g. a copy) under the name of
+    ``pdf_path``.
+
+    With ``low_memory`` the single-pass engine writes each image to ``images/`` as
+    soon as it is extracted (records carry ``image_sha256`` instead of
+    ``image_bytes``) and empties PyMuPDF's object cache after every page.
     """
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, output_dir: Path = BASE_DIR, pdf_bytes: bytes = None,
+                 low_memory: bool = False, source_path: str = None):
         self.pdf_path = Path(pdf_path)
+        self.source_path = Path(source_path) if source_path else self.pdf_path
+        self.pdf_bytes = pdf_bytes
+        self.low_memory = low_memory
         self.pdf_name = self.pdf_path.stem
+        self.output_dir = Path(output_dir)
+        self.para_dir = self.output_dir / "paragraphs"
+        self.table_dir = self.output_dir / "tables"
+        self.image_dir = self.output_dir / "images"
         logger.info(f"Initialized PDFExtractor for '{self.pdf_name}'")
-        for d in [PARA_DIR, TABLE_DIR, IMAGE_DIR]:
+
+    def _ensure_dirs(self):
+        """Creates the output folders; only the methods that write to disk need them."""
+        for d in [self.para_dir, self.table_dir, self.image_dir]:
             d.mkdir(exist_ok=True, parents=True)
 
+    def _open(self):
+        """Opens the PDF with PyMuPDF, from memory when the bytes are available."""
+        if self.pdf_bytes is not None:
+            return fitz.open(stream=self.pdf_bytes, filetype="pdf")
+        return fitz.open(self.source_path)
+
     def extract_paragraphs(self):
 
         """
         Extracts paragraphs from the PDF and saves them as JSON files.
 
-        Uses LangChain RecursiveCharacterTextSplitter to split text into chunks.
+        Uses the StreamingChunker to split each page's text into chunks.
         Each chunk is stored with metadata including page number, chunk type, and timestamp.
         """
         try:
-            reader = PdfReader(str(self.pdf_path))
+            self._ensure_dirs()
+            from PyPDF2 import PdfReader
+
+            reader = PdfReader(str(self.source_path))
             logger.info("Extracting paragraphs...")
             for i, page in enumerate(reader.pages, start=1):
-                if i > MAX_PAGES:
-                    break
                 text = page.extract_text()
                 if not text:
                     continue
@@ -80,41 +124,90 @@ class PDFExtractor:
                     paragraphs.append(record)
 
                 filename = f"{self.pdf_name}_page{i}_paragraphs.json"
-                with open(PARA_DIR / filename, "w", encoding="utf-8") as f:
+                with open(self.para_dir / filename, "w", encoding="utf-8") as f:
                     json.dump(paragraphs, f, indent=2)
             logger.info("Paragraphs extraction done.")
         except Exception as e:
             logger.error(f"Failed to extract paragraphs: {e}", exc_info=True)
 
+    def detect_table_pages(self) -> dict:
+        """
+        Cheap pre-pass that finds pages likely to contain tables.
+
+        Pages with ruling lines are marked ``lattice``; pages without them but with
+        several rows of column-aligned text are marked ``stream``. Everything else
+        is skipped by ``extract_tables``.
+
+        Returns:
+            dict: page_number (1-based) -> Camelot flavor.
+        """
+        candidates = {}
+        with self._open() as doc:
+            for page in doc:
+                if count_ruling_lines(page) >= MIN_RULING_LINES:
+                    candidates[page.number + 1] = "lattice"
+                elif looks_tabular(page):
+                    candidates[page.number + 1] = "stream"
+        return candidates
+
     def extract_tables(self):
+        """
+        Extracts tables with Camelot and saves them as JSON files.
+
+        Camelot only runs on the pages selected by ``detect_table_pages``, with the
+        flavor picked there, so text-only documents cost a quick scan instead of
+        a full stream-mode analysis of every page. Candidates are read in windows
+        of ``TABLE_WINDOW_PAGES`` pages, each written out before the next is read.
+        """
         try:
+            self._ensure_dirs()
             logger.info("Extracting tables...")
-            tables = camelot.read_pdf(str(self.pdf_path), pages=f'1-{MAX_PAGES}', flavor='stream')
-            for i, table in enumerate(tables, start=1):
-                table_csv = table.df.to_csv(index=False)
-                chunks = splitter.split_text(table_csv)
-                table_chunks = []
-                for j, chunk in enumerate(chunks, start=1):
-                    record = {
-                        "_id": f"{self.pdf_name}#page{table.page}#table{i}#chunk{j}",
-                        "chunk_text": chunk,
-                        "doc_id": self.pdf_name,
-                        "page_number": table.page,
-                        "chunk_type": "table",
-                        "chunk_number": j,
-                        "table_index": i,
-                        "source": str(self.pdf_path),
-                        "created_at": datetime.now().isoformat()
-                    }
-                    table_chunks.append(record)
+            candidates = self.detect_table_pages()
+            if not candidates:
+                logger.info("No table candidates found, skipping Camelot.")
+                return
+            import camelot
 
-                filename = f"{self.pdf_name}_page{table.page}_table{i}.json"
-                with open(TABLE_DIR / filename, "w", encoding="utf-8") as f:
-                    json.dump(table_chunks, f, indent=2)
+            candidate_pages = sorted(candidates)
+            table_count = 0
+            for offset in range(0, len(candidate_pages), TABLE_WINDOW_PAGES):
+                window = candidate_pages[offset:offset + TABLE_WINDOW_PAGES]
+                tables = []
+                for flavor in ("lattice", "stream"):
+                    pages = [str(p) for p in window if candidates[p] == flavor]
+                    if pages:
+                        tables.extend(camelot.read_pdf(str(self.source_path), pages=",".join(pages), flavor=flavor))
+                tables.sort(key=lambda t: int(t.page))
+                for i, table in enumerate(tables, start=table_count + 1):
+                    self._save_table(table, i)
+                table_count += len(tables)
             logger.info("Tables extraction done.")
         except Exception as e:
             logger.warning(f"No tables extracted: {e}", exc_info=True)
 
+    def _save_table(self, table, i: int):
+        """Chunks one Camelot table and writes its JSON file."""
+        table_csv = table.df.to_csv(index=False)
+        chunks = splitter.split_text(table_csv)
+        table_chunks = []
+        for j, chunk in enumerate(chunks, start=1):
+            record = {
+                "_id": f"{self.pdf_name}#page{table.page}#table{i}#chunk{j}",
+                "chunk_text": chunk,
+                "doc_id": self.pdf_name,
+                "page_number": table.page,
+                "chunk_type": "table",
+                "chunk_number": j,
+                "table_index": i,
+                "source": str(self.pdf_path),
+                "created_at": datetime.now().isoformat()
+            }
+            table_chunks.append(record)
+
+        filename = f"{self.pdf_name}_page{table.page}_table{i}.json"
+        with open(self.table_dir / filename, "w", encoding="utf-8") as f:
+            json.dump(table_chunks, f, indent=2)
+
     def extract_images(self):
         """
         Extracts images from the PDF and saves them as PNG files and JSON metadata.
@@ -125,41 +218,347 @@ class PDFExtractor:
         
 
         try:
+            self._ensure_dirs()
             logger.info("Extracting images...")
-            doc = fitz.open(self.pdf_path)
-            for page_num in range(min(len(doc), MAX_PAGES)):
-                page = doc[page_num]
-                for img_index, img in enumerate(page.get_images(full=True)):
-                    xref = img[0]
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    img_path = IMAGE_DIR / f"{self.pdf_name}_page{page_num+1}_img{img_index+1}.png"
-                    with open(img_path, "wb") as f:
-                        f.write(image_bytes)
-
-                    # JSON metadata for the image (OCR will populate chunk_text later)
-                    record = {
-                        "_id": f"{self.pdf_name}#page{page_num+1}#img{img_index+1}",
-                        "chunk_text": "",
-                        "doc_id": self.pdf_name,
-                        "page_number": page_num+1,
-                        "chunk_type": "image",
-                        "image_index": img_index+1,
-                        "file_path": str(img_path),
-                        "source": str(self.pdf_path),
-                        "created_at": datetime.now().isoformat()
-                    }
+            with self._open() as doc:
+                for page_num in range(len(doc)):
+                    page = doc[page_num]
+                    for img_index, img in enumerate(page.get_images(full=True)):
+                        xref = img[0]
+                        base_image = doc.extract_image(xref)
+                        image_bytes = base_image["image"]
+                        img_path = self.image_dir / f"{self.pdf_name}_page{page_num+1}_img{img_index+1}.png"
+                        with open(img_path, "wb") as f:
+                            f.write(image_bytes)
+
+                        # JSON metadata for the image (OCR will populate chunk_text later)
+                        record = {
+                            "_id": f"{self.pdf_name}#page{page_num+1}#img{img_index+1}",
+                            "chunk_text": "",
+                            "doc_id": self.pdf_name,
+                            "page_number": page_num+1,
+                            "chunk_type": "image",
+                            "image_index": img_index+1,
+                            "file_path": str(img_path),
+                            "source": str(self.pdf_path),
+                            "created_at": datetime.now().isoformat()
+                        }
 
-                    json_file = IMAGE_DIR / f"{self.pdf_name}_page{page_num+1}_img{img_index+1}.json"
-                    with open(json_file, "w", encoding="utf-8") as jf:
-                        json.dump(record, jf, indent=2)
+                        json_file = self.image_dir / f"{self.pdf_name}_page{page_num+1}_img{img_index+1}.json"
+                        with open(json_file, "w", encoding="utf-8") as jf:
+                            json.dump(record, jf, indent=2)
+                    if self.low_memory:
+                        fitz.TOOLS.store_shrink(100)
             logger.info("Images extraction done.")
         except Exception as e:
             logger.error(f"Failed to extract images: {e}", exc_info=True)
 
+    # ---------------- Single-pass engine ----------------
+    def iter_pages(self, start: int = 0, end: int = None):
+        """
+        Streams the PDF page by page from a single PyMuPDF document handle.
+
+        Each yielded dict holds every record found on one page:
+            - ``page_number`` (int): 1-based page number.
+            - ``text`` (str): Raw page text, chunked into paragraph records by
+              ``iter_records`` so paragraphs can run across pages.
+            - ``tables`` (list): One list of chunk records per table candidate
+              found by PyMuPDF ``find_tables``.
+            - ``images`` (list): Image records; each carries the raw bytes under
+              ``image_bytes`` (not JSON serializable, strip before saving), or
+              with ``low_memory`` is already on disk at ``file_path``.
+
+        Table indexes restart on every page so record ``_id``s only depend on the
+        page itself, which keeps them stable when pages are parsed in shards.
+
+        Args:
+            start (int): 0-based index of the first page.
+            end (int, optional): 0-based index one past the last page.
+        """
+        with self._open() as doc:
+            last = len(doc) if end is None else min(len(doc), end)
+            for page_index in range(start, last):
+                page = doc[page_index]
+                page_number = page_index + 1
+                tables = [
+                    self._table_records(rows, page_number, table_index)
+                    for table_index, rows in enumerate(self._find_table_rows(page), start=1)
+                ]
+                parsed = {
+                    "page_number": page_number,
+                    "text": page.get_text(),
+                    "tables": tables,
+                    "images": self._image_records(doc, page, page_number),
+                }
+                if self.low_memory:
+                    fitz.TOOLS.store_shrink(100)
+                yield parsed
+
+    def page_count(self) -> int:
+        with self._open() as doc:
+            return len(doc)
+
+    def iter_pages_sharded(self, workers: int = 1, shard_pages: int = SHARD_PAGES, budget=None):
+        """
+        Same output as ``iter_pages`` for the whole document, parsed in parallel.
+
+        The document is split into ranges of ``shard_pages`` pages which are
+        extracted across a process pool of ``workers`` processes; pages are yielded
+        back in page order. Small documents and ``workers <= 1`` fall back to a
+        plain single-process ``iter_pages``.
+
+        At most ``2 * workers`` shards are submitted but not yet consumed, so a
+        slow consumer does not pile up parsed pages. With a ``MemoryBudget`` that
+        window shrinks as the job's RSS nears the budget.
+
+        Shards open the PDF by path. A document held only in memory is written
+        once to ``output_dir`` for them instead of being pickled into every task.
+        """
+        page_count = self.page_count()
+        if workers <= 1 or page_count <= shard_pages:
+            yield from self.iter_pages()
+            return
+
+        source, spilled = self.source_path, None
+        if self.pdf_bytes is not None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            source = spilled = self.output_dir / f".{self.pdf_name}.shard-source.pdf"
+            source.write_bytes(self.pdf_bytes)
+
+        ranges = iter([(start, min(start + shard_pages, page_count)) for start in range(0, page_count, shard_pages)])
+        logger.info(f"Extracting {page_count} pages in shards of {shard_pages} across {workers} processes")
+        try:
+            # spawn, like the job pools in main.py: this process runs threads and holds a MongoClient
+            with ProcessPoolExecutor(max_workers=min(workers, -(-page_count // shard_pages)),
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                pending = deque()
+                while True:
+                    window = 2 * workers if budget is None else budget.limit(2 * workers)
+                    while len(pending) < window:
+                        shard = next(ranges, None)
+                        if shard is None:
+                            break
+                        pending.append(pool.submit(_extract_shard, str(self.pdf_path), str(self.output_dir),
+                                                   *shard, str(source), self.low_memory))
+                    if not pending:
+                        break
+                    yield from pending.popleft().result()
+        finally:
+            if spilled is not None:
+                spilled.unlink(missing_ok=True)
+
+    def iter_records(self, workers: int = 1, chunker: StreamingChunker = None, budget=None):
+        """
+        Streams paragraph, table and image records for the whole document.
+
+        Page text goes through one StreamingChunker in page order, so paragraph
+        chunks can span pages (``page_number`` is where they start, ``page_end``
+        where they stop); chunk numbers count per start page. ``budget`` is passed
+        on to ``iter_pages_sharded``.
+        """
+        chunker = chunker or StreamingChunker(CHUNK_SIZE, CHUNK_OVERLAP)
+        chunk_numbers = {}
+
+        def paragraphs(chunks):
+            for chunk in chunks:
+                if not chunk["text"]:
+                    continue
+                number = chunk_numbers[chunk["page_start"]] = chunk_numbers.get(chunk["page_start"], 0) + 1
+                yield self._paragraph_record(chunk, number)
+
+        for page in self.iter_pages_sharded(workers, budget=budget):
+            yield from paragraphs(chunker.feed(page["text"], page["page_number"]))
+            for table in page["tables"]:
+                yield from table
+            yield from page["images"]
+        yield from paragraphs(chunker.flush())
+
+    def extract_all(self, workers: int = 1):
+        """
+        Extracts paragraphs, tables and images in one pass over the PDF.
+
+        Writes the same JSON/PNG layout as ``extract_paragraphs``, ``extract_tables``
+        and ``extract_images`` combined, but opens and parses the document only once.
+        Paragraph files are keyed by the page a chunk starts on.
+
+        Args:
+            workers (int): Processes used for page-range sharding of long documents.
+        """
+        try:
+            self._ensure_dirs()
+            logger.info("Extracting paragraphs, tables and images (single pass)...")
+            paragraphs, tables = {}, {}
+            for record in self.iter_records(workers):
+                if record["chunk_type"] == "paragraph":
+                    paragraphs.setdefault(record["page_number"], []).append(record)
+                elif record["chunk_type"] == "table":
+                    tables.setdefault((record["page_number"], record["table_index"]), []).append(record)
+                elif "image_bytes" in record:
+                    self._save_image(record)
+                else:
+                    self._save_image_metadata(record)
+
+            for page_number, records in paragraphs.items():
+                filename = f"{self.pdf_name}_page{page_number}_paragraphs.json"
+                with open(self.para_dir / filename, "w", encoding="utf-8") as f:
+                    json.dump(records, f, indent=2)
+            for (page_number, table_index), records in tables.items():
+                filename = f"{self.pdf_name}_page{page_number}_table{table_index}.json"
+                with open(self.table_dir / filename, "w", encoding="utf-8") as f:
+                    json.dump(records, f, indent=2)
+            logger.info("Single-pass extraction done.")
+        except Exception as e:
+            logger.error(f"Failed to extract PDF content: {e}", exc_info=True)
+
+    def _paragraph_record(self, chunk: dict, chunk_number: int):
+        """Record for a chunk from the StreamingChunker; ``page_end`` differs when it spans pages."""
+        return {
+            "_id": f"{self.pdf_name}#page{chunk['page_start']}#para{chunk_number}",
+            "chunk_text": chunk["text"],
+            "doc_id": self.pdf_name,
+            "page_number": chunk["page_start"],
+            "page_end": chunk["page_end"],
+            "chunk_type": "paragraph",
+            "chunk_number": chunk_number,
+            "source": str(self.pdf_path),
+            "created_at": datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _find_table_rows(page):
+        """
+        Returns the cell rows of every table PyMuPDF detects on the page.
+
+        ``find_tables`` is only run on pages that pass the cheap ruling-line /
+        aligned-text pre-check; borderless candidates use its text strategy.
+        """
+        if not hasattr(page, "find_tables"):  # PyMuPDF < 1.23
+            return []
+        try:
+            if count_ruling_lines(page) >= MIN_RULING_LINES:
+                found = page.find_tables()
+            elif looks_tabular(page):
+                found = page.find_tables(strategy="text")
+            else:
+                return []
+            return [table.extract() for table in found.tables]
+        except Exception as e:
+            logger.warning(f"Table detection failed on page {page.number + 1}: {e}")
+            return []
+
+    def _table_records(self, rows, page_number: int, table_index: int):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows([["" if cell is None else cell for cell in row] for row in rows])
+        return [
+            {
+                "_id": f"{self.pdf_name}#page{page_number}#table{table_index}#chunk{j}",
+                "chunk_text": chunk,
+                "doc_id": self.pdf_name,
+                "page_number": page_number,
+                "chunk_type": "table",
+                "chunk_number": j,
+                "table_index": table_index,
+                "source": str(self.pdf_path),
+                "created_at": datetime.now().isoformat()
+            }
+            for j, chunk in enumerate(splitter.split_text(buffer.getvalue()), start=1)
+        ]
+
+    def _image_records(self, doc, page, page_number: int):
+        records = []
+        for img_index, img in enumerate(page.get_images(full=True), start=1):
+            base_image = doc.extract_image(img[0])
+            if not base_image:
+                continue
+            img_path = self.image_dir / f"{self.pdf_name}_page{page_number}_img{img_index}.png"
+            record = {
+                "_id": f"{self.pdf_name}#page{page_number}#img{img_index}",
+                "chunk_text": "",
+                "doc_id": self.pdf_name,
+                "page_number": page_number,
+                "chunk_type": "image",
+                "image_index": img_index,
+                "file_path": str(img_path),
+                "source": str(self.pdf_path),
+                "created_at": datetime.now().isoformat(),
+            }
+            if self.low_memory:
+                # Streamed to disk right away; the hash stands in for the bytes
+                self.image_dir.mkdir(exist_ok=True, parents=True)
+                with open(img_path, "wb") as f:
+                    f.write(base_image["image"])
+                record["image_sha256"] = hashlib.sha256(base_image["image"]).hexdigest()
+            else:
+                record["image_bytes"] = base_image["image"]
+            records.append(record)
+        return records
+
+    @staticmethod
+    def _save_image(record: dict):
+        """Writes an image record's PNG and its JSON metadata."""
+        record = dict(record)
+        img_path = Path(record["file_path"])
+        with open(img_path, "wb") as f:
+            f.write(record.pop("image_bytes"))
+        PDFExtractor._save_image_metadata(record)
+
+    @staticmethod
+    def _save_image_metadata(record: dict):
+        """Writes the JSON metadata next to an image that is already on disk."""
+        with open(Path(record["file_path"]).with_suffix(".json"), "w", encoding="utf-8") as jf:
+            json.dump(record, jf, indent=2)
+
+def count_ruling_lines(page) -> int:
+    """Number of straight vector lines and rectangles drawn on the page."""
+    return sum(
+        1
+        for drawing in page.get_drawings()
+        for item in drawing["items"]
+        if item[0] in ("l", "re")
+    )
+
+
+def looks_tabular(page) -> bool:
+    """
+    Whitespace heuristic for borderless tables.
+
+    Words are grouped into rows by baseline; a row is split into cells wherever
+    the gap between two words exceeds ``CELL_GAP``. The page looks tabular when at
+    least ``MIN_TABULAR_ROWS`` rows have 3+ cells and share at least two column
+    starts.
+    """
+    rows = {}
+    for x0, _, x1, y1, *_ in page.get_text("words"):
+        rows.setdefault(round(y1), []).append((x0, x1))
+
+    column_starts = []
+    for words in rows.values():
+        words.sort()
+        starts = [words[0][0]]
+        for (_, prev_x1), (x0, _) in zip(words, words[1:]):
+            if x0 - prev_x1 > CELL_GAP:
+                starts.append(x0)
+        if len(starts) >= 3:
+            column_starts.append(starts)
+    if len(column_starts) < MIN_TABULAR_ROWS:
+        return False
+
+    # Columns shared by the multi-cell rows
+    reference = column_starts[0]
+    aligned_rows = sum(
+        1 for starts in column_starts
+        if sum(any(abs(a - b) <= COLUMN_TOLERANCE for b in starts) for a in reference) >= 2
+    )
+    return aligned_rows >= MIN_TABULAR_ROWS
+
+
+def _extract_shard(pdf_path: str, output_dir: str, start: int, end: int, source_path: str = None,
+                   low_memory: bool = False):
+    """Process-pool entry point: parses pages ``[start, end)`` of one PDF, read from ``source_path``."""
+    extractor = PDFExtractor(pdf_path, output_dir, low_memory=low_memory, source_path=source_path)
+    return list(extractor.iter_pages(start, end))
+
 # ---------------- Exported Function ----------------
-def process_pdf(pdf_path: str):
-    extractor = PDFExtractor(pdf_path)
-    extractor.extract_paragraphs()
-    extractor.extract_tables()
-    extractor.extract_images()
+def process_pdf(pdf_path: str, output_dir: Path = BASE_DIR, workers: int = 1, low_memory: bool = False):
+    extractor = PDFExtractor(pdf_path, output_dir, low_memory=low_memory)
+    extractor.extract_all(workers)
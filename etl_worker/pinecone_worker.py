@@ -1,9 +1,12 @@
 # pinecone_worker.py
-import os
 import json
+import time
+import random
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from pinecone import Pinecone
+from vector_store import VectorStore, create_vector_store
 
 # ---------------- Logging ----------------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -14,48 +17,42 @@ PARA_DIR = Path("parsed_pdf/paragraphs")
 TABLE_DIR = Path("parsed_pdf/tables")
 IMAGE_DIR = Path("parsed_pdf/images")
 
+# Namespace per record chunk_type
+NAMESPACES = {
+    "paragraph": "pdf-paragraphs",
+    "table": "pdf-tables",
+    "image": "pdf-images",
+}
+# Bulk upsert limits
+UPSERT_BATCH_SIZE = 96                 # max records per upsert_records call with integrated embedding
+UPSERT_BATCH_BYTES = 2 * 1024 * 1024   # max request payload
+UPSERT_WORKERS = 4                     # concurrent upsert requests
+UPSERT_MAX_RETRIES = 3
+UPSERT_BACKOFF_SEC = 0.5               # first retry delay, doubled on each attempt
+
 class PineconeWorker:
 
 
     """
-    Handles interaction with Pinecone for upserting and managing embeddings.
+    Handles upserting and managing chunk records in the vector store.
 
     Responsibilities:
-        - Create/connect to a Pinecone index.
+        - Connect to the configured VectorStore (Pinecone by default, or the
+          embedded LocalStore with ``VECTOR_STORE=local``; see vector_store.py).
         - Upsert JSON content from folders into namespaces.
+        - Bulk upsert records in size-limited, concurrent, retried batches.
+        - Delete records that are no longer part of a document.
         - Describe index statistics.
-        - Delete the Pinecone index if needed.
+        - Delete the index if needed.
 
     Attributes:
         index_name (str): Name of the Pinecone index.
-        pc (Pinecone): Pinecone client instance.
-        index: Connected Pinecone index object.
+        store (VectorStore): Backend receiving the records.
     """
-    def __init__(self, index_name: str = "automateflow"):
+    def __init__(self, index_name: str = "automateflow", store: VectorStore = None):
         self.index_name = index_name
-        api_key = os.getenv("PINECONE_API_KEY")
-        if not api_key:
-            raise ValueError("PINECONE_API_KEY environment variable not set")
-
-        # Initialize Pinecone client
-        self.pc = Pinecone(api_key=api_key)
-
-        # Delete index (optional)
-        # self.pc.delete_index(self.index_name)
-
-        # Create index if it doesn't exist
-        if not self.pc.has_index(self.index_name):
-            logger.info(f"Creating Pinecone index '{self.index_name}'...")
-            self.pc.create_index_for_model(
-                name=self.index_name,
-                cloud="aws",
-                region="us-east-1",
-                embed={"model": "llama-text-embed-v2", "field_map": {"text": "chunk_text"}}
-            )
-
-        # Connect to the index
-        self.index = self.pc.Index(self.index_name)
-        logger.info(f"Connected to Pinecone index '{self.index_name}'")
+        self.store = store or create_vector_store(index_name=index_name)
+        logger.info(f"Vector store: {type(self.store).__name__}")
 
     def upsert_json_folder(self, folder_path: Path, namespace: str):
         """Upserts JSON files from a folder into a Pinecone namespace."""
@@ -76,38 +73,157 @@ class PineconeWorker:
         try:
             files = list(folder_path.glob("*.json"))
             logger.info(f"Pushing {len(files)} files from '{folder_path}' into namespace '{namespace}'...")
+            results = self.upsert_bulk((namespace, entry) for entry in self._iter_json_files(files))
+            failed = [r for r in results if not r["ok"]]
+            if failed:
+                logger.error(f"{len(failed)}/{len(results)} batches failed for namespace '{namespace}'")
+            else:
+                logger.info(f"Namespace '{namespace}' updated successfully!")
+            return results
+
+        except Exception as e:
+            logger.error(f"Failed to upsert files from {folder_path} into namespace '{namespace}': {e}", exc_info=True)
+            return []
+
+    @staticmethod
+    def _iter_json_files(files):
+        """Yields every chunk entry of the given JSON files (dict or list of dicts)."""
+        for file in files:
+            with open(file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                data = [data]
+            yield from data
+
+    @staticmethod
+    def _to_record(entry: dict):
+        """Builds the upsert payload for one chunk, or None if it has no text to embed."""
+        text = entry.get("chunk_text", "")
+        if not text and entry.get("chunk_type") != "image":
+            return None
 
-            for file in files:
-                with open(file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+        record = {"_id": entry["_id"], "chunk_text": text}
+        # Merge in metadata (raw image bytes never leave the worker)
+        metadata = {k: v for k, v in entry.items() if k not in ["_id", "chunk_text", "image_bytes", "image_sha256"]}
+        record.update(metadata)
+        return record
 
-                if isinstance(data, dict):
-                    data = [data]
+    def upsert_bulk(self, entries, max_records: int = UPSERT_BATCH_SIZE, max_bytes: int = UPSERT_BATCH_BYTES,
+                    max_workers: int = UPSERT_WORKERS, max_retries: int = UPSERT_MAX_RETRIES):
+        """
+        Bulk upsert engine.
+
+        Packs ``(namespace, entry)`` pairs from any number of files or documents into
+        per-namespace batches limited to ``max_records`` records and ``max_bytes`` of
+        JSON payload, and sends them over a pool of ``max_workers`` threads. At most
+        twice that many batches are in flight, so memory stays bounded on long streams.
+        Each batch is retried with exponential backoff; one failing batch never stops
+        the others.
+
+        Returns:
+            list[dict]: One result per batch, in submission order, with ``namespace``,
+            ``records``, ``attempts``, ``ok`` and ``error``.
+        """
+        slots = threading.BoundedSemaphore(max_workers * 2)
+        buffers = {}
+        futures = []
+
+        def release(_):
+            slots.release()
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upsert") as pool:
+            def submit(namespace):
+                batch, _ = buffers.pop(namespace)
+                slots.acquire()
+                future = pool.submit(self._upsert_batch, namespace, batch, max_retries)
+                future.add_done_callback(release)
+                futures.append(future)
+
+            for namespace, entry in entries:
+                record = self._to_record(entry)
+                if not record:
+                    continue
+                size = len(json.dumps(record, default=str))
+                batch, batch_bytes = buffers.get(namespace, ([], 0))
+                if batch and (len(batch) >= max_records or batch_bytes + size > max_bytes):
+                    submit(namespace)
+                    batch, batch_bytes = [], 0
+                batch.append(record)
+                buffers[namespace] = (batch, batch_bytes + size)
+
+            for namespace in list(buffers):
+                submit(namespace)
+
+        results = [f.result() for f in futures]
+        logger.info(f"Bulk upsert: {sum(r['ok'] for r in results)}/{len(results)} batches succeeded")
+        return results
+
+    def _upsert_batch(self, namespace: str, batch: list, max_retries: int) -> dict:
+        """Sends one batch, retrying with exponential backoff and jitter."""
+        for attempt in range(1, max_retries + 2):
+            try:
+                self.store.upsert(namespace, batch)
+                return {"namespace": namespace, "records": len(batch), "attempts": attempt, "ok": True, "error": None}
+            except Exception as e:
+                if attempt > max_retries:
+                    logger.error(f"Upsert of {len(batch)} records into '{namespace}' failed after {attempt} attempts: {e}")
+                    return {"namespace": namespace, "records": len(batch), "attempts": attempt, "ok": False, "error": str(e)}
+                delay = UPSERT_BACKOFF_SEC * 2 ** (attempt - 1)
+                logger.warning(f"Upsert into '{namespace}' failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay + random.uniform(0, delay / 2))
+
+    def upsert_stream(self, records):
+        """
+        Upserts an iterable of chunk records straight from memory.
 
-                records = []
-                for entry in data:
-                    text = entry.get("chunk_text", "")
-                    if not text and entry.get("chunk_type") != "image":
-                        continue
+        Records are routed to a namespace by ``chunk_type`` (see ``NAMESPACES``)
+        and sent through ``upsert_bulk`` as they arrive.
 
-                    record = {"_id": entry["_id"], "chunk_text": text}
-                    # Merge in metadata
-                    metadata = {k: v for k, v in entry.items() if k not in ["_id", "chunk_text"]}
-                    record.update(metadata)
-                    records.append(record)
+        Returns:
+            dict: Number of records upserted per namespace.
 
-                if records:
-                    self.index.upsert_records(namespace, records)
+        Raises:
+            RuntimeError: If any batch still failed after its retries.
+        """
+        results = self.upsert_bulk(
+            (NAMESPACES[entry["chunk_type"]], entry)
+            for entry in records if entry.get("chunk_type") in NAMESPACES
+        )
+        counts = {}
+        for r in results:
+            if r["ok"]:
+                counts[r["namespace"]] = counts.get(r["namespace"], 0) + r["records"]
+        failed = [r for r in results if not r["ok"]]
+        if failed:
+            raise RuntimeError(f"{len(failed)}/{len(results)} upsert batches failed: {failed[0]['error']}")
+        self.store.flush()
+        logger.info(f"Streamed upsert done: {counts}")
+        return counts
+
+    def delete_records(self, ids_by_namespace: dict, batch_size: int = 1000):
+        """
+        Deletes vectors by id.
 
-            logger.info(f"Namespace '{namespace}' updated successfully!")
+        Args:
+            ids_by_namespace (dict): namespace -> list of record ``_id``s.
 
-        except Exception as e:
-            logger.error(f"Failed to upsert files from {folder_path} into namespace '{namespace}': {e}", exc_info=True)
+        Returns:
+            int: Number of ids deleted.
+        """
+        deleted = 0
+        for namespace, ids in ids_by_namespace.items():
+            for i in range(0, len(ids), batch_size):
+                batch = ids[i:i + batch_size]
+                self.store.delete(namespace, batch)
+                deleted += len(batch)
+            logger.info(f"Deleted {len(ids)} stale records from namespace '{namespace}'")
+        self.store.flush()
+        return deleted
 
     def describe_index(self):
         """Return index statistics."""
         try:
-            stats = self.index.describe_index_stats()
+            stats = self.store.stats()
             logger.info(f"Index stats: {stats}")
             return stats
         except Exception as e:
@@ -116,11 +232,8 @@ class PineconeWorker:
     def delete_index(self):
    
         try:
-            if self.pc.has_index(self.index_name):
-                self.pc.delete_index(self.index_name)
-                logger.info(f"Pinecone index '{self.index_name}' deleted successfully!")
-            else:
-                logger.warning(f"Index '{self.index_name}' does not exist.")
+            self.store.drop()
+            logger.info(f"Index '{self.index_name}' deleted successfully!")
         except Exception as e:
             logger.error(f"Failed to delete index '{self.index_name}': {e}", exc_info=True)
 
@@ -0,0 +1,132 @@
+# pipeline.py
+import json
+import logging
+from pathlib import Path
+from pdf_operations import PDFExtractor
+from image_processor import OCRUpdater
+from ocr_cache import OCRCache
+from manifest import ChunkManifest, ManifestDiff
+from pinecone_worker import NAMESPACES
+from metrics import DocumentTimings
+from memory import MemoryBudget
+
+# ---------------- Logging ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def spill_records(records, spill_dir: Path):
+    """
+    Pass-through generator that also writes every record to ``spill_dir``.
+
+    Debugging aid only: records go to ``records.jsonl`` (one compact JSON object
+    per line) and image bytes to ``images/``. The records themselves are yielded
+    unchanged so the pipeline behaves exactly as without spilling.
+    """
+    spill_dir = Path(spill_dir)
+    image_dir = spill_dir / "images"
+    image_dir.mkdir(parents=True, exist_ok=True)
+    with open(spill_dir / "records.jsonl", "w", encoding="utf-8") as f:
+        for record in records:
+            data = {k: v for k, v in record.items() if k != "image_bytes"}
+            if record.get("image_bytes"):
+                (image_dir / Path(record["file_path"]).name).write_bytes(record["image_bytes"])
+            f.write(json.dumps(data, ensure_ascii=False) + "\n")
+            yield record
+    logger.info(f"Spilled records to {spill_dir}")
+
+
+def run_document_pipeline(pdf_path: Path, pinecone_worker, workers: int = 1, spill_dir: Path = None,
+                          ocr_cache: OCRCache = None, manifest: ChunkManifest = None,
+                          pdf_bytes: bytes = None, timings: DocumentTimings = None,
+                          memory_budget: MemoryBudget = None) -> dict:
+    """
+    Streams one PDF from extraction through OCR into Pinecone, all in memory.
+
+    extraction (PDFExtractor.iter_records) -> manifest diff -> OCR (OCRUpdater.ocr_records)
+    -> optional disk spill -> upsert (PineconeWorker.upsert_stream) -> stale chunk delete
+
+    With a ``manifest`` the run is incremental: a PDF whose bytes are unchanged is
+    skipped without being parsed, unchanged chunks are neither OCR'd nor upserted,
+    and chunks that no longer exist are deleted from Pinecone.
+
+    Args:
+        pdf_path (Path): Local PDF to process.
+        pinecone_worker (PineconeWorker): Worker used for the upsert.
+        workers (int): Processes used for page-range sharding of long PDFs and for OCR.
+        spill_dir (Path, optional): When set, every record is also written there for debugging.
+        ocr_cache (OCRCache, optional): Cache consulted before running tesseract on an image.
+        manifest (ChunkManifest, optional): Store of what was indexed for each document.
+        pdf_bytes (bytes, optional): PDF content already in memory; ``pdf_path`` then only names it.
+        timings (DocumentTimings, optional): Receives extract/OCR/upsert times and page/chunk counts.
+            The stages stream into each other, so each one is timed net of the stage feeding it.
+        memory_budget (MemoryBudget, optional): Enables bounded-memory mode when it has a budget:
+            images are written to ``<spill_dir or the PDF's folder>/images`` as they are extracted
+            instead of travelling as bytes, and shard and OCR look-ahead shrink as RSS nears the budget.
+
+    Returns:
+        dict: Number of records upserted per namespace (empty if the PDF was unchanged).
+    """
+    timings = timings or DocumentTimings(str(pdf_path))
+    low_memory = memory_budget is not None and memory_budget.enabled
+    extractor = PDFExtractor(pdf_path, output_dir=spill_dir or Path(pdf_path).parent, pdf_bytes=pdf_bytes,
+                             low_memory=low_memory)
+    diff = None
+    if manifest is not None:
+        with timings.stage("manifest"):
+            doc_hash, diff = start_manifest_diff(manifest, pdf_path, extractor.pdf_name, pdf_bytes)
+        if diff is None:
+            return {}
+
+    records = timings.wrap(extractor.iter_records(workers, budget=memory_budget), "extract")
+    if diff is not None:
+        records = diff.filter(records, namespace_for)
+    records = timings.wrap(OCRUpdater(workers=workers, cache=ocr_cache).ocr_records(records, memory_budget),
+                           "ocr", inner="extract")
+    if spill_dir:
+        records = spill_records(records, spill_dir)
+    with timings.stage("upsert", inner="ocr"):
+        counts = pinecone_worker.upsert_stream(records)
+        if diff is not None:
+            finish_manifest_diff(manifest, pinecone_worker, extractor.pdf_name, doc_hash, diff)
+    timings.pages = extractor.page_count()
+    timings.chunks = sum(counts.values())
+    if ocr_cache is not None:
+        logger.info(f"OCR cache: {ocr_cache.stats()}")
+    return counts
+
+
+def namespace_for(record: dict):
+    return NAMESPACES.get(record.get("chunk_type"))
+
+
+def start_manifest_diff(manifest: ChunkManifest, pdf_path: Path, doc_id: str, pdf_bytes: bytes = None):
+    """
+    Compares a downloaded PDF with its manifest.
+
+    Returns:
+        tuple: ``(doc_hash, ManifestDiff)``, or ``(doc_hash, None)`` when the PDF is
+        byte-for-byte unchanged and can be skipped.
+    """
+    doc_hash = manifest.document_hash(pdf_path, pdf_bytes)
+    previous = manifest.get(doc_id)
+    if previous and previous.get("doc_hash") == doc_hash:
+        logger.info(f"'{doc_id}' is unchanged since {previous.get('updated_at')}, skipping")
+        return doc_hash, None
+    return doc_hash, ManifestDiff(previous)
+
+
+def finish_manifest_diff(manifest: ChunkManifest, pinecone_worker, doc_id: str, doc_hash: str, diff: ManifestDiff):
+    """
+    Deletes chunks that disappeared and stores the new manifest; call after a successful upsert.
+
+    Bumps the index version when any chunk was written or removed, which tells
+    the search API its cached answers are stale.
+    """
+    removed = diff.removed()
+    pinecone_worker.delete_records(removed)
+    manifest.save(doc_id, doc_hash, diff.current)
+    n_removed = sum(len(ids) for ids in removed.values())
+    if n_removed or len(diff.current) > diff.unchanged:
+        logger.info(f"Index version is now {manifest.bump_index_version(doc_id)}")
+    logger.info(f"'{doc_id}': {diff.unchanged} unchanged chunks skipped, {n_removed} removed")
@@ -3,13 +3,75 @@ Script: sample_uploader.py
 Purpose:
     Uploads all PDF files from a local folder to AWS S3 and sends SQS messages
     with the uploaded file keys for downstream ETL processing.
+
+    Uploads run in parallel (multipart for large files, see AWSHelper), messages
+    are enqueued with send_message_batch in groups of 10, and progress is
+    checkpointed to a JSON manifest (at most every few seconds, and at the end)
+    so an interrupted run resumes where it stopped.
+
+Usage:
+    python sample_uploader.py ./sample_pdfs --workers 16
 """
 
 import os
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from aws_helper import AWSHelper
 from pathlib import Path
 
-def upload_pdfs_to_s3(pdf_folder: Path, aws_helper: AWSHelper, destination_folder: str = "input"):
+MANIFEST_NAME = ".upload_manifest.json"
+CHECKPOINT_SEC = 5.0
+
+
+class UploadManifest:
+    """
+    Resumable record of which files were uploaded and enqueued.
+
+    Entries are keyed by file name and remember size and mtime, so a file that
+    changed since the last run is uploaded again.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries = json.loads(path.read_text()) if path.exists() else {}
+        self._lock = threading.Lock()
+        self._saved_at = time.monotonic()
+
+    @staticmethod
+    def _signature(pdf_file: Path) -> dict:
+        stat = pdf_file.stat()
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def state(self, pdf_file: Path) -> dict:
+        entry = self.entries.get(pdf_file.name)
+        if entry and {k: entry[k] for k in ("size", "mtime")} == self._signature(pdf_file):
+            return entry
+        return {}
+
+    def mark(self, pdf_file: Path, **flags):
+        with self._lock:
+            entry = self.state(pdf_file) or self._signature(pdf_file)
+            entry.update(flags)
+            self.entries[pdf_file.name] = entry
+
+    def save(self):
+        with self._lock:
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.entries, indent=2))
+            os.replace(tmp, self.path)
+            self._saved_at = time.monotonic()
+
+    def checkpoint(self, interval: float = CHECKPOINT_SEC):
+        """Saves if the last save is at least ``interval`` seconds old, so large runs do not rewrite it per file."""
+        if time.monotonic() - self._saved_at >= interval:
+            self.save()
+
+
+def upload_pdfs_to_s3(pdf_folder: Path, aws_helper: AWSHelper, destination_folder: str = "input",
+                      workers: int = 8, manifest_path: Path = None,
+                      checkpoint_sec: float = CHECKPOINT_SEC) -> dict:
     """
     Upload all PDF files in a folder to S3 and send SQS messages.
 
@@ -17,6 +79,12 @@ def upload_pdfs_to_s3(pdf_folder: Path, aws_helper: AWSHelper, destination_folde
         pdf_folder (Path): Local folder containing PDF files.
         aws_helper (AWSHelper): Initialized AWSHelper instance.
         destination_folder (str, optional): S3 folder to upload PDFs to. Defaults to "input".
+        workers (int, optional): Parallel uploads. Defaults to 8.
+        manifest_path (Path, optional): Checkpoint file. Defaults to ``<pdf_folder>/.upload_manifest.json``.
+        checkpoint_sec (float, optional): Minimum seconds between manifest saves; it is always saved at the end.
+
+    Returns:
+        dict: Throughput stats (files, bytes, skipped, failed, seconds, files/s, MB/s).
 
     Raises:
         FileNotFoundError: If the provided pdf_folder does not exist.
@@ -24,34 +92,76 @@ def upload_pdfs_to_s3(pdf_folder: Path, aws_helper: AWSHelper, destination_folde
     if not pdf_folder.exists():
         raise FileNotFoundError(f"{pdf_folder} not found")
 
-    for pdf_file in pdf_folder.glob("*.pdf"):
-        print(f"Processing {pdf_file.name}...")
+    manifest = UploadManifest(manifest_path or pdf_folder / MANIFEST_NAME)
+    pdf_files = sorted(pdf_folder.glob("*.pdf"))
+    to_upload = [f for f in pdf_files if not manifest.state(f).get("uploaded")]
+    to_enqueue = [f for f in pdf_files if manifest.state(f).get("uploaded") and not manifest.state(f).get("enqueued")]
+    skipped = len(pdf_files) - len(to_upload) - len(to_enqueue)
+    print(f"{len(pdf_files)} PDFs: {len(to_upload)} to upload, {len(to_enqueue)} to enqueue, {skipped} already done")
+
+    stats = {"files": 0, "bytes": 0, "skipped": skipped, "failed": 0}
+    start = time.monotonic()
+
+    def enqueue(files):
+        failed = set(aws_helper.send_messages([f.name for f in files]))
+        for f in files:
+            if f.name in failed:
+                stats["failed"] += 1
+                print(f"Failed to send SQS message for {f.name}")
+            else:
+                manifest.mark(f, enqueued=True)
 
-        # Upload PDF to S3
-        uploaded = aws_helper.upload_file(str(pdf_file), pdf_file.name, destination_folder=destination_folder)
-        if uploaded:
-            print(f"Uploaded {pdf_file.name} to S3")
+    pending = list(to_enqueue)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(aws_helper.upload_file, str(f), f.name, destination_folder=destination_folder): f
+                for f in to_upload
+            }
+            for future in as_completed(futures):
+                pdf_file = futures[future]
+                if future.result():
+                    manifest.mark(pdf_file, uploaded=True)
+                    stats["files"] += 1
+                    stats["bytes"] += pdf_file.stat().st_size
+                    pending.append(pdf_file)
+                else:
+                    stats["failed"] += 1
+                    print(f"Failed to upload {pdf_file.name}")
+                if len(pending) >= 10:
+                    enqueue(pending[:10])
+                    pending = pending[10:]
+                manifest.checkpoint(checkpoint_sec)
+        for i in range(0, len(pending), 10):
+            enqueue(pending[i:i + 10])
+            manifest.checkpoint(checkpoint_sec)
+    finally:
+        # also keeps the uploads finished before an error or Ctrl+C
+        manifest.save()
 
-            # Send SQS message with the file key
-            try:
-                response = aws_helper.sqs.send_message(
-                    QueueUrl=aws_helper.queue_url,
-                    MessageBody=pdf_file.name
-                )
-                print(f"SQS message sent for {pdf_file.name}: {response.get('MessageId')}")
-            except Exception as e:
-                print(f"Failed to send SQS message for {pdf_file.name}: {e}")
-        else:
-            print(f"Failed to upload {pdf_file.name}")
+    elapsed = time.monotonic() - start
+    stats["seconds"] = round(elapsed, 2)
+    stats["files_per_sec"] = round(stats["files"] / elapsed, 2) if elapsed else 0.0
+    stats["mb_per_sec"] = round(stats["bytes"] / 1024 / 1024 / elapsed, 2) if elapsed else 0.0
+    print(f"Uploaded {stats['files']} files ({stats['bytes'] / 1024 / 1024:.1f} MB) in {stats['seconds']}s: "
+          f"{stats['files_per_sec']} files/s, {stats['mb_per_sec']} MB/s, {stats['failed']} failed")
+    return stats
 
 
 if __name__ == "__main__":
-    # Get PDFs folder from environment variable or use default
-    pdf_folder_path = os.getenv("PDF_FOLDER_PATH", "./sample_pdfs")
-    pdf_folder = Path(pdf_folder_path)
+    parser = argparse.ArgumentParser(description="Bulk upload PDFs to S3 and enqueue them for the ETL worker.")
+    # Get PDFs folder from the command line, environment variable or default
+    parser.add_argument("pdf_folder", nargs="?", default=os.getenv("PDF_FOLDER_PATH", "./sample_pdfs"))
+    parser.add_argument("--destination", default="input", help="S3 folder key from config.yaml")
+    parser.add_argument("--workers", type=int, default=8, help="parallel uploads")
+    parser.add_argument("--manifest", type=Path, default=None, help="checkpoint file for resuming")
+    parser.add_argument("--checkpoint-sec", type=float, default=CHECKPOINT_SEC,
+                        help="minimum seconds between manifest saves")
+    args = parser.parse_args()
 
     # Initialize AWS helper
     aws = AWSHelper()
 
     # Upload PDFs and send SQS messages
-    upload_pdfs_to_s3(pdf_folder, aws)
+    upload_pdfs_to_s3(Path(args.pdf_folder), aws, args.destination, args.workers, args.manifest,
+                      args.checkpoint_sec)
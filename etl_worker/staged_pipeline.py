@@ -0,0 +1,247 @@
+# staged_pipeline.py
+import os
+import time
+import asyncio
+import logging
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from aws_helper import AWSHelper, VisibilityHeartbeat
+from pdf_operations import PDFExtractor
+from image_processor import OCRUpdater
+from ocr_cache import get_ocr_cache
+from pipeline import namespace_for, start_manifest_diff, finish_manifest_diff
+from metrics import DocumentTimings, message_queue_lag, observe_queue_lag, record_document
+from memory import MB, MemoryBudget
+
+# ---------------- Logging ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+# ---------------- Config ----------------
+# Concurrency per stage: network stages run on threads, CPU stages on the process pool
+STAGE_CONCURRENCY = {
+    "download": 4,
+    "extract": max(1, (os.cpu_count() or 2) // 2),
+    "ocr": max(1, (os.cpu_count() or 2) // 2),
+    "upsert": 4,
+    "finalize": 4,
+}
+QUEUE_SIZE = 2  # documents waiting between two stages
+ADMIT_RETRY_SEC = 0.5  # poll pause while the memory budget holds back new documents
+
+
+# ---------------- Process pool entry points ----------------
+def _extract_records(pdf_path: str, output_dir: str, pdf_bytes: bytes = None, low_memory: bool = False):
+    extractor = PDFExtractor(pdf_path, output_dir, pdf_bytes, low_memory)
+    return list(extractor.iter_records()), extractor.page_count()
+
+
+def _ocr_records(records):
+    return list(OCRUpdater(cache=get_ocr_cache()).ocr_records(records))
+
+
+class DocumentJob:
+    """One SQS message travelling through the stages."""
+    def __init__(self, msg: dict, workspace: Path):
+        self.msg = msg
+        self.file_key = msg['Body']
+        self.workspace = workspace
+        self.pdf_path = workspace / Path(self.file_key).name
+        self.doc_id = self.pdf_path.stem
+        self.pdf_bytes = None
+        self.records = []
+        self.doc_hash = None
+        self.diff = None
+        self.downloaded = False
+        self.skip = False    # nothing left to do, go straight to finalize
+        self.error = None
+        self.timings = DocumentTimings(self.file_key, message_queue_lag(msg))
+        self.queued_at = time.monotonic()
+
+
+class StagedPipeline:
+    """
+    Asyncio ETL engine that overlaps documents across stages.
+
+    download -> extract -> ocr -> upsert -> finalize (move in S3, delete message)
+
+    Every stage has its own worker tasks (``STAGE_CONCURRENCY``) and hands documents
+    on through a bounded asyncio queue, so document N+1 downloads while document N is
+    OCR'd, and a slow stage holds back the ones before it instead of piling records
+    up in memory. Network stages run in threads, extract and OCR in a shared process
+    pool. The poller only receives as many SQS messages as there are free slots
+    (``max_in_flight``) and a VisibilityHeartbeat keeps them hidden meanwhile.
+
+    Every stage reports its duration and how long the document waited in its
+    inbox (``etl_queue_lag_seconds{queue=<stage>}``); finalize records the
+    document's timing summary in the metrics and the ETL log.
+
+    With ``memory_budget_mb`` extraction writes images into the document's
+    workspace instead of returning their bytes, and the poller stops taking new
+    messages while the RSS of the pipeline and its pool is above the budget's
+    soft limit. Documents share the process here, so unlike ``process_document``
+    the summaries carry no per-document peak.
+
+    Attributes:
+        aws (AWSHelper): AWS helper for S3 and SQS.
+        pinecone_worker (PineconeWorker): Upsert target.
+        work_root (Path): Folder for per-document workspaces.
+        manifest (ChunkManifest): Optional manifest for incremental re-ingestion.
+        max_in_flight (int): Documents allowed in the pipeline at once.
+        memory (MemoryBudget): RSS budget of the whole pipeline.
+    """
+    def __init__(self, aws: AWSHelper, pinecone_worker, work_root: Path, manifest=None,
+                 concurrency: dict = None, max_in_flight: int = None, poll_interval: int = 10,
+                 logger: logging.Logger = logger, memory_budget_mb: int = None):
+        self.aws = aws
+        self.pinecone_worker = pinecone_worker
+        self.work_root = Path(work_root)
+        self.manifest = manifest
+        self.concurrency = {**STAGE_CONCURRENCY, **(concurrency or {})}
+        self.max_in_flight = max_in_flight or sum(self.concurrency.values())
+        self.poll_interval = poll_interval
+        self.logger = logger
+        self.memory = MemoryBudget((memory_budget_mb or 0) * MB)
+        self.heartbeat = None
+        self.pool = None
+        self._slots = None
+        self._active = 0
+
+    def run(self):
+        """Runs the pipeline until interrupted."""
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        ctx = multiprocessing.get_context("spawn")
+        cpu_workers = self.concurrency["extract"] + self.concurrency["ocr"]
+        stages = [
+            ("download", self._download),
+            ("extract", self._extract),
+            ("ocr", self._ocr),
+            ("upsert", self._upsert),
+            ("finalize", self._finalize),
+        ]
+        queues = [asyncio.Queue(maxsize=QUEUE_SIZE) for _ in stages]
+        with VisibilityHeartbeat(self.aws) as self.heartbeat, self.memory, \
+                ProcessPoolExecutor(max_workers=cpu_workers, mp_context=ctx) as self.pool:
+            tasks = [asyncio.create_task(self._poll(queues[0]))]
+            for i, (name, handler) in enumerate(stages):
+                outbox = queues[i + 1] if i + 1 < len(stages) else None
+                for _ in range(self.concurrency[name]):
+                    tasks.append(asyncio.create_task(self._stage(name, handler, queues[i], outbox, queues[-1])))
+            self.logger.info(f"Staged pipeline started: {self.concurrency}, max in flight {self.max_in_flight}")
+            await asyncio.gather(*tasks)
+
+    async def _poll(self, outbox: asyncio.Queue):
+        while True:
+            await self._slots.acquire()
+            # Over the soft limit of the memory budget: wait for documents to finish
+            while self._active and self.memory.limit(2) < 2:
+                await asyncio.sleep(ADMIT_RETRY_SEC)
+            free = 1
+            while free < self.memory.limit(10) and not self._slots.locked():
+                await self._slots.acquire()
+                free += 1
+            busy = free < self.max_in_flight
+            messages = await asyncio.to_thread(self.aws.receive_messages, free, 1 if busy else None)
+            for _ in range(free - len(messages)):
+                self._slots.release()
+            if not messages:
+                if not busy:
+                    await asyncio.sleep(self.poll_interval)
+                continue
+            for msg in messages:
+                self.heartbeat.track(msg['ReceiptHandle'])
+                workspace = Path(tempfile.mkdtemp(prefix=f"{Path(msg['Body']).stem}_", dir=self.work_root))
+                self._active += 1
+                await outbox.put(DocumentJob(msg, workspace))
+
+    async def _stage(self, name, handler, inbox: asyncio.Queue, outbox, finalize: asyncio.Queue):
+        while True:
+            job = await inbox.get()
+            observe_queue_lag(name, time.monotonic() - job.queued_at)
+            try:
+                if outbox is None:
+                    await handler(job)   # finalize times itself, the summary is taken there
+                else:
+                    with job.timings.stage(name):
+                        await handler(job)
+            except Exception as e:
+                job.error = e
+                self.logger.error(f"{name} failed for {job.file_key}: {e}", exc_info=True)
+            if outbox is None:
+                continue
+            # failed and skipped documents jump straight to finalize
+            job.queued_at = time.monotonic()
+            await (finalize if (job.error or job.skip) else outbox).put(job)
+
+    async def _download(self, job: DocumentJob):
+        job.pdf_bytes, job.downloaded = await asyncio.to_thread(self.aws.fetch, job.file_key, str(job.pdf_path))
+        if not job.downloaded:
+            self.logger.warning(f"Could not download {job.file_key}, dropping message")
+            job.skip = True
+            return
+        self.logger.info(f"Downloaded file: {job.file_key} ({'in memory' if job.pdf_bytes else job.pdf_path})")
+        if self.manifest is not None:
+            job.doc_hash, job.diff = await asyncio.to_thread(start_manifest_diff, self.manifest, job.pdf_path,
+                                                             job.doc_id, job.pdf_bytes)
+            job.skip = job.diff is None
+
+    async def _extract(self, job: DocumentJob):
+        loop = asyncio.get_running_loop()
+        records, job.timings.pages = await loop.run_in_executor(self.pool, _extract_records, str(job.pdf_path),
+                                                                str(job.workspace), job.pdf_bytes,
+                                                                self.memory.enabled)
+        job.pdf_bytes = None
+        if job.diff is not None:
+            records = list(job.diff.filter(records, namespace_for))
+        job.records = records
+        self.logger.info(f"PDF extraction done for {job.doc_id}: {len(records)} records")
+
+    async def _ocr(self, job: DocumentJob):
+        images = [r for r in job.records
+                  if r.get("chunk_type") == "image" and (r.get("image_bytes") or r.get("image_sha256"))]
+        if not images:
+            return
+        loop = asyncio.get_running_loop()
+        done = await loop.run_in_executor(self.pool, _ocr_records, images)
+        by_id = {r["_id"]: r for r in done}
+        job.records = [by_id.get(r["_id"], r) for r in job.records]
+        self.logger.info(f"OCR completed for {len(images)} images of {job.doc_id}")
+
+    async def _upsert(self, job: DocumentJob):
+        counts = await asyncio.to_thread(self.pinecone_worker.upsert_stream, job.records)
+        job.timings.chunks = sum(counts.values())
+        if job.diff is not None:
+            await asyncio.to_thread(finish_manifest_diff, self.manifest, self.pinecone_worker,
+                                    job.doc_id, job.doc_hash, job.diff)
+        job.records = []
+        self.logger.info(f"Pinecone upsert done for {job.doc_id}: {counts}")
+
+    async def _finalize(self, job: DocumentJob):
+        handle = job.msg['ReceiptHandle']
+        try:
+            if job.error is None:
+                with job.timings.stage("finalize"):
+                    if job.downloaded:
+                        await asyncio.to_thread(self.aws.move_file, job.file_key, "input", "processed")
+                        self.logger.info(f"Moved {job.file_key} to processed folder")
+                    failed = await asyncio.to_thread(self.aws.delete_messages, [handle])
+                if failed:
+                    self.logger.error(f"Could not delete message for {job.file_key}")
+                self.logger.info(f"Finished message: {job.file_key}")
+        finally:
+            if not job.downloaded and job.error is None:
+                job.timings.status = "not_found"
+            summary = job.timings.summary()
+            record_document(summary)
+            self.logger.info(f"Timings for {job.file_key}: {summary['stages_sec']}", extra={"timings": summary})
+            self.heartbeat.untrack(handle)
+            shutil.rmtree(job.workspace, ignore_errors=True)
+            job.records = []
+            self._active -= 1
+            self._slots.release()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The worker's modules are imported flat, as when running from etl_worker/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
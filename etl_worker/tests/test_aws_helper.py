@@ -0,0 +1,56 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from aws_helper import AWSHelper
+
+
+class Body:
+    def close(self):
+        pass
+
+
+class FakeS3:
+    """Objects are always over the in-memory limit, so ``fetch`` goes through ``download_file``."""
+    def __init__(self, error=None):
+        self.error = error
+
+    def get_object(self, Bucket, Key):
+        return {"ContentLength": 100, "Body": Body()}
+
+    def download_file(self, bucket, key, local_path, Config=None):
+        if self.error:
+            raise ClientError({"Error": {"Code": self.error}}, "HeadObject")
+        with open(local_path, "wb") as f:
+            f.write(b"%PDF")
+
+
+def make_helper(s3):
+    aws = AWSHelper.__new__(AWSHelper)
+    aws.config = {"s3": {"bucket_name": "bucket", "folders": {"input": "input/"}}}
+    aws.s3 = s3
+    aws.transfer_config = None
+    aws.in_memory_max_bytes = 10
+    return aws
+
+
+def test_large_object_is_downloaded_to_disk(tmp_path):
+    pdf_bytes, found = make_helper(FakeS3()).fetch("a.pdf", str(tmp_path / "a.pdf"))
+
+    assert (pdf_bytes, found) == (None, True)
+    assert (tmp_path / "a.pdf").read_bytes() == b"%PDF"
+
+
+@pytest.mark.parametrize("code", ["404", "NoSuchKey"])
+def test_missing_object_is_not_found(tmp_path, code):
+    assert make_helper(FakeS3(error=code)).fetch("a.pdf", str(tmp_path / "a.pdf")) == (None, False)
+
+
+@pytest.mark.parametrize("code", ["SlowDown", "500", "403"])
+def test_other_download_errors_are_raised(tmp_path, code):
+    with pytest.raises(ClientError):
+        make_helper(FakeS3(error=code)).fetch("a.pdf", str(tmp_path / "a.pdf"))
+
+
+def test_disk_errors_are_raised(tmp_path):
+    with pytest.raises(OSError):
+        make_helper(FakeS3()).fetch("a.pdf", str(tmp_path / "missing_dir" / "a.pdf"))
@@ -0,0 +1,97 @@
+import sys
+import types
+
+from chunker import StreamingChunker, token_length_function
+
+
+def run(chunker, pages):
+    chunks = []
+    for page_number, text in pages:
+        chunks.extend(chunker.feed(text, page_number))
+    chunks.extend(chunker.flush())
+    return chunks
+
+
+def test_unfinished_sentence_carries_over_to_next_page():
+    chunks = run(StreamingChunker(500, 50), [(1, "The total contract value is"),
+                                             (2, "fifteen million dollars.")])
+
+    assert chunks == [{"text": "The total contract value is fifteen million dollars.", "page_start": 1, "page_end": 2}]
+
+
+def test_finished_sentence_starts_a_new_paragraph_in_the_same_chunk():
+    chunks = run(StreamingChunker(500, 50), [(1, "First page ends here."), (2, "Second page.")])
+
+    assert chunks == [{"text": "First page ends here.\n\nSecond page.", "page_start": 1, "page_end": 2}]
+
+
+def test_chunks_respect_size_and_carry_overlap():
+    text = " ".join(f"word{i:03d}" for i in range(200))
+    chunks = run(StreamingChunker(100, 30), [(1, text)])
+
+    assert len(chunks) > 1
+    assert all(len(c["text"]) <= 100 for c in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        first_word = current["text"].split()[0]
+        assert first_word in previous["text"].split()[-4:]
+    words = " ".join(c["text"] for c in chunks).split()
+    assert sorted(set(words)) == sorted(text.split())
+
+
+def test_chunk_reports_pages_it_spans_after_boundary():
+    pages = [(n, f"Paragraph on page {n} runs on and") for n in range(1, 4)]
+    chunks = run(StreamingChunker(60, 0), pages)
+
+    assert chunks[0]["page_start"] == 1
+    assert chunks[-1]["page_end"] == 3
+    assert all(c["page_start"] <= c["page_end"] for c in chunks)
+
+
+def test_feed_holds_back_partial_chunk_until_flush():
+    chunker = StreamingChunker(500, 50)
+
+    assert list(chunker.feed("A short page.", 1)) == []
+    assert list(chunker.flush()) == [{"text": "A short page.", "page_start": 1, "page_end": 1}]
+    assert list(chunker.flush()) == []
+
+
+def test_flush_resets_state_between_documents():
+    chunker = StreamingChunker(500, 50)
+    run(chunker, [(1, "Document one ends without a period")])
+
+    chunks = run(chunker, [(1, "document two")])
+
+    assert chunks == [{"text": "document two", "page_start": 1, "page_end": 1}]
+
+
+def test_blank_pages_are_skipped():
+    chunks = run(StreamingChunker(500, 50), [(1, "Text"), (2, "   \n "), (3, "")])
+
+    assert chunks == [{"text": "Text", "page_start": 1, "page_end": 1}]
+
+
+def test_token_length_falls_back_to_words_without_tiktoken(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tiktoken", None)  # makes the import fail
+
+    length = token_length_function()
+
+    assert length("three word text") == 3
+
+
+def test_token_length_uses_tiktoken_when_installed(monkeypatch):
+    encoding = types.SimpleNamespace(encode=lambda text, disallowed_special: list(text))
+    monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=lambda name: encoding))
+
+    length = token_length_function()
+
+    assert length("abc de") == 6
+
+
+def test_from_tokens_sizes_chunks_by_token_count(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    chunker = StreamingChunker.from_tokens(chunk_size=10, chunk_overlap=2)
+
+    chunks = run(chunker, [(1, " ".join(["tok"] * 35))])
+
+    assert all(len(c["text"].split()) <= 10 for c in chunks)
+    assert len(chunks) == 5  # 10 words, then 8 new ones per chunk after the 2-word overlap
@@ -0,0 +1,74 @@
+from manifest import ChunkManifest, ManifestDiff
+
+
+def namespace_for(record):
+    return {"paragraph": "pdf-paragraphs", "table": "pdf-tables"}.get(record["chunk_type"])
+
+
+def record(chunk_id, text, chunk_type="paragraph", **extra):
+    return {"_id": chunk_id, "chunk_text": text, "chunk_type": chunk_type, **extra}
+
+
+def manifest_of(*records):
+    return {"chunks": [{"id": r["_id"], "namespace": namespace_for(r), "hash": ChunkManifest.chunk_hash(r)}
+                       for r in records]}
+
+
+def test_first_ingestion_passes_everything_through():
+    diff = ManifestDiff(None)
+    records = [record("d_p1", "a"), record("d_t1", "b", "table")]
+
+    assert list(diff.filter(records, namespace_for)) == records
+    assert diff.unchanged == 0
+    assert set(diff.current) == {"d_p1", "d_t1"}
+    assert diff.removed() == {}
+
+
+def test_only_new_or_changed_chunks_pass():
+    previous = manifest_of(record("d_p1", "same"), record("d_p2", "old"))
+    diff = ManifestDiff(previous)
+    new = [record("d_p1", "same"), record("d_p2", "edited"), record("d_p3", "added")]
+
+    passed = list(diff.filter(new, namespace_for))
+
+    assert [r["_id"] for r in passed] == ["d_p2", "d_p3"]
+    assert diff.unchanged == 1
+    assert set(diff.current) == {"d_p1", "d_p2", "d_p3"}
+
+
+def test_volatile_fields_do_not_count_as_changes():
+    previous = manifest_of(record("d_p1", "same", created_at="2024-01-01", source="/tmp/a/d.pdf"))
+    diff = ManifestDiff(previous)
+
+    passed = list(diff.filter([record("d_p1", "same", created_at="2025-06-30", source="/tmp/b/d.pdf")],
+                              namespace_for))
+
+    assert passed == []
+    assert diff.unchanged == 1
+
+
+def test_namespace_move_counts_as_change():
+    diff = ManifestDiff(manifest_of(record("d_1", "x")))
+
+    passed = list(diff.filter([record("d_1", "x", "table")], namespace_for))
+
+    assert [r["_id"] for r in passed] == ["d_1"]
+    assert diff.current["d_1"]["namespace"] == "pdf-tables"
+    assert diff.removed() == {"pdf-paragraphs": ["d_1"]}
+
+
+def test_records_without_namespace_pass_untracked():
+    diff = ManifestDiff(None)
+    image = record("d_i1", "", "image")
+
+    assert list(diff.filter([image], namespace_for)) == [image]
+    assert diff.current == {}
+
+
+def test_removed_lists_vanished_chunks_by_namespace():
+    previous = manifest_of(record("d_p1", "a"), record("d_p2", "b"), record("d_t1", "c", "table"))
+    diff = ManifestDiff(previous)
+
+    list(diff.filter([record("d_p1", "a")], namespace_for))
+
+    assert diff.removed() == {"pdf-paragraphs": ["d_p2"], "pdf-tables": ["d_t1"]}
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+import pinecone_worker
+from pinecone_worker import PineconeWorker
+from vector_store import VectorStore
+
+
+class RecordingStore(VectorStore):
+    """Keeps every upserted batch; the first ``failures`` calls per namespace raise."""
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = {}
+        self.batches = []
+        self.flushed = 0
+
+    def upsert(self, namespace, records):
+        self.calls[namespace] = self.calls.get(namespace, 0) + 1
+        if self.calls[namespace] <= self.failures:
+            raise ConnectionError("503 Service Unavailable")
+        self.batches.append((namespace, list(records)))
+
+    def flush(self):
+        self.flushed += 1
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(pinecone_worker, "UPSERT_BACKOFF_SEC", 0)
+
+
+def paragraph(i, text="some text"):
+    return {"_id": f"doc_p{i}", "chunk_text": text, "chunk_type": "paragraph", "page_number": 1}
+
+
+def test_batches_are_cut_at_max_records():
+    store = RecordingStore()
+    results = PineconeWorker(store=store).upsert_bulk(
+        (("pdf-paragraphs", paragraph(i)) for i in range(25)), max_records=10)
+
+    assert [r["records"] for r in results] == [10, 10, 5]
+    assert all(r["ok"] and r["attempts"] == 1 for r in results)
+    assert sorted(r["_id"] for _, batch in store.batches for r in batch) == sorted(f"doc_p{i}" for i in range(25))
+
+
+def test_batches_are_cut_at_max_bytes():
+    store = RecordingStore()
+    entries = [paragraph(i, "x" * 300) for i in range(6)]
+    record_size = len(json.dumps(PineconeWorker._to_record(entries[0])))
+
+    results = PineconeWorker(store=store).upsert_bulk(
+        (("pdf-paragraphs", e) for e in entries), max_records=100, max_bytes=2 * record_size + 1)
+
+    assert [r["records"] for r in results] == [2, 2, 2]
+
+
+def test_namespaces_are_batched_separately_and_empty_text_skipped():
+    store = RecordingStore()
+    entries = [("pdf-paragraphs", paragraph(1)), ("pdf-tables", paragraph(2)), ("pdf-paragraphs", paragraph(3, ""))]
+
+    results = PineconeWorker(store=store).upsert_bulk(iter(entries))
+
+    assert {r["namespace"]: r["records"] for r in results} == {"pdf-paragraphs": 1, "pdf-tables": 1}
+
+
+def test_failed_batch_is_retried_then_succeeds():
+    store = RecordingStore(failures=2)
+    results = PineconeWorker(store=store).upsert_bulk([("pdf-paragraphs", paragraph(1))], max_retries=3)
+
+    assert results == [{"namespace": "pdf-paragraphs", "records": 1, "attempts": 3, "ok": True, "error": None}]
+
+
+def test_batch_fails_after_max_retries():
+    store = RecordingStore(failures=10)
+    results = PineconeWorker(store=store).upsert_bulk([("pdf-paragraphs", paragraph(1))], max_retries=2)
+
+    assert len(results) == 1
+    assert results[0]["ok"] is False
+    assert results[0]["attempts"] == 3
+    assert "503" in results[0]["error"]
+    assert store.calls["pdf-paragraphs"] == 3
+
+
+def test_upsert_stream_counts_per_namespace_and_flushes():
+    store = RecordingStore()
+    records = [paragraph(1), paragraph(2), {"_id": "doc_t1", "chunk_text": "a | b", "chunk_type": "table"},
+               {"_id": "doc_x", "chunk_text": "ignored", "chunk_type": "unknown"}]
+
+    counts = PineconeWorker(store=store).upsert_stream(records)
+
+    assert counts == {"pdf-paragraphs": 2, "pdf-tables": 1}
+    assert store.flushed == 1
+
+
+def test_upsert_stream_raises_when_a_batch_fails():
+    store = RecordingStore(failures=10)
+
+    with pytest.raises(RuntimeError, match="1/1 upsert batches failed"):
+        PineconeWorker(store=store).upsert_stream([paragraph(1)])
+    assert store.flushed == 0